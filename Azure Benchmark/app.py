@@ -1,9 +1,16 @@
 from flask import Flask, render_template
-import os, json
+import os, sys, json
 from jinja2 import ChoiceLoader, FileSystemLoader
 
+# mcbench lives at the repo root
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
 # Import your blueprints
 from routes.region_selector import region_selector_bp
+from mcbench import metrics
+from mcbench.ingest import Ingest, create_blueprint as create_ingest_blueprint
+from mcbench.results import RESULTS_DIR
 
 def create_app():
     app = Flask(__name__, template_folder="templates")  # main templates/
@@ -16,6 +23,12 @@ def create_app():
 
     # Register blueprints
     app.register_blueprint(region_selector_bp, url_prefix="/regions")
+    # Benchmark VMs can push their agent results here (see mcbench/ingest.py)
+    app.register_blueprint(create_ingest_blueprint(Ingest(os.path.join(REPO_ROOT, RESULTS_DIR))), url_prefix="/ingest")
+    # Prometheus metrics at /metrics (see mcbench/metrics.py). This app makes no Azure calls and runs
+    # no jobs, so unlike the GCP app there is no SDK to instrument: only the latency cache counters appear
+    metrics.install()
+    app.register_blueprint(metrics.create_blueprint())
 
     # Load regions from JSON-data/selected_regions.json
     JSON_FILE = os.path.join("JSON-data", "selected_regions.json")
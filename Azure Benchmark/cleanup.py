@@ -1,18 +1,20 @@
 import os
 import json
-from azure.identity import AzureCliCredential
-from azure.mgmt.resource import ResourceManagementClient
-from azure.mgmt.subscription import SubscriptionClient
+import argparse
 from tabulate import tabulate
 
 # Paths
 JSON_DATA_DIR = "JSON-data"
 TO_CLEAN_FILE = os.path.join(JSON_DATA_DIR, "to_clean.json")
 
+# Azure SDK modules are imported where they are used, so startup stays fast
+
 def get_credentials():
+    from azure.identity import AzureCliCredential
     return AzureCliCredential()
 
 def list_subscriptions(credential):
+    from azure.mgmt.subscription import SubscriptionClient
     subscription_client = SubscriptionClient(credential)
     subscriptions = list(subscription_client.subscriptions.list())
 
@@ -33,29 +35,52 @@ def list_subscriptions(credential):
 
     return sub_dict
 
+def choose_subscription(subscriptions_dict, choice=None, ask=True):
+    """Subscription ID for `choice`, an option number or the ID itself
+
+    Without a choice the only subscription is used; if there are several, one is asked for (or None without `ask`).
+    """
+    if choice is None:
+        if len(subscriptions_dict) == 1:
+            return next(iter(subscriptions_dict.values()))
+        if not ask:
+            print("Several subscriptions found; choose one with --subscription.")
+            return None
+        choice = input("\nSelect subscription (enter number): ").strip()
+    if choice in subscriptions_dict.values():
+        return choice
+    return subscriptions_dict.get(choice)
+
 def delete_resource_group_async(credential, subscription_id, resource_group_name, location):
+    from azure.core.exceptions import ResourceNotFoundError
+    from azure.mgmt.resource import ResourceManagementClient
     resource_client = ResourceManagementClient(credential, subscription_id)
     try:
         print(f"🗑️ Sending delete request for resource group: {resource_group_name} (Location: {location}) ...")
         # Fire the delete request but DO NOT wait
         resource_client.resource_groups.begin_delete(resource_group_name)
         print(f"➡️ Delete initiated for {resource_group_name}")
+    except ResourceNotFoundError:
+        # Already deleted, or the deployment failed before creating it
+        print(f"ℹ️ Resource group {resource_group_name} does not exist")
     except Exception as e:
         print(f"⚠️ Failed to start deletion for {resource_group_name}: {e}")
         return False
     return True
 
-def cleanup_resources(subscription_id):
-    if not os.path.exists(TO_CLEAN_FILE):
-        print(f"No {TO_CLEAN_FILE} file found. Nothing to clean.")
-        return
+def cleanup_resources(subscription_id, cleanup_data=None):
+    """Start deleting the resource groups of `cleanup_data` (default: to_clean.json); returns those that could not be"""
+    if cleanup_data is None:
+        if not os.path.exists(TO_CLEAN_FILE):
+            print(f"No {TO_CLEAN_FILE} file found. Nothing to clean.")
+            return []
 
-    with open(TO_CLEAN_FILE, "r") as f:
-        cleanup_data = json.load(f)
+        with open(TO_CLEAN_FILE, "r") as f:
+            cleanup_data = json.load(f)
 
     if not cleanup_data:
         print("No resources to clean. File is empty.")
-        return
+        return []
 
     credential = get_credentials()
     remaining = []
@@ -79,16 +104,20 @@ def cleanup_resources(subscription_id):
         print("\n⚠️ Some delete requests could not be started. Check to_clean.json for details.")
     else:
         print("\n🚀 All delete requests sent. Resource groups will be cleaned up in the background by Azure.")
+    return remaining
 
 def main():
+    parser = argparse.ArgumentParser(description=f"Delete the resource groups listed in {TO_CLEAN_FILE}")
+    parser.add_argument("--subscription", help="option number or ID of the subscription (asked for if not given)")
+    args = parser.parse_args()
+
     credential = get_credentials()
     subscriptions_dict = list_subscriptions(credential)
 
     if not subscriptions_dict:
         return
 
-    sub_choice = input("\nSelect subscription (enter number): ").strip()
-    subscription_id = subscriptions_dict.get(sub_choice)
+    subscription_id = choose_subscription(subscriptions_dict, args.subscription)
 
     if not subscription_id:
         print("❌ Invalid subscription choice.")
@@ -1,21 +1,31 @@
 import os
+import sys
 import json
-from azure.identity import AzureCliCredential
-from azure.mgmt.compute import ComputeManagementClient
-from azure.mgmt.network import NetworkManagementClient
-from azure.mgmt.resource import ResourceManagementClient
-from azure.mgmt.subscription import SubscriptionClient
+import base64
+import shutil
+import argparse
 from tabulate import tabulate
 import datetime
-import matplotlib.pyplot as plt
+
+# mcbench lives at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcbench import journal as wal
+from mcbench.reaper import run_tags
 
 # Paths
 JSON_DATA_DIR = "JSON-data"
 DEPLOYMENT_LOG_FILE = os.path.join(JSON_DATA_DIR, "deployment_log.json")
 TO_CLEAN_FILE = os.path.join(JSON_DATA_DIR, "to_clean.json")
+# Write-ahead log of every create; --resume continues a crashed run from it
+JOURNAL_FILE = os.path.join(JSON_DATA_DIR, wal.JOURNAL_FILE)
+HISTORY_DIR = os.path.join(JSON_DATA_DIR, "history")
 DEPLOYMENT_PLOT_FILE = "deployment_time.png"
 
+# The Azure SDK and matplotlib take seconds to import, so each is imported by
+# the function that uses it rather than at startup.
+
 def get_credentials():
+    from azure.identity import AzureCliCredential
     return AzureCliCredential()
 
 def validate_vm_name(name):
@@ -28,6 +38,7 @@ def validate_vm_name(name):
     return valid_name
 
 def list_subscriptions(credential):
+    from azure.mgmt.subscription import SubscriptionClient
     subscription_client = SubscriptionClient(credential)
     subscriptions = list(subscription_client.subscriptions.list())
     
@@ -41,7 +52,24 @@ def list_subscriptions(credential):
     print(tabulate(rows, headers=headers, tablefmt="grid"))
     return {str(idx): sub.subscription_id for idx, sub in enumerate(subscriptions, 1)}
 
+def choose_subscription(subscriptions_dict, choice=None, ask=True):
+    """Subscription ID for `choice`, an option number or the ID itself
+
+    Without a choice the only subscription is used; if there are several, one is asked for (or None without `ask`).
+    """
+    if choice is None:
+        if len(subscriptions_dict) == 1:
+            return next(iter(subscriptions_dict.values()))
+        if not ask:
+            print("Several subscriptions found; choose one with --subscription.")
+            return None
+        choice = input("\nSelect subscription (enter number): ").strip()
+    if choice in subscriptions_dict.values():
+        return choice
+    return subscriptions_dict.get(choice)
+
 def list_virtual_machines(credential, subscription_id):
+    from azure.mgmt.compute import ComputeManagementClient
     compute_client = ComputeManagementClient(credential, subscription_id)
     vms = list(compute_client.virtual_machines.list_all())
     
@@ -70,19 +98,35 @@ def create_infrastructure(
     location,
     vm_name,
     vm_size,
-    vm_image
+    vm_image,
+    log_to_files=True,
+    custom_data=None,
+    journal=wal.NULL_JOURNAL,
+    unit=None,
+    run_id=None
 ):
+    from azure.mgmt.compute import ComputeManagementClient
+    from azure.mgmt.network import NetworkManagementClient
+    from azure.mgmt.resource import ResourceManagementClient
     resource_client = ResourceManagementClient(credential, subscription_id)
     network_client = NetworkManagementClient(credential, subscription_id)
     compute_client = ComputeManagementClient(credential, subscription_id)
 
     computer_name = validate_vm_name(vm_name)
+    unit = unit or location
+    # Run ID tags let mcbench/reaper.py find the group even if to_clean.json is lost
+    tags = run_tags(run_id or journal.run_id)
+
+    def intent(kind, name):
+        journal.intent(unit, kind, name, resource_group=resource_group_name, subscription_id=subscription_id)
 
     print(f"Creating Resource Group '{resource_group_name}'...")
-    resource_client.resource_groups.create_or_update(
+    intent("resource_group", resource_group_name)
+    resource_group = resource_client.resource_groups.create_or_update(
         resource_group_name,
-        {"location": location}
+        {"location": location, "tags": tags}
     )
+    journal.created(unit, "resource_group", resource_group_name, resource_group.id)
 
     vnet_name = f"{vm_name}-vnet"
     subnet_name = f"{vm_name}-subnet"
@@ -90,6 +134,7 @@ def create_infrastructure(
     nic_name = f"{vm_name}-nic"
 
     print("Creating VNet and Subnet...")
+    intent("virtual_network", vnet_name)
     network_client.virtual_networks.begin_create_or_update(
         resource_group_name,
         vnet_name,
@@ -103,6 +148,7 @@ def create_infrastructure(
     subnet = network_client.subnets.get(resource_group_name, vnet_name, subnet_name)
 
     print("Creating Public IP...")
+    intent("public_ip", ip_name)
     public_ip = network_client.public_ip_addresses.begin_create_or_update(
         resource_group_name,
         ip_name,
@@ -115,6 +161,7 @@ def create_infrastructure(
     ).result()
 
     print("Creating Network Interface...")
+    intent("network_interface", nic_name)
     nic = network_client.network_interfaces.begin_create_or_update(
         resource_group_name,
         nic_name,
@@ -136,6 +183,7 @@ def create_infrastructure(
 
     vm_parameters = {
         'location': location,
+        'tags': tags,
         'hardware_profile': {'vm_size': vm_size},
         'storage_profile': {
             'image_reference': vm_image,
@@ -155,7 +203,11 @@ def create_infrastructure(
             'network_interfaces': [{'id': nic.id}]
         }
     }
+    if custom_data:
+        # cloud-init runs it on first boot; the API expects base64
+        vm_parameters['os_profile']['custom_data'] = base64.b64encode(custom_data.encode()).decode()
 
+    intent("virtual_machine", vm_name)
     compute_client.virtual_machines.begin_create_or_update(
         resource_group_name,
         vm_name,
@@ -169,19 +221,27 @@ def create_infrastructure(
     print(f"End Time (UTC): {end_time.isoformat()}")
     print(f"Deployment Duration: {duration.total_seconds():.2f} seconds")
 
-    log_deployment_time(vm_name, resource_group_name, location, start_time, end_time, duration)
+    log_entry = deployment_entry(vm_name, resource_group_name, location, start_time, end_time, duration, vm_size)
+    # Dynamic IPs are only assigned once the VM is running
+    log_entry["public_ip"] = network_client.public_ip_addresses.get(resource_group_name, ip_name).ip_address
+    if log_to_files:
+        log_deployment_time(log_entry)
+    journal.done(unit, log_entry)
     print(f"\nVM '{vm_name}' has been successfully created!")
+    return log_entry
 
-def log_deployment_time(vm_name, resource_group_name, location, start_time, end_time, duration):
-    log_entry = {
+def deployment_entry(vm_name, resource_group_name, location, start_time, end_time, duration, vm_size=None):
+    return {
         "vm_name": vm_name,
         "resource_group": resource_group_name,
         "location": location,
+        "vm_size": vm_size,
         "start_time_utc": start_time.isoformat(),
         "end_time_utc": end_time.isoformat(),
         "duration_seconds": duration.total_seconds()
     }
 
+def log_deployment_time(log_entry):
     # Save to deployment_log.json
     if os.path.exists(DEPLOYMENT_LOG_FILE):
         with open(DEPLOYMENT_LOG_FILE, "r") as f:
@@ -204,9 +264,9 @@ def log_deployment_time(vm_name, resource_group_name, location, start_time, end_
         cleanup_data = []
 
     cleanup_data.append({
-        "resource_group": resource_group_name,
-        "location": location,
-        "vm_name": vm_name
+        "resource_group": log_entry["resource_group"],
+        "location": log_entry["location"],
+        "vm_name": log_entry["vm_name"]
     })
 
     with open(TO_CLEAN_FILE, "w") as f:
@@ -214,13 +274,14 @@ def log_deployment_time(vm_name, resource_group_name, location, start_time, end_
 
     print(f"Cleanup info saved to '{TO_CLEAN_FILE}' 🗑️")
 
-def deploy_to_regions(credential, subscription_id, regions, vm_config):
+def deploy_to_regions(credential, subscription_id, regions, vm_config, journal=wal.NULL_JOURNAL):
+    entries = []
     for region in regions:
         region_rg_name = f"Bench-{region}"
         region_vm_name = f"{vm_config['vm_name']}-{region}"
         
         print(f"\nDeploying to region: {region}")
-        create_infrastructure(
+        entries.append(create_infrastructure(
             credential=credential,
             subscription_id=subscription_id,
             resource_group_name=region_rg_name,
@@ -232,15 +293,141 @@ def deploy_to_regions(credential, subscription_id, regions, vm_config):
                 "offer": "0001-com-ubuntu-server-focal",
                 "sku": "20_04-lts",
                 "version": "latest"
-            } if isinstance(vm_config['os_image'], str) else vm_config['os_image']
-        )
+            } if isinstance(vm_config['os_image'], str) else vm_config['os_image'],
+            journal=journal
+        ))
+    return entries
+
+def archive_previous_logs():
+    """Move the previous run's log files into JSON-data/history/ instead of deleting them"""
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    for path in (DEPLOYMENT_LOG_FILE, TO_CLEAN_FILE, JOURNAL_FILE):
+        if os.path.exists(path):
+            stamp = datetime.datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y%m%d-%H%M%S")
+            stem, ext = os.path.splitext(os.path.basename(path))
+            archived = os.path.join(HISTORY_DIR, f"{stem}-{stamp}{ext}")
+            shutil.move(path, archived)
+            print(f"Archived previous {os.path.basename(path)} to '{archived}' 📦")
+
+def find_resource(credential, unit, resource):
+    """Name of a journaled resource if it still exists, else None"""
+    from azure.mgmt.compute import ComputeManagementClient
+    from azure.mgmt.resource import ResourceManagementClient
+    resource_client = ResourceManagementClient(credential, resource["subscription_id"])
+    if not resource_client.resource_groups.check_existence(resource["resource_group"]):
+        return None
+    if resource["kind"] == "virtual_machine":
+        compute_client = ComputeManagementClient(credential, resource["subscription_id"])
+        vms = compute_client.virtual_machines.list(resource["resource_group"])
+        return resource["name"] if any(vm.name == resource["name"] for vm in vms) else None
+    # Everything else lives and dies with its resource group
+    return resource["name"]
+
+def delete_leaked(credential, unit, resources):
+    """Delete the resource group of a crashed deployment and wait, as the retry reuses its name"""
+    from azure.mgmt.resource import ResourceManagementClient
+    group = resources[0]
+    resource_client = ResourceManagementClient(credential, group["subscription_id"])
+    try:
+        print(f"🗑️ Deleting leaked resource group {group['resource_group']} ...")
+        resource_client.resource_groups.begin_delete(group["resource_group"]).result()
+    except Exception as e:
+        print(f"⚠️ Could not delete {group['resource_group']}: {e}")
+        return False
+    return True
+
+def resume(credential, regions):
+    """Reconcile the journal with Azure; returns (journal, subscription id, regions still to deploy, finished entries)"""
+    state = wal.fold(wal.load(JOURNAL_FILE))
+    if state["run"] is None:
+        print(f"No {JOURNAL_FILE} to resume from.")
+        return None, None, regions, []
+
+    print(f"🔁 Resuming run {state['run']['run_id']}: checking {len(state['units'])} journaled region(s)...")
+    done, leaked = wal.reconcile(state, lambda unit, resource: find_resource(credential, unit, resource))
+    if leaked:
+        print(f"🧹 Cleaning up {len(leaked)} unfinished region(s) in one pass...")
+    journal = wal.Journal(JOURNAL_FILE, state["run"]["run_id"])
+    failed = wal.clean(journal, state, done, leaked, lambda unit, resources: delete_leaked(credential, unit, resources))
+    if failed:
+        print(f"⚠️ Not redeploying {', '.join(failed)} until their resource groups are gone.")
+
+    # Rebuild the log and cleanup list from the journal; groups we could not delete stay listed for cleanup.py
+    entries = [done[region] for region in regions if region in done]
+    with open(DEPLOYMENT_LOG_FILE, "w") as f:
+        json.dump(entries, f, indent=4)
+    cleanup_data = [{"resource_group": e["resource_group"], "location": e["location"], "vm_name": e["vm_name"]}
+                    for e in entries]
+    cleanup_data += [{"resource_group": leaked[unit][0]["resource_group"], "location": unit, "vm_name": None}
+                     for unit in failed]
+    with open(TO_CLEAN_FILE, "w") as f:
+        json.dump(cleanup_data, f, indent=4)
+
+    print(f"Skipping {len(entries)} finished region(s) ⏭️")
+    todo = [r for r in regions if r not in done and r not in failed]
+    return journal, state["run"].get("subscription_id"), todo, entries
+
+def plot_deployment_times(logs=None):
+    import matplotlib.pyplot as plt
+
+    if logs is None:
+        with open(DEPLOYMENT_LOG_FILE, 'r') as f:
+            logs = json.load(f)
+
+    vm_names = [entry['vm_name'] for entry in logs]
+    durations = [entry['duration_seconds'] for entry in logs]
+
+    plt.figure(figsize=(10, 6))
+    plt.bar(vm_names, durations, color='skyblue')
+    plt.title('VM Deployment Duration Comparison by Region', fontsize=14)
+    plt.xlabel('VM Name', fontsize=12)
+    plt.ylabel('Deployment Duration (seconds)', fontsize=12)
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+    plt.savefig(DEPLOYMENT_PLOT_FILE)
+
+def deploy(vm_config, subscription=None, resume_run=False, credential=None, ask=True):
+    """Deploy `vm_config` to its regions; returns (subscription id, log entries), or (None, []) without a subscription
+
+    `subscription` is an option number or ID (see choose_subscription).
+    """
+    regions = vm_config["regions"]
+    credential = credential or get_credentials()
+    journal = subscription_id = None
+    entries = []
+    if resume_run:
+        journal, subscription_id, regions, entries = resume(credential, regions)
+    if journal is None:
+        # Keep previous logs for historical comparison
+        if wal.unfinished(JOURNAL_FILE):
+            print("⚠️ The previous run did not finish; its resource groups may still exist (use --resume).")
+        archive_previous_logs()
+
+    if subscription_id is None:
+        subscriptions_dict = list_subscriptions(credential)
+        if not subscriptions_dict:
+            print("No subscriptions found. Please check your Azure login.")
+            return None, []
+
+        subscription_id = choose_subscription(subscriptions_dict, subscription, ask)
+        if not subscription_id:
+            print("Invalid subscription selection.")
+            return None, []
+
+    if journal is None:
+        journal = wal.Journal.start(JOURNAL_FILE, subscription_id=subscription_id)
+
+    list_virtual_machines(credential, subscription_id)
+
+    entries += deploy_to_regions(credential, subscription_id, regions, vm_config, journal)
+    return subscription_id, entries
 
 def main():
-    # Clear previous logs
-    if os.path.exists(DEPLOYMENT_LOG_FILE):
-        os.remove(DEPLOYMENT_LOG_FILE)
-    if os.path.exists(TO_CLEAN_FILE):
-        os.remove(TO_CLEAN_FILE)
+    parser = argparse.ArgumentParser(description="Deploy one VM per region of JSON-data/deployment_info.json")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"continue a crashed run from {JOURNAL_FILE} instead of starting over")
+    parser.add_argument("--subscription", help="option number or ID of the subscription (asked for if not given)")
+    args = parser.parse_args()
 
     print("Azure Multi-Region VM Deployment Script")
     print("=" * 40)
@@ -254,41 +441,13 @@ def main():
     with open(config_path, "r") as f:
         config = json.load(f)
 
-    vm_config = config["vm_config"]
-    regions = vm_config["regions"]
-
-    credential = get_credentials()
-    subscriptions_dict = list_subscriptions(credential)
-    if not subscriptions_dict:
-        print("No subscriptions found. Please check your Azure login.")
+    subscription_id, entries = deploy(config["vm_config"], args.subscription, args.resume)
+    if subscription_id is None:
         return
 
-    sub_choice = input("\nSelect subscription (enter number): ")
-    subscription_id = subscriptions_dict.get(sub_choice)
-    if not subscription_id:
-        print("Invalid subscription selection.")
-        return
-
-    list_virtual_machines(credential, subscription_id)
-
-    deploy_to_regions(credential, subscription_id, regions, vm_config)
-
     # Plot results
-    if os.path.exists(DEPLOYMENT_LOG_FILE):
-        with open(DEPLOYMENT_LOG_FILE, 'r') as f:
-            logs = json.load(f)
-
-        vm_names = [entry['vm_name'] for entry in logs]
-        durations = [entry['duration_seconds'] for entry in logs]
-
-        plt.figure(figsize=(10, 6))
-        plt.bar(vm_names, durations, color='skyblue')
-        plt.title('VM Deployment Duration Comparison by Region', fontsize=14)
-        plt.xlabel('VM Name', fontsize=12)
-        plt.ylabel('Deployment Duration (seconds)', fontsize=12)
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        plt.savefig(DEPLOYMENT_PLOT_FILE)
+    if entries:
+        plot_deployment_times(entries)
 
     print("\nMulti-region deployment completed!")
 
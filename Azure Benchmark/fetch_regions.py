@@ -1,9 +1,13 @@
-import subprocess
 import json
 import os
+import sys
 import logging
 from tabulate import tabulate
 
+# mcbench lives at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcbench import trace
+
 OUTPUT_DIR = "JSON-data"
 TEMPLATES_DIR = "Templates"
 LOG_DIR = "logs"
@@ -35,9 +39,14 @@ tr:nth-child(even) { background-color: #f2f2f2; }
 """
 
 def main():
+    with trace.stage("fetch", cloud="azure", operation="list-locations"):
+        fetch_regions()
+
+def fetch_regions():
+    """Save every Azure region to JSON-data/regions.json and Templates/regions.html; returns them"""
     logging.info("Fetching Azure regions...")
     cmd = ["az", "account", "list-locations", "--output", "json"]
-    regions = json.loads(subprocess.check_output(cmd, text=True))
+    regions = json.loads(trace.check_output(cmd, text=True))
 
     output_file = os.path.join(OUTPUT_DIR, "regions.json")
     with open(output_file, "w") as f:
@@ -46,20 +55,22 @@ def main():
     logging.info(f"✅ Saved Azure regions to {output_file}")
 
     # Generate HTML
-    html = f"<html><head>{CSS_STYLE}</head><body>"
-    html += "<h1>Available Azure Regions</h1>"
+    with trace.span("render", operation="regions.html"):
+        html = f"<html><head>{CSS_STYLE}</head><body>"
+        html += "<h1>Available Azure Regions</h1>"
 
-    headers = ["name", "displayName", "regionalDisplayName"]
-    table = [[r.get("name", ""), r.get("displayName", ""), r.get("regionalDisplayName", "")] for r in regions]
-    html += tabulate(table, headers=headers, tablefmt="html")
+        headers = ["name", "displayName", "regionalDisplayName"]
+        table = [[r.get("name", ""), r.get("displayName", ""), r.get("regionalDisplayName", "")] for r in regions]
+        html += tabulate(table, headers=headers, tablefmt="html")
 
-    html += "</body></html>"
+        html += "</body></html>"
 
-    html_file = os.path.join(TEMPLATES_DIR, "regions.html")
-    with open(html_file, "w") as f:
-        f.write(html)
+        html_file = os.path.join(TEMPLATES_DIR, "regions.html")
+        with open(html_file, "w") as f:
+            f.write(html)
 
     logging.info(f"✅ Regions HTML saved to {html_file}")
+    return regions
 
 if __name__ == "__main__":
     main()
@@ -129,19 +129,14 @@ async def fetch_all_regions(credential, subscription_id, regions):
     return all_results
 
 
-async def main():
+async def fetch_vm_data(regions):
+    """Fetch VM sizes and pinned images of `regions` into vm_data.json; returns them, or None without a subscription"""
     os.makedirs(JSON_DIR, exist_ok=True)
 
     if os.path.exists(OUTPUT_FILE):
         print(f"🗑️ Removing old {OUTPUT_FILE} ...")
         os.remove(OUTPUT_FILE)
 
-    if not os.path.exists(REGIONS_FILE):
-        print(f"❌ {REGIONS_FILE} not found. Please run region selector first.")
-        return
-    with open(REGIONS_FILE) as f:
-        regions = json.load(f)
-
     credential = get_credentials()
     subs_client = SubscriptionClient(credential)
     subscriptions = list(subs_client.subscriptions.list())
@@ -159,6 +154,17 @@ async def main():
         json.dump(all_results, f, indent=2)
 
     print(f"✅ Fresh VM data saved to {OUTPUT_FILE}")
+    return all_results
+
+
+async def main():
+    if not os.path.exists(REGIONS_FILE):
+        print(f"❌ {REGIONS_FILE} not found. Please run region selector first.")
+        return
+    with open(REGIONS_FILE) as f:
+        regions = json.load(f)
+
+    await fetch_vm_data(regions)
 
 
 if __name__ == "__main__":
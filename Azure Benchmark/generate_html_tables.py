@@ -76,18 +76,11 @@ def make_html(region, data):
     return html
 
 
-def main():
+def write_region_pages(vm_data):
+    """Write Templates/<region>.html for every region of `vm_data`"""
     # Ensure Templates folder exists
     os.makedirs(TEMPLATE_DIR, exist_ok=True)
 
-    # Load JSON data
-    if not os.path.exists(INPUT_FILE):
-        print(f"❌ {INPUT_FILE} not found. Run fetch script first.")
-        return
-
-    with open(INPUT_FILE) as f:
-        vm_data = json.load(f)
-
     # Generate one HTML page per region
     for region, data in vm_data.items():
         output_path = os.path.join(TEMPLATE_DIR, f"{region}.html")
@@ -99,5 +92,17 @@ def main():
     print(f"\n🎉 All region HTML pages saved in '{TEMPLATE_DIR}'")
 
 
+def main():
+    # Load JSON data
+    if not os.path.exists(INPUT_FILE):
+        print(f"❌ {INPUT_FILE} not found. Run fetch script first.")
+        return
+
+    with open(INPUT_FILE) as f:
+        vm_data = json.load(f)
+
+    write_region_pages(vm_data)
+
+
 if __name__ == "__main__":
     main()
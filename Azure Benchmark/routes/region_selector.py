@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, request
 import json, os
+from mcbench.latency import by_latency, cached_latencies, describe
 
 # Blueprint uses lowercase "templates" for shared templates (region_selector.html)
 region_selector_bp = Blueprint("region_selector", __name__, template_folder="../templates")
@@ -18,10 +19,22 @@ def load_selected_regions():
 
 @region_selector_bp.route("/", methods=["GET", "POST"])
 def index():
-    """Show all regions with multi-select and save selection to JSON."""
+    """Show all regions with multi-select and save selection to JSON.
+
+    Each region shows the latency from this machine to its regional ARM
+    endpoint from the cache (see mcbench/latency.py); stale regions are
+    re-probed in the background, never inside the request. ?sort=latency
+    lists the fastest first.
+    """
     with open(REGIONS_FILE) as f:
         regions = json.load(f)
 
+    latencies = cached_latencies("azure", [r["name"] for r in regions])
+    sort = request.args.get("sort", "name")
+    if sort == "latency":
+        order = {name: i for i, name in enumerate(by_latency(latencies))}
+        regions = sorted(regions, key=lambda r: order[r["name"]])
+
     preselected = load_selected_regions()
     saved = False
 
@@ -35,6 +48,8 @@ def index():
     return render_template(
         "region_selector.html",
         regions=regions,
+        latencies={name: describe(result) for name, result in latencies.items()},
+        sort=sort,
         preselected=preselected,
         saved=saved,
         selected_file=SELECTED_FILE
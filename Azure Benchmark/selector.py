@@ -1,3 +1,4 @@
+import argparse
 import json
 import os
 
@@ -15,16 +16,8 @@ def save_json(file_path, data):
     with open(file_path, "w") as f:
         json.dump(data, f, indent=4)
 
-def main():
-    # Load JSON data
-    vm_data = load_json(VM_FILE)
-    selected_regions = load_json(REGIONS_FILE)
-
-    # Ask user input
-    vm_name = input("Enter the VM size name: ").strip()
-    os_image = input("Enter the OS image name: ").strip()
-
-    # Check across all regions
+def find_vm_size(vm_data, selected_regions, vm_name):
+    """Details of VM size `vm_name` and the selected regions that do not offer it"""
     vm_details = None
     missing_regions = []
     for region in selected_regions:
@@ -35,6 +28,37 @@ def main():
         else:
             if not vm_details:
                 vm_details = match  # Take the first region’s details (assuming consistent)
+    return vm_details, missing_regions
+
+def deployment_info(vm_name, os_image, vm_details, selected_regions):
+    return {
+        "vm_config": {
+            "vm_name": vm_name,
+            "os_image": os_image,
+            "vcpus": vm_details["vcpus"],
+            "memory_gb": vm_details["memory_gb"],
+            "max_data_disks": vm_details["max_data_disks"],
+            "regions": selected_regions
+        }
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick the VM size and image to deploy in the selected regions")
+    parser.add_argument("--vm-size", help="e.g. Standard_B1s (asked for if not given)")
+    parser.add_argument("--os-image", help="OS image name (asked for if not given)")
+    parser.add_argument("--yes", action="store_true", help="save without asking for confirmation")
+    args = parser.parse_args()
+
+    # Load JSON data
+    vm_data = load_json(VM_FILE)
+    selected_regions = load_json(REGIONS_FILE)
+
+    # Ask user input
+    vm_name = args.vm_size or input("Enter the VM size name: ").strip()
+    os_image = args.os_image or input("Enter the OS image name: ").strip()
+
+    # Check across all regions
+    vm_details, missing_regions = find_vm_size(vm_data, selected_regions, vm_name)
 
     if missing_regions:
         print(f"❌ VM size '{vm_name}' is NOT available in: {', '.join(missing_regions)}")
@@ -48,21 +72,10 @@ def main():
     print(f"Memory (GB): {vm_details['memory_gb']}")
     print(f"Max Data Disks: {vm_details['max_data_disks']}")
 
-    confirm = input("\nDo you want to save this configuration? (yes/no): ").strip().lower()
+    confirm = "yes" if args.yes else input("\nDo you want to save this configuration? (yes/no): ").strip().lower()
     if confirm in ["yes", "y"]:
         # Always overwrite deployment_info.json
-        deployment_info = {
-            "vm_config": {
-                "vm_name": vm_name,
-                "os_image": os_image,
-                "vcpus": vm_details["vcpus"],
-                "memory_gb": vm_details["memory_gb"],
-                "max_data_disks": vm_details["max_data_disks"],
-                "regions": selected_regions
-            }
-        }
-
-        save_json(DEPLOYMENT_FILE, deployment_info)
+        save_json(DEPLOYMENT_FILE, deployment_info(vm_name, os_image, vm_details, selected_regions))
         print(f"\n💾 Configuration saved (overwritten) to {DEPLOYMENT_FILE}")
     else:
         print("⚠️ Configuration not saved.")
@@ -1,10 +1,37 @@
-from flask import Flask, render_template, redirect, url_for
+from flask import Flask, render_template, redirect, url_for, Response, jsonify, abort, request
 from fetch_env_data import main as generate_report
 from fetch_os_images import fetch_all_os_images
 from display_os_image import display_os_images
+from jobs import JobManager, report_progress
 from datetime import datetime
+import json
+import os
+import sys
+
+# mcbench lives at the repo root
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+from mcbench import metrics, trace
+from mcbench.ingest import Ingest, create_blueprint as create_ingest_blueprint
+from mcbench.results import RESULTS_DIR
+import gcp_client
+
+SSE_KEEPALIVE_SEC = 15
 
 app = Flask(__name__)
+job_manager = JobManager()
+# Benchmark VMs can push their agent results here (see mcbench/ingest.py)
+app.register_blueprint(create_ingest_blueprint(Ingest(os.path.join(REPO_ROOT, RESULTS_DIR))), url_prefix="/ingest")
+# Prometheus metrics at /metrics (see mcbench/metrics.py)
+metrics.install()
+trace.instrument_gcp(gcp_client)
+metrics.JOB_QUEUE_DEPTH.set_function(job_manager.queue_depth, app="gcp")
+metrics.JOBS_RUNNING.set_function(job_manager.running, app="gcp")
+app.register_blueprint(metrics.create_blueprint())
+
+def fetch_and_render_os_images():
+    fetch_all_os_images(progress=report_progress)
+    display_os_images(terminal=False)
 
 @app.route("/")
 def index():
@@ -13,8 +40,8 @@ def index():
 
 @app.route("/fetch")
 def fetch():
-    generate_report()
-    return redirect(url_for("report"))
+    job = job_manager.submit("env_report", "Fetch GCP environment report", generate_report)
+    return redirect(url_for("job_view", job_id=job.id, next=url_for("report")))
 
 @app.route("/report")
 def report():
@@ -22,13 +49,65 @@ def report():
 
 @app.route("/fetch_os_images")
 def fetch_os():
-    fetch_all_os_images()
-    display_os_images()
-    return redirect(url_for("view_os_images"))
+    job = job_manager.submit("os_images", "Fetch GCP OS images", fetch_and_render_os_images)
+    return redirect(url_for("job_view", job_id=job.id, next=url_for("view_os_images")))
 
 @app.route("/os_images")
 def view_os_images():
     return render_template("os_images.html")
 
+# ---------- Background jobs ----------
+
+def get_job_or_404(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        abort(404)
+    return job
+
+@app.route("/jobs")
+def list_jobs():
+    return jsonify([job.to_dict() for job in job_manager.list()])
+
+@app.route("/jobs/<job_id>")
+def job_view(job_id):
+    job = get_job_or_404(job_id)
+    next_url = request.args.get("next", "")
+    # Only follow local paths after the job finishes
+    if not next_url.startswith("/") or next_url.startswith("//"):
+        next_url = url_for("index")
+    return render_template("terminal.html", job=job, next_url=next_url)
+
+@app.route("/jobs/<job_id>/status")
+def job_status(job_id):
+    return jsonify(get_job_or_404(job_id).to_dict())
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    """Server-Sent Events: `log` per output line, `progress`, then one `end`"""
+    job = get_job_or_404(job_id)
+
+    def stream():
+        seen_lines, seen_progress = 0, None
+        while True:
+            lines, progress, finished = job.wait_for_update(seen_lines, seen_progress, SSE_KEEPALIVE_SEC)
+            if finished or lines or progress != seen_progress:
+                for line in lines:
+                    yield sse("log", line)
+                seen_lines += len(lines)
+                if progress != seen_progress:
+                    seen_progress = progress
+                    yield sse("progress", {"current": progress[0], "total": progress[1]})
+            else:
+                yield ": keepalive\n\n"
+            if finished:
+                yield sse("end", {"status": job.status, "error": job.error})
+                return
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=7432, debug=True)
+    app.run(host="0.0.0.0", port=7432, debug=True, threaded=True)
@@ -0,0 +1,71 @@
+# bench_gcp_client.py
+"""
+Compare per-call latency of the old `gcloud` subprocess path against the
+shared gcp_client session for the same small request (one zone name).
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import time
+from tabulate import tabulate
+import gcp_client
+
+def gcloud_call(project):
+    subprocess.run([
+        "gcloud", "compute", "zones", "list", "--limit=1",
+        f"--project={project}", "--format=json"
+    ], check=True, capture_output=True)
+
+def client_call(project):
+    gcp_client.execute(gcp_client.compute().zones().list(
+        project=project, maxResults=1, fields="items(name)"
+    ))
+
+def time_calls(fn, project, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(project)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def summarize(name, samples):
+    return [
+        name,
+        len(samples),
+        f"{statistics.mean(samples) * 1000:.1f}",
+        f"{statistics.median(samples) * 1000:.1f}",
+        f"{min(samples) * 1000:.1f}",
+        f"{max(samples) * 1000:.1f}",
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--output", default="bench_gcp_client.json")
+    args = parser.parse_args()
+
+    project = gcp_client.get_project()
+
+    # First client call pays credential refresh + client build; report it apart
+    start = time.perf_counter()
+    client_call(project)
+    warmup = time.perf_counter() - start
+
+    results = {
+        "gcloud_subprocess": time_calls(gcloud_call, project, args.iterations),
+        "gcp_client": time_calls(client_call, project, args.iterations),
+    }
+
+    rows = [summarize(name, samples) for name, samples in results.items()]
+    print(tabulate(rows, headers=["Path", "Calls", "Mean ms", "Median ms", "Min ms", "Max ms"], tablefmt="grid"))
+    print(f"gcp_client first-call (cold) latency: {warmup * 1000:.1f} ms")
+    speedup = statistics.median(results["gcloud_subprocess"]) / statistics.median(results["gcp_client"])
+    print(f"Median speedup: {speedup:.1f}x")
+
+    with open(args.output, "w") as f:
+        json.dump({"cold_client_sec": warmup, **results}, f, indent=4)
+
+if __name__ == "__main__":
+    main()
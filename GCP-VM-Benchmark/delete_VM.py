@@ -1,22 +1,140 @@
 # delete_vms.py
-import subprocess
+import argparse
+import asyncio
+import datetime
 import json
+import os
+from collections import defaultdict
+from googleapiclient.errors import HttpError
+from deploy import may_exist, operation_times
+import gcp_client
 
-def delete_vms():
-    with open("deployment_details.json") as f:
-        deployment_details = json.load(f)
+DEPLOYMENT_DETAILS_FILE = "deployment_details.json"
+DELETION_DETAILS_FILE = "deletion_details.json"
+REMAINING_FILE = "remaining_resources.json"
+MAX_ZONE_CONCURRENCY = 8
+BATCH_SIZE = 50  # instance deletes per batched HTTP request
 
+def group_by_zone(deployment_details):
+    """VMs to delete by zone; VMs that were never created are left out"""
+    zones = defaultdict(list)
     for dep in deployment_details:
-        vm_name = dep["vm_name"]
-        zone = dep["zone"]
+        if may_exist(dep):
+            zones[dep["zone"]].append(dep)
+    return zones
 
-        print(f"Deleting {vm_name} in {zone}...")
-        subprocess.run([
-            "gcloud", "compute", "instances", "delete", vm_name,
-            "--zone", zone, "--quiet"
-        ], check=True)
+def batch_delete(vm_names, zone):
+    """Send one batched HTTP request holding an instances.delete per VM.
 
-    print("All VMs deleted successfully.")
+    Per-VM failures come back in the batch callback, so one bad entry does
+    not block the rest of the zone. VMs that no longer exist (404) are
+    returned in `gone`.
+    """
+    project = gcp_client.get_project()
+    instances = gcp_client.compute().instances()
+    ops, errors, gone = {}, {}, []
+
+    def on_response(request_id, response, exception):
+        if isinstance(exception, HttpError) and exception.resp.status == 404:
+            gone.append(request_id)
+        elif exception is not None:
+            errors[request_id] = str(exception)
+        else:
+            ops[request_id] = response
+
+    batch = gcp_client.compute().new_batch_http_request(callback=on_response)
+    for name in vm_names:
+        batch.add(instances.delete(project=project, zone=zone, instance=name), request_id=name)
+    batch.execute(http=gcp_client.thread_http())
+    return ops, errors, gone
+
+async def delete_batch(deps, zone):
+    """({name: (operation, submitted)}, errors, gone) for one batch"""
+    names = [d["vm_name"] for d in deps]
+    submitted = datetime.datetime.now(datetime.timezone.utc)
+    ops, errors, gone = await asyncio.to_thread(batch_delete, names, zone)
+
+    async def wait(name, op):
+        try:
+            return name, await gcp_client.wait_zone_operation_async(op, zone=zone)
+        except (HttpError, TimeoutError) as e:
+            errors[name] = str(e)
+            return name, None
+
+    finished = await asyncio.gather(*(wait(name, op) for name, op in ops.items()))
+    return {name: (op, submitted) for name, op in finished if op is not None}, errors, gone
+
+async def delete_zone(zone, deps, semaphore):
+    async with semaphore:
+        print(f"Deleting {len(deps)} VM(s) in {zone}...")
+        results, errors, gone = {}, {}, set()
+        for i in range(0, len(deps), BATCH_SIZE):
+            batch_results, batch_errors, batch_gone = await delete_batch(deps[i:i + BATCH_SIZE], zone)
+            results.update(batch_results)
+            errors.update(batch_errors)
+            gone.update(batch_gone)
+
+    deleted, remaining = [], []
+    for dep in deps:
+        if dep["vm_name"] in gone:
+            print(f"ℹ️ {dep['vm_name']} in {zone} was already deleted")
+            deleted.append({"vm_name": dep["vm_name"], "zone": zone, "already_deleted": True})
+            continue
+        op, submitted = results.get(dep["vm_name"], (None, None))
+        if op is None or op.get("error"):
+            error = errors.get(dep["vm_name"]) or (op or {}).get("error", "no operation returned")
+            print(f"⚠️ Failed to delete {dep['vm_name']} in {zone}: {error}")
+            remaining.append({**dep, "delete_error": error})
+            continue
+
+        start_time, end_time = operation_times(op, submitted)
+        deleted.append({
+            "vm_name": dep["vm_name"],
+            "zone": zone,
+            "operation": op.get("name"),
+            "start_time": start_time.isoformat(),
+            "end_time": end_time.isoformat(),
+            "deletion_time_sec": (end_time - start_time).total_seconds()
+        })
+    return deleted, remaining
+
+async def delete_vms_async(input_file=DEPLOYMENT_DETAILS_FILE, max_concurrency=MAX_ZONE_CONCURRENCY,
+                           deployment_details=None):
+    """Delete the VMs of `deployment_details` (default: read from input_file); returns (deleted, remaining)"""
+    if deployment_details is None:
+        with open(input_file) as f:
+            deployment_details = json.load(f)
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    zones = group_by_zone(deployment_details)
+    results = await asyncio.gather(*(delete_zone(z, deps, semaphore) for z, deps in zones.items()))
+
+    deleted = [d for zone_deleted, _ in results for d in zone_deleted]
+    remaining = [r for _, zone_remaining in results for r in zone_remaining]
+
+    with open(DELETION_DETAILS_FILE, "w") as f:
+        json.dump(deleted, f, indent=4)
+
+    if remaining:
+        with open(REMAINING_FILE, "w") as f:
+            json.dump(remaining, f, indent=4)
+        print(f"\n⚠️ {len(remaining)} VM(s) could not be deleted. See {REMAINING_FILE}; "
+              f"rerun with it as input to retry.")
+    else:
+        if os.path.exists(REMAINING_FILE):
+            os.remove(REMAINING_FILE)
+        print("All VMs deleted successfully.")
+
+    return deleted, remaining
+
+def delete_vms(input_file=DEPLOYMENT_DETAILS_FILE):
+    return asyncio.run(delete_vms_async(input_file))
 
 if __name__ == "__main__":
-    delete_vms()
+    parser = argparse.ArgumentParser(description="Delete GCP VMs listed in a deployment details file")
+    parser.add_argument("input_file", nargs="?", default=DEPLOYMENT_DETAILS_FILE,
+                        help=f"e.g. {REMAINING_FILE} to retry earlier failures")
+    parser.add_argument("--max-concurrency", type=int, default=MAX_ZONE_CONCURRENCY)
+    args = parser.parse_args()
+
+    asyncio.run(delete_vms_async(args.input_file, args.max_concurrency))
@@ -1,53 +1,241 @@
 # deploy_vms.py
-import subprocess
+import os
 import json
+import shutil
 import datetime
 import uuid
+import asyncio
+import argparse
+import getpass
+import sys
+from googleapiclient.errors import HttpError
+import gcp_client
+from zone_placement import ZoneCatalog, ZoneHistory, ranked_zones, is_placement_error, error_reason
 
-def deploy_vms():
-    with open("deployment_config.json") as f:
-        config = json.load(f)
+# mcbench lives at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcbench.journal import new_run_id
+from mcbench.reaper import GCP_NETWORK_TAG, run_tags
 
-    deployment_details = []
+CONFIG_FILE = "deployment_config.json"
+DEPLOYMENT_DETAILS_FILE = "deployment_details.json"
+HISTORY_DIR = "history"
+MAX_CONCURRENCY = 8
+CREATE_TIMEOUT = "TIMEOUT"  # reason recorded when the create was sent but never finished
+SSH_PUBLIC_KEY = os.path.expanduser("~/.ssh/google_compute_engine.pub")  # key `gcloud compute ssh` creates
 
-    for dep in config["deployments"]:
-        region = dep["region"]
-        image = dep["image"]
-        machine_type = dep["machine_type"]
-        zone = f"{region}-a"  # pick zone "a" in the region
+def image_project_for(image):
+    return "debian-cloud" if "debian" in image else "ubuntu-os-cloud"
+
+def ssh_key_item(public_key_file=SSH_PUBLIC_KEY):
+    """`ssh-keys` metadata letting the local user (whom mcbench/ssh.py logs in as) in with gcloud's key"""
+    try:
+        with open(public_key_file) as f:
+            public_key = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return {"key": "ssh-keys", "value": f"{getpass.getuser()}:{public_key}"}
+
+def warn_without_ssh_key():
+    if not ssh_key_item():
+        print(f"⚠️ {SSH_PUBLIC_KEY} not found, so the VMs will not accept SSH from this machine; "
+              "run `gcloud compute ssh` once to create it")
+
+def instance_body(vm_name, zone, machine_type, image, startup_script=None, run_id=None):
+    """Same instance `gcloud compute instances create` builds by default, labelled for mcbench/reaper.py
+    and tagged so mcbench/mesh.py's firewall rules apply to it only, with the local SSH key if there is one"""
+    body = {
+        "name": vm_name,
+        "labels": run_tags(run_id),
+        "tags": {"items": [GCP_NETWORK_TAG]},
+        "machineType": f"zones/{zone}/machineTypes/{machine_type}",
+        "disks": [{
+            "boot": True,
+            "autoDelete": True,
+            "initializeParams": {
+                "sourceImage": f"projects/{image_project_for(image)}/global/images/family/{image}",
+                "diskSizeGb": "20"
+            }
+        }],
+        "networkInterfaces": [{
+            "network": "global/networks/default",
+            "accessConfigs": [{"name": "External NAT", "type": "ONE_TO_ONE_NAT"}]
+        }]
+    }
+    items = [{"key": "startup-script", "value": startup_script}] if startup_script else []
+    ssh_key = ssh_key_item()
+    if ssh_key:
+        items.append(ssh_key)
+    if items:
+        body["metadata"] = {"items": items}
+    return body
+
+def insert_request(vm_name, zone, machine_type, image, startup_script=None, run_id=None):
+    return gcp_client.compute().instances().insert(
+        project=gcp_client.get_project(),
+        zone=zone,
+        body=instance_body(vm_name, zone, machine_type, image, startup_script, run_id)
+    )
+
+def load_config():
+    with open(CONFIG_FILE) as f:
+        return json.load(f)
+
+def archive_previous_details():
+    """Keep the previous run's details in history/ instead of overwriting them"""
+    if not os.path.exists(DEPLOYMENT_DETAILS_FILE):
+        return
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    stamp = datetime.datetime.fromtimestamp(os.path.getmtime(DEPLOYMENT_DETAILS_FILE)).strftime("%Y%m%d-%H%M%S")
+    archived = os.path.join(HISTORY_DIR, f"deployment_details-{stamp}.json")
+    shutil.move(DEPLOYMENT_DETAILS_FILE, archived)
+    print(f"📦 Archived previous {DEPLOYMENT_DETAILS_FILE} to {archived}")
+
+def save_details(deployment_details):
+    with open(DEPLOYMENT_DETAILS_FILE, "w") as f:
+        json.dump(deployment_details, f, indent=4)
+
+def parse_op_time(value):
+    return datetime.datetime.fromisoformat(value) if value else None
+
+def operation_times(op, fallback_start):
+    """Server-side start/end of an operation, so client latency is not counted"""
+    start_time = parse_op_time(op.get("startTime") or op.get("insertTime")) or fallback_start
+    end_time = parse_op_time(op.get("endTime")) or datetime.datetime.now(datetime.timezone.utc)
+    return start_time, end_time
+
+def create_in_zone(vm_name, zone, machine_type, image, startup_script=None, run_id=None):
+    """Create one VM and wait for it; returns (operation, error)"""
+    try:
+        op = gcp_client.execute(insert_request(vm_name, zone, machine_type, image, startup_script, run_id))
+        op = gcp_client.wait_zone_operation(op, zone=zone)
+    except HttpError as e:
+        return None, e
+    except TimeoutError as e:
+        return None, {"errors": [{"code": CREATE_TIMEOUT, "message": str(e)}]}
+    return op, op.get("error")
+
+def may_exist(details):
+    """Whether the VM of a deploy_one() result can exist: it was created, or its create timed out"""
+    return not details.get("failed") or details.get("error") == CREATE_TIMEOUT
+
+def external_ip(vm_name, zone):
+    """The VM's ephemeral public IP, or None if it cannot be read"""
+    try:
+        instance = gcp_client.execute(gcp_client.compute().instances().get(
+            project=gcp_client.get_project(), zone=zone, instance=vm_name,
+            fields="networkInterfaces/accessConfigs/natIP"
+        ))
+    except HttpError:
+        return None
+    configs = instance.get("networkInterfaces", [{}])[0].get("accessConfigs", [])
+    return configs[0].get("natIP") if configs else None
+
+def deploy_one(dep, history, zone_catalog=None):
+    """Deploy one config entry, walking the region's zones in ranked order.
+
+    Only the successful attempt's operation times are reported as the
+    deployment time; rejected zones are listed under `failed_attempts`.
+    """
+    region = dep["region"]
+    image = dep["image"]
+    machine_type = dep["machine_type"]
+    vm_name = f"auto-vm-{uuid.uuid4().hex[:6]}"
 
-        vm_name = f"auto-vm-{uuid.uuid4().hex[:6]}"
-        start_time = datetime.datetime.now()
+    details = {
+        "vm_name": vm_name,
+        "run_id": dep.get("run_id"),
+        "region": region,
+        "image": image,
+        "machine_type": machine_type,
+        "failed_attempts": [],
+    }
 
+    for zone in ranked_zones(region, machine_type, history, zone_catalog or ZoneCatalog()):
         print(f"Deploying {vm_name} in {zone}...")
+        submitted = datetime.datetime.now(datetime.timezone.utc)
+        op, error = create_in_zone(vm_name, zone, machine_type, image, dep.get("startup_script"), dep.get("run_id"))
+        details["zone"] = zone
 
-        subprocess.run([
-            "gcloud", "compute", "instances", "create", vm_name,
-            "--zone", zone,
-            "--machine-type", machine_type,
-            "--image-family", image,
-            "--image-project", "debian-cloud" if "debian" in image else "ubuntu-os-cloud",
-            "--boot-disk-size", "20GB"
-        ], check=True)
-
-        end_time = datetime.datetime.now()
-        duration = (end_time - start_time).total_seconds()
-
-        deployment_details.append({
-            "vm_name": vm_name,
-            "region": region,
+        if not error:
+            history.record(zone, True)
+            start_time, end_time = operation_times(op, submitted)
+            details.update({
+                "operation": op.get("name"),
+                "start_time": start_time.isoformat(),
+                "end_time": end_time.isoformat(),
+                "deployment_time_sec": (end_time - start_time).total_seconds(),
+                "external_ip": external_ip(vm_name, zone),
+            })
+            print(f"✅ {vm_name} running in {zone} in {details['deployment_time_sec']:.2f} seconds")
+            return details
+
+        reason = error_reason(error)
+        history.record(zone, False, reason)
+        details["failed_attempts"].append({
             "zone": zone,
-            "image": image,
-            "machine_type": machine_type,
-            "start_time": start_time.isoformat(),
-            "end_time": end_time.isoformat(),
-            "deployment_time_sec": duration
+            "reason": reason,
+            "submitted_at": submitted.isoformat(),
+            "failed_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
         })
 
-    with open("deployment_details.json", "w") as f:
-        json.dump(deployment_details, f, indent=4)
+        if not is_placement_error(error):
+            print(f"⚠️ Deployment of {vm_name} failed in {zone}: {reason}")
+            break
+        print(f"↪️ {zone} rejected {vm_name} ({reason}), trying next zone...")
+
+    details.update({"failed": True, "error": details["failed_attempts"][-1]["reason"]})
+    return details
+
+def deploy_vms(config=None):
+    config = config or load_config()
+    warn_without_ssh_key()
+    archive_previous_details()
+    history = ZoneHistory()
+    zone_catalog = ZoneCatalog()
+    run_id = new_run_id()
+    deployment_details = []
+
+    for dep in config["deployments"]:
+        deployment_details.append(deploy_one({**dep, "run_id": run_id}, history, zone_catalog))
+        save_details(deployment_details)
+
+    print("Deployment complete. Details saved in deployment_details.json")
+    return deployment_details
+
+# ---------- Concurrent mode ----------
+
+async def deploy_vms_concurrent(max_concurrency=MAX_CONCURRENCY, config=None):
+    config = config or load_config()
+    warn_without_ssh_key()
+    archive_previous_details()
+    history = ZoneHistory()
+    zone_catalog = ZoneCatalog()
+    run_id = new_run_id()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def deploy_limited(dep):
+        async with semaphore:
+            return await asyncio.to_thread(deploy_one, {**dep, "run_id": run_id}, history, zone_catalog)
+
+    tasks = [deploy_limited(dep) for dep in config["deployments"]]
+    deployment_details = []
+
+    # Write after every VM so a crash mid-run still leaves a usable file
+    for coro in asyncio.as_completed(tasks):
+        deployment_details.append(await coro)
+        save_details(deployment_details)
 
     print("Deployment complete. Details saved in deployment_details.json")
+    return deployment_details
 
 if __name__ == "__main__":
-    deploy_vms()
+    parser = argparse.ArgumentParser(description=f"Deploy GCP VMs from {CONFIG_FILE}")
+    parser.add_argument("--concurrent", action="store_true", help="issue creates in parallel")
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    if args.concurrent:
+        asyncio.run(deploy_vms_concurrent(args.max_concurrency))
+    else:
+        deploy_vms()
@@ -1,63 +1,182 @@
 import os
 import json
-from tabulate import tabulate
+import shutil
+import argparse
+import tempfile
+from html import escape
 
-def display_os_images(input_file="os_images.json", html_output_file=None):
-    with open(input_file, "r") as f:
-        os_data = json.load(f)
-
-    table_data = []
-    headers = ["Project", "Image Name", "Family", "Creation Time"]
-
-    for project, images in os_data.items():
-        for info in images:
-            table_data.append([
-                project,
-                info.get("name", "N/A"),
-                info.get("family", "N/A"),
-                info.get("creationTimestamp", "N/A")
-            ])
-
-    # Print to terminal
-    print(tabulate(table_data, headers=headers, tablefmt="grid"))
+HEADERS = ["Project", "Image Name", "Family", "Creation Time"]
+TERMINAL_WIDTHS = [20, 60, 40, 30]
+READ_CHUNK = 64 * 1024
 
-    # Convert to HTML table
-    html_table = tabulate(table_data, headers=headers, tablefmt="html")
-
-    styled_html = f"""
+HTML_HEAD = """
     <html>
     <head>
         <title>GCP OS Images</title>
         <style>
-            body {{
+            body {
                 font-family: Arial, sans-serif;
                 padding: 20px;
-            }}
-            table {{
+            }
+            table {
                 width: 100%;
                 border-collapse: collapse;
-            }}
-            th {{
+            }
+            th {
                 background-color: #4CAF50;
                 color: white;
                 font-weight: bold;
-            }}
-            th, td {{
+            }
+            th, td {
                 border: 1px solid #ddd;
                 padding: 8px;
                 text-align: left;
-            }}
-            tr:nth-child(even) {{background-color: #f2f2f2}}
-            tr:hover {{background-color: #ddd;}}
+            }
+            tr:nth-child(even) {background-color: #f2f2f2}
+            tr:hover {background-color: #ddd;}
+            details summary {cursor: pointer; color: #555;}
+            tr.history td {color: #777; font-size: 0.9em;}
         </style>
     </head>
     <body>
         <h2>GCP Public OS Images</h2>
-        {html_table}
+"""
+
+HTML_TAIL = """
     </body>
     </html>
+"""
+
+def iter_images(input_file):
+    """Yield (project, image) pairs from os_images.json one image at a time.
+
+    The file is a {project: [image, ...]} object; it is decoded incrementally
+    with raw_decode so memory stays constant regardless of catalog size.
     """
+    decoder = json.JSONDecoder()
+    with open(input_file, "r") as f:
+        buf, pos = "", 0
+
+        def fill():
+            nonlocal buf, pos
+            chunk = f.read(READ_CHUNK)
+            buf, pos = buf[pos:] + chunk, 0
+            return bool(chunk)
+
+        def skip(chars):
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in chars:
+                    pos += 1
+                if pos < len(buf) or not fill():
+                    return
+
+        def decode():
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    pos = end
+                    return value
+                except json.JSONDecodeError:
+                    if not fill():
+                        raise
+
+        def expect(char):
+            nonlocal pos
+            skip(" \t\r\n")
+            if pos >= len(buf) or buf[pos] != char:
+                return False
+            pos += 1
+            return True
 
+        if not expect("{"):
+            raise ValueError(f"{input_file} is not a JSON object")
+        while True:
+            skip(" \t\r\n,")
+            if expect("}") or pos >= len(buf):
+                return
+            project = decode()
+            expect(":")
+            expect("[")
+            while True:
+                skip(" \t\r\n,")
+                if expect("]"):
+                    break
+                yield project, decode()
+
+def image_row(project, info):
+    return [
+        project,
+        info.get("name", "N/A"),
+        info.get("family", "N/A"),
+        info.get("creationTimestamp", "N/A")
+    ]
+
+def html_row(cells, css_class=None):
+    attr = f' class="{css_class}"' if css_class else ""
+    return f"<tr{attr}>" + "".join(f"<td>{escape(str(c))}</td>" for c in cells) + "</tr>\n"
+
+def terminal_row(cells):
+    return " | ".join(str(c)[:w].ljust(w) for c, w in zip(cells, TERMINAL_WIDTHS))
+
+def write_flat(f, images, on_row):
+    f.write("<table>\n<thead><tr>" + "".join(f"<th>{h}</th>" for h in HEADERS) + "</tr></thead>\n<tbody>\n")
+    count = 0
+    for project, info in images:
+        row = image_row(project, info)
+        on_row(row)
+        f.write(html_row(row))
+        count += 1
+    f.write("</tbody>\n</table>\n")
+    return count
+
+def write_grouped(f, images, on_row):
+    """One table per project; each family shows its newest image and folds the rest.
+
+    Rows are written as they are parsed: only each family's newest row is held,
+    older ones go straight to a per-family temporary file (folded in catalog
+    order) and are copied into the page when the project ends.
+    """
+    count = 0
+    current, latest, older = None, {}, {}
+
+    def flush():
+        if not latest:
+            return
+        f.write(f"<h3>{escape(current)}</h3>\n<table>\n<thead><tr>")
+        f.write("".join(f"<th>{h}</th>" for h in HEADERS) + "</tr></thead>\n")
+        for family in sorted(latest):
+            on_row(latest[family])
+            f.write("<tbody>\n" + html_row(latest[family]))
+            if family in older:
+                spool, n = older[family]
+                f.write(f'<tr><td colspan="4"><details><summary>{n} older image(s) '
+                        f'in {escape(family)}</summary><table>\n')
+                spool.seek(0)
+                shutil.copyfileobj(spool, f)
+                spool.close()
+                f.write("</table></details></td></tr>\n")
+            f.write("</tbody>\n")
+        f.write("</table>\n")
+
+    for project, info in images:
+        if project != current:
+            flush()
+            current, latest, older = project, {}, {}
+        row = image_row(project, info)
+        count += 1
+        family = row[2]
+        if family not in latest or row[3] > latest[family][3]:
+            latest[family], row = row, latest.get(family)
+        if row is not None:
+            spool, n = older.get(family) or (tempfile.TemporaryFile("w+"), 0)
+            spool.write(html_row(row, "history"))
+            older[family] = (spool, n + 1)
+    flush()
+    return count
+
+def display_os_images(input_file="os_images.json", html_output_file=None, terminal=True, group_by_family=False):
     # Save to templates directory if no path provided
     if html_output_file is None:
         base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -65,10 +184,27 @@ def display_os_images(input_file="os_images.json", html_output_file=None):
         os.makedirs(templates_dir, exist_ok=True)  # ✅ Ensure templates/ exists
         html_output_file = os.path.join(templates_dir, "os_images.html")
 
+    if terminal:
+        print(terminal_row(HEADERS))
+        print("-+-".join("-" * w for w in TERMINAL_WIDTHS))
+        on_row = lambda row: print(terminal_row(row))
+    else:
+        on_row = lambda row: None
+
     with open(html_output_file, "w") as f:
-        f.write(styled_html)
+        f.write(HTML_HEAD)
+        writer = write_grouped if group_by_family else write_flat
+        count = writer(f, iter_images(input_file), on_row)
+        f.write(HTML_TAIL)
 
-    print(f"\n📝 HTML exported to {html_output_file}")
+    print(f"\n📝 HTML exported to {html_output_file} ({count} images)")
 
 if __name__ == "__main__":
-    display_os_images()
+    parser = argparse.ArgumentParser(description="Render os_images.json as HTML (and optionally to the terminal)")
+    parser.add_argument("--input", default="os_images.json")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--no-terminal", action="store_true", help="skip printing rows to stdout")
+    parser.add_argument("--group-by-family", action="store_true", help="show newest image per family, fold older ones")
+    args = parser.parse_args()
+
+    display_os_images(args.input, args.output, terminal=not args.no_terminal, group_by_family=args.group_by_family)
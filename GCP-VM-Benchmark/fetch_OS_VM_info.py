@@ -1,6 +1,8 @@
 # fetch_all_os_vm_info_async.py
 import asyncio
 import json
+import gcp_client
+from machine_types import load_catalog
 from tqdm import tqdm
 from tabulate import tabulate
 
@@ -15,27 +17,17 @@ IMAGE_PROJECTS = [
     "windows-cloud"
 ]
 
-async def run_gcloud(cmd):
-    """Run gcloud command asynchronously and return parsed JSON"""
-    proc = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE
-    )
-    stdout, stderr = await proc.communicate()
-    if proc.returncode != 0:
-        raise RuntimeError(f"Command failed: {' '.join(cmd)}\n{stderr.decode()}")
-    return json.loads(stdout.decode()) if stdout else []
+def list_project_images(project):
+    """Page through a project's images, fetching only the fields we keep"""
+    return list(gcp_client.list_all(
+        gcp_client.compute().images(), fields="family", project=project
+    ))
 
 async def fetch_project_images(project):
     """Fetch image families from a single project"""
-    data = await run_gcloud([
-        "gcloud", "compute", "images", "list",
-        f"--project={project}",
-        "--format=json"
-    ])
+    data = await asyncio.to_thread(list_project_images, project)
     return [
-        {"family": img["family"], "project": img["project"]}
+        {"family": img["family"], "project": project}
         for img in data if "family" in img
     ]
 
@@ -54,16 +46,16 @@ async def fetch_all_images():
     unique = {(i["family"], i["project"]): i for i in results}
     return list(unique.values())
 
-async def fetch_machine_types(zone="us-central1-a"):
-    """Fetch available machine types (sample zone)"""
-    data = await run_gcloud([
-        "gcloud", "compute", "machine-types", "list",
-        f"--zones={zone}",
-        "--format=json"
-    ])
+async def fetch_machine_types():
+    """Fetch machine types for every zone (one aggregated call)"""
+    catalog = await asyncio.to_thread(load_catalog, refresh=True)
+    zone_counts = {}
+    for names in catalog["zones"].values():
+        for name in names:
+            zone_counts[name] = zone_counts.get(name, 0) + 1
     return [
-        {"name": m["name"], "cpus": m["guestCpus"], "memory_mb": m["memoryMb"]}
-        for m in data
+        {"name": name, "cpus": spec["cpus"], "memory_mb": spec["memory_mb"], "zones": zone_counts[name]}
+        for name, spec in catalog["specs"].items()
     ]
 
 def save_to_json(images, machine_types):
@@ -83,7 +75,7 @@ def save_to_html(images, machine_types):
 
     # VM types
     vm_table = tabulate(machine_types, headers="keys", tablefmt="html")
-    html += "<h2>Machine Types (us-central1-a)</h2>" + vm_table
+    html += "<h2>Machine Types (all zones)</h2>" + vm_table
 
     html += "</body></html>"
 
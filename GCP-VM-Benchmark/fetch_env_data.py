@@ -1,12 +1,27 @@
-import subprocess
 import json
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from html import escape
+import gcp_client
 from pathlib import Path
-from tabulate import tabulate
 from datetime import datetime
 
+# mcbench lives at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcbench import metrics, trace
+
 TEMPLATES_DIR = Path("templates")
 TEMPLATES_DIR.mkdir(exist_ok=True)
 
+MAX_WORKERS = 16
+CACHE_TTL_SEC = 300
+
+# (account, project, all_projects) -> (monotonic time, report)
+_report_cache = {}
+
 CSS_STYLE = """
 <style>
     body {
@@ -38,14 +53,49 @@ CSS_STYLE = """
 </style>
 """
 
-def run_gcloud_cmd(cmd):
+def fetch_config():
+    """Equivalent of `gcloud config list` for the active ADC identity"""
     try:
-        output = subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
-        return json.loads(output)
-    except subprocess.CalledProcessError:
+        credentials, _ = gcp_client.get_credentials()
+        project = gcp_client.get_project()
+    except Exception:
         return {}
+    account = getattr(credentials, "service_account_email", None) or getattr(credentials, "account", "")
+    return {"core": {"account": account, "project": project}}
+
+def fetch_projects():
+    try:
+        return list(gcp_client.list_all(
+            gcp_client.resource_manager().projects(),
+            fields="projectId,name,lifecycleState",
+            items_key="projects"
+        ))
+    except Exception:
+        return []
+
+def fetch_enabled_services(project):
+    try:
+        return list(gcp_client.list_all(
+            gcp_client.service_usage().services(),
+            fields="config(name,title)",
+            items_key="services",
+            parent=f"projects/{project}",
+            filter="state:ENABLED"
+        ))
+    except Exception:
+        return []
+
+def write_table(f, title, headers, rows):
+    """Write one table row by row instead of building it in memory"""
+    f.write(f"<h2>{escape(title)}</h2>\n<table>\n<thead><tr>")
+    f.write("".join(f"<th>{escape(str(h))}</th>" for h in headers))
+    f.write("</tr></thead>\n<tbody>\n")
+    for row in rows:
+        f.write("<tr>" + "".join(f"<td>{escape(str(c))}</td>" for c in row) + "</tr>\n")
+    f.write("</tbody>\n</table>\n")
 
 def export_html(tables, output_path):
+    """`tables` is an iterable of (title, headers, rows); rows may be generators"""
     with open(output_path, "w") as f:
         f.write("<html><head><title>GCP Report</title>")
         f.write(CSS_STYLE)
@@ -54,54 +104,84 @@ def export_html(tables, output_path):
         f.write(f"<h1>GCP Environment Report</h1><p>Generated at {datetime.now()}</p>\n")
 
         for title, headers, rows in tables:
-            html_table = tabulate(rows, headers=headers, tablefmt="html")
-            f.write(f"<h2>{title}</h2>\n{html_table}\n")
+            write_table(f, title, headers, rows)
 
         f.write("</body></html>")
     print(f"💾 Styled HTML exported to {output_path}")
 
-def main():
+def service_rows(services):
+    for s in services:
+        config = s.get("config", {})
+        yield [config.get("name", "[Error extracting service data]"), config.get("title", "")]
+
+def report_tables(report):
+    projects = report["projects"]
+    if projects:
+        yield ("Projects", ["Project ID", "Name", "Lifecycle"],
+               ([p["projectId"], p.get("name", ""), p.get("lifecycleState", "")] for p in projects))
+
+    if report.get("project_services"):
+        for project_id, services in report["project_services"].items():
+            if services:
+                yield (f"Enabled Services — {project_id}", ["Service Name", "Title"], service_rows(services))
+    elif report["current_project_services"]:
+        yield ("Enabled Services", ["Service Name", "Title"], service_rows(report["current_project_services"]))
+
+def collect_report(config, all_projects=False):
+    """Run the API probes concurrently and assemble the report dict"""
+    current_project = config.get("core", {}).get("project", "")
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # in_context: the workers' prints go to the caller's job (see jobs.py)
+        projects_future = executor.submit(trace.in_context(fetch_projects))
+        services_future = (executor.submit(trace.in_context(fetch_enabled_services), current_project)
+                           if current_project else None)
+
+        projects = projects_future.result()
+        services = services_future.result() if services_future else []
+
+        report = {
+            "projects": projects,
+            "current_project_services": services,
+            "gcloud_config": config
+        }
+
+        if all_projects:
+            others = [p["projectId"] for p in projects if p["projectId"] != current_project]
+            futures = [executor.submit(trace.in_context(fetch_enabled_services), p) for p in others]
+            fanned = {p: future.result() for p, future in zip(others, futures)}
+            report["project_services"] = {current_project: services, **fanned} if current_project else fanned
+
+    return report
+
+def main(all_projects=False, ttl=CACHE_TTL_SEC):
     output_json = Path("gcp_env_report.json")
     output_html = TEMPLATES_DIR / "report.html"
 
-    config = run_gcloud_cmd(["gcloud", "config", "list", "--format=json"])
-    current_project = config.get("core", {}).get("project", "")
-    projects = run_gcloud_cmd(["gcloud", "projects", "list", "--format=json"])
-
-    if current_project:
-        services = run_gcloud_cmd([
-            "gcloud", "services", "list", "--enabled",
-            f"--project={current_project}", "--format=json"
-        ])
-    else:
-        services = []
-
-    report = {
-        "projects": projects,
-        "current_project_services": services,
-        "gcloud_config": config
-    }
+    config = fetch_config()
+    core = config.get("core", {})
+    cache_key = (core.get("account", ""), core.get("project", ""), all_projects)
+
+    cached = _report_cache.get(cache_key)
+    if cached and time.monotonic() - cached[0] < ttl and output_html.exists():
+        metrics.cache_lookup("gcp_env_report", hits=1)
+        print(f"⚡ Using cached report ({time.monotonic() - cached[0]:.0f}s old)")
+        return cached[1]
+    metrics.cache_lookup("gcp_env_report", misses=1)
+
+    report = collect_report(config, all_projects)
+    _report_cache[cache_key] = (time.monotonic(), report)
 
     # Save JSON for backup/reference
     with open(output_json, "w") as f:
         json.dump(report, f, indent=2)
 
-    # Prepare data for HTML
-    tables = []
-
-    if projects:
-        project_rows = [[p["projectId"], p.get("name", ""), p.get("lifecycleState", "")] for p in projects]
-        tables.append(("Projects", ["Project ID", "Name", "Lifecycle"], project_rows))
-
-    if services:
-        try:
-            service_rows = [[s["config"]["name"], s["config"]["title"]] for s in services]
-        except Exception:
-            service_rows = [["[Error extracting service data]", ""]]
-        tables.append(("Enabled Services", ["Service Name", "Title"], service_rows))
-
-    export_html(tables, output_html)
+    export_html(report_tables(report), output_html)
     print(f"✅ Report saved to: {output_html.resolve()}")
+    return report
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="GCP environment report")
+    parser.add_argument("--all-projects", action="store_true", help="list enabled services for every project")
+    args = parser.parse_args()
+    main(all_projects=args.all_projects)
@@ -1,51 +1,106 @@
+import os
+import sys
 import json
-from googleapiclient import discovery
-from google.auth import default
-
-def fetch_all_os_images(output_file="os_images.json"):
-    credentials, _ = default()
-    compute = discovery.build("compute", "v1", credentials=credentials)
-
-    os_projects = [
-        "debian-cloud",
-        "ubuntu-os-cloud",
-        "centos-cloud",
-        "windows-cloud",
-        "rhel-cloud",
-        "suse-cloud",
-        "opensuse-cloud",
-        "rocky-linux-cloud"
-    ]
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import gcp_client
 
+# mcbench lives at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcbench import trace
+
+OS_PROJECTS = [
+    "debian-cloud",
+    "ubuntu-os-cloud",
+    "centos-cloud",
+    "windows-cloud",
+    "rhel-cloud",
+    "suse-cloud",
+    "opensuse-cloud",
+    "rocky-linux-cloud"
+]
+
+# Only the fields we keep, plus deprecation state for filtering
+IMAGE_FIELDS = "name,family,creationTimestamp,selfLink,deprecated(state)"
+PAGE_SIZE = 500
+# Server-side: most of a public project's images are deprecated, so this skips most of the pages
+ACTIVE_FILTER = " AND ".join(f'(deprecated.state != "{state}")' for state in ("DEPRECATED", "OBSOLETE", "DELETED"))
+
+def fetch_project_images(project, include_deprecated=False):
+    """Fetch one project's images, dropping deprecated/obsolete ones by default"""
+    images = []
+    filters = {} if include_deprecated else {"filter": ACTIVE_FILTER}
+    for img in gcp_client.list_all(
+        gcp_client.compute().images(),
+        fields=IMAGE_FIELDS,
+        project=project,
+        maxResults=PAGE_SIZE,
+        **filters
+    ):
+        # The filter already did this; kept so a filter the API ignores cannot leak deprecated images.
+        # `deprecated` is only present on images that have a deprecation status
+        if not include_deprecated and img.get("deprecated", {}).get("state") not in (None, "ACTIVE"):
+            continue
+        images.append({
+            "name": img.get("name"),
+            "family": img.get("family", "N/A"),
+            "creationTimestamp": img.get("creationTimestamp", "N/A"),
+            "selfLink": img.get("selfLink", "N/A")
+        })
+    return images
+
+def latest_per_family(images):
+    """Keep only the newest image of each family; images without a family are kept"""
+    latest = {}
+    loose = []
+    for img in images:
+        family = img["family"]
+        if family == "N/A":
+            loose.append(img)
+        elif family not in latest or img["creationTimestamp"] > latest[family]["creationTimestamp"]:
+            latest[family] = img
+    return sorted(latest.values(), key=lambda i: i["family"]) + loose
+
+def fetch_all_os_images(output_file="os_images.json", latest_only=False,
+                        include_deprecated=False, max_workers=len(OS_PROJECTS), progress=None):
     print("Fetching all available OS images (this may take a bit)...")
-    all_images = {}
-
-    for project in os_projects:
-        try:
-            print(f"Fetching from project: {project}")
-            request = compute.images().list(project=project)
-            images = []
-
-            while request is not None:
-                response = request.execute()
-                for img in response.get("items", []):
-                    images.append({
-                        "name": img.get("name"),
-                        "family": img.get("family", "N/A"),
-                        "creationTimestamp": img.get("creationTimestamp", "N/A"),
-                        "selfLink": img.get("selfLink", "N/A")
-                    })
-                request = compute.images().list_next(previous_request=request, previous_response=response)
-
-            all_images[project] = images
-        except Exception as e:
-            print(f"Error fetching images from {project}: {e}")
-            all_images[project] = []
-
-    with open(output_file, "w") as f:
-        json.dump(all_images, f, indent=4)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, open(output_file, "w") as f:
+        # in_context: the workers' prints go to the caller's job (see jobs.py)
+        futures = {
+            executor.submit(trace.in_context(fetch_project_images), project, include_deprecated): project
+            for project in OS_PROJECTS
+        }
+
+        # Write each project to disk as soon as it finishes, so total time
+        # is bounded by the slowest project and nothing is held in memory.
+        f.write("{")
+        for i, future in enumerate(as_completed(futures)):
+            project = futures[future]
+            try:
+                images = future.result()
+            except Exception as e:
+                print(f"Error fetching images from {project}: {e}")
+                images = []
+
+            if latest_only:
+                images = latest_per_family(images)
+            print(f"Fetched {len(images)} image(s) from project: {project}")
+            if progress:
+                progress(i + 1, len(OS_PROJECTS))
+
+            f.write("," if i else "")
+            f.write(f"\n    {json.dumps(project)}: ")
+            f.write(json.dumps(images, indent=4).replace("\n", "\n    "))
+        f.write("\n}\n")
 
     print(f"\n🎉 All OS image data saved to: {output_file}")
 
 if __name__ == "__main__":
-    fetch_all_os_images()
+    parser = argparse.ArgumentParser(description="Fetch public GCP OS images")
+    parser.add_argument("--output", default="os_images.json")
+    parser.add_argument("--latest-only", action="store_true", help="keep only the newest image per family")
+    parser.add_argument("--include-deprecated", action="store_true")
+    args = parser.parse_args()
+
+    fetch_all_os_images(args.output, args.latest_only, args.include_deprecated)
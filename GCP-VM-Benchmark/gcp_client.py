@@ -0,0 +1,154 @@
+# gcp_client.py
+"""
+Shared GCP API client layer.
+
+Every GCP script goes through this module instead of spawning a `gcloud`
+process per call:
+- credentials are resolved once (Application Default Credentials, see login.sh)
+- discovery clients are built once and shared
+- each thread gets its own keep-alive httplib2 transport (httplib2 is not thread-safe)
+- list helpers take a `fields` partial-response mask so only needed fields are sent
+- the Google client libraries are imported on first use, so scripts and the
+  Flask app that merely import this module start fast
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+
+SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+HTTP_TIMEOUT = 60
+NUM_RETRIES = 3
+OPERATION_WAIT_TIMEOUT = 600
+
+_local = threading.local()
+_build_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def get_credentials():
+    """Resolve Application Default Credentials once per process."""
+    from google.auth import default
+    return default(scopes=SCOPES)
+
+
+def get_project():
+    """Project from ADC, falling back to the usual environment variables."""
+    _, project = get_credentials()
+    project = project or os.environ.get("GOOGLE_CLOUD_PROJECT") or os.environ.get("CLOUDSDK_CORE_PROJECT")
+    if not project:
+        raise RuntimeError("No GCP project configured. Run login.sh or set GOOGLE_CLOUD_PROJECT.")
+    return project
+
+
+def thread_http():
+    """Authorized keep-alive transport owned by the calling thread."""
+    http = getattr(_local, "http", None)
+    if http is None:
+        import httplib2
+        from google_auth_httplib2 import AuthorizedHttp
+        credentials, _ = get_credentials()
+        http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+        _local.http = http
+    return http
+
+
+@functools.lru_cache(maxsize=None)
+def _build(name, version):
+    from googleapiclient import discovery
+    with _build_lock:
+        # Static discovery documents ship with google-api-python-client,
+        # so building a client does not hit the network.
+        return discovery.build(name, version, http=thread_http(), cache_discovery=False)
+
+
+def compute():
+    return _build("compute", "v1")
+
+
+def resource_manager():
+    return _build("cloudresourcemanager", "v1")
+
+
+def service_usage():
+    return _build("serviceusage", "v1")
+
+
+def execute(request):
+    """Execute a request on this thread's pooled transport."""
+    return request.execute(http=thread_http(), num_retries=NUM_RETRIES)
+
+
+async def execute_async(request):
+    """Execute a request in a worker thread so asyncio callers can fan out."""
+    return await asyncio.to_thread(execute, request)
+
+
+def page_fields(item_fields, items_key="items"):
+    """Build a `fields` mask for a paged list call, e.g. items(name,family)."""
+    if not item_fields:
+        return None
+    return f"nextPageToken,{items_key}({item_fields})"
+
+
+def list_all(collection, fields=None, items_key="items", **kwargs):
+    """Yield every item of a paged list call, requesting only `fields`."""
+    mask = page_fields(fields, items_key)
+    if mask:
+        kwargs["fields"] = mask
+    request = collection.list(**kwargs)
+    while request is not None:
+        response = execute(request)
+        yield from response.get(items_key, [])
+        request = collection.list_next(previous_request=request, previous_response=response)
+
+
+def aggregated_all(collection, fields=None, items_key="items", **kwargs):
+    """Yield (scope, items) for every scope of an aggregatedList call.
+
+    `scope` is e.g. "zones/us-central1-a"; scopes with no items are skipped.
+    """
+    if fields:
+        kwargs["fields"] = f"nextPageToken,items/*/{items_key}({fields})"
+    request = collection.aggregatedList(**kwargs)
+    while request is not None:
+        response = execute(request)
+        for scope, scoped in response.get("items", {}).items():
+            if scoped.get(items_key):
+                yield scope, scoped[items_key]
+        request = collection.aggregatedList_next(previous_request=request, previous_response=response)
+
+
+def wait_zone_operation(operation, project=None, zone=None):
+    """Block until a zonal operation is DONE and return its final state.
+
+    zoneOperations.wait returns after at most ~2 minutes even if the
+    operation is still running, so it is called in a loop.
+    """
+    project = project or get_project()
+    zone = zone or operation["zone"].rsplit("/", 1)[-1]
+    deadline = time.monotonic() + OPERATION_WAIT_TIMEOUT
+    while operation.get("status") != "DONE":
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Operation {operation['name']} in {zone} did not finish in time")
+        operation = execute(compute().zoneOperations().wait(
+            project=project, zone=zone, operation=operation["name"]
+        ))
+    return operation
+
+
+def wait_global_operation(operation, project=None):
+    """Block until a global operation (firewalls, networks) is DONE and return its final state"""
+    project = project or get_project()
+    deadline = time.monotonic() + OPERATION_WAIT_TIMEOUT
+    while operation.get("status") != "DONE":
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Operation {operation['name']} did not finish in time")
+        operation = execute(compute().globalOperations().wait(project=project, operation=operation["name"]))
+    return operation
+
+
+async def wait_zone_operation_async(operation, project=None, zone=None):
+    return await asyncio.to_thread(wait_zone_operation, operation, project, zone)
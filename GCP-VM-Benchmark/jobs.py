@@ -0,0 +1,186 @@
+# jobs.py
+"""
+Background job runner for the Flask app.
+
+Long fetches run in a bounded thread pool instead of inside the request.
+Everything a job prints is captured line by line so it can be streamed to
+the browser, and submitting a job whose key is already queued or running
+returns the existing job instead of starting a second one. stdout is routed
+by a context variable holding the job; code that fans out to an executor
+submits trace.in_context(fn) so its workers' prints reach the job too.
+"""
+import contextvars
+import sys
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 2
+MAX_FINISHED_JOBS = 50
+
+_current_job = contextvars.ContextVar("job", default=None)
+_pending = threading.local()  # (job, unterminated text) of this thread's last write
+
+
+class Job:
+    def __init__(self, key, description):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.description = description
+        self.status = "queued"  # queued -> running -> done | failed
+        self.progress = None  # (current, total) once reported
+        self.lines = []
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def log(self, line):
+        with self._cond:
+            self.lines.append(line)
+            self._cond.notify_all()
+
+    def set_progress(self, current, total):
+        with self._cond:
+            self.progress = (current, total)
+            self._cond.notify_all()
+
+    def _set_status(self, status, error=None):
+        with self._cond:
+            self.status = status
+            self.error = error
+            if self.finished:
+                self.finished_at = time.time()
+            self._cond.notify_all()
+
+    def wait_for_update(self, seen_lines, seen_progress, timeout):
+        """Block until there are lines past `seen_lines`, new progress, or the job ends"""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: len(self.lines) > seen_lines or self.progress != seen_progress or self.finished,
+                timeout=timeout
+            )
+            return self.lines[seen_lines:], self.progress, self.finished
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "key": self.key,
+            "description": self.description,
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+            "lines": len(self.lines),
+        }
+
+
+class _JobStdout:
+    """sys.stdout replacement that sends a job thread's prints to its Job"""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def write(self, text):
+        job = _current_job.get()
+        if job is None:
+            return self.fallback.write(text)
+        owner, buffer = getattr(_pending, "value", (None, ""))
+        if owner is not job:
+            # A pool thread moved on from another job's work: that job gets its last partial line
+            if buffer:
+                owner.log(buffer)
+            buffer = ""
+        *complete, rest = (buffer + text).split("\n")
+        for line in complete:
+            job.log(line)
+        _pending.value = (job, rest)
+        return len(text)
+
+    def flush(self):
+        if _current_job.get() is None:
+            self.fallback.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.fallback, name)
+
+
+class JobManager:
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._active = {}  # key -> Job, for coalescing duplicate submissions
+        if not isinstance(sys.stdout, _JobStdout):
+            sys.stdout = _JobStdout(sys.stdout)
+
+    def submit(self, key, description, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs); returns the already active job for `key` if any"""
+        with self._lock:
+            active = self._active.get(key)
+            if active is not None:
+                return active
+            job = Job(key, description)
+            self._jobs[job.id] = job
+            self._active[key] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def list(self):
+        return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def queue_depth(self):
+        return sum(1 for j in self._jobs.values() if j.status == "queued")
+
+    def running(self):
+        return sum(1 for j in self._jobs.values() if j.status == "running")
+
+    def _run(self, job, fn, args, kwargs):
+        token = _current_job.set(job)
+        _pending.value = (job, "")
+        job._set_status("running")
+        # What SystemExit/KeyboardInterrupt leave behind: the job must not stay "running"
+        status, error = "failed", "interrupted"
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            job.log(traceback.format_exc().rstrip())
+            status, error = "failed", str(e)
+        else:
+            status, error = "done", None
+        finally:
+            owner, buffer = _pending.value
+            if owner is job and buffer:
+                job.log(buffer)
+            _pending.value = (None, "")
+            _current_job.reset(token)
+            with self._lock:
+                self._active.pop(job.key, None)
+            job._set_status(status, error)
+
+    def _prune(self):
+        finished = []
+        for job in self._jobs.values():
+            # status and finished_at change together under the job's lock
+            with job._cond:
+                if job.finished:
+                    finished.append((job.finished_at or 0, job))
+        finished.sort(key=lambda item: item[0])
+        for _, job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
+
+
+def report_progress(current, total):
+    """Progress hook for code running inside a job; a no-op elsewhere"""
+    job = _current_job.get()
+    if job is not None:
+        job.set_progress(current, total)
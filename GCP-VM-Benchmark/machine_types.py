@@ -0,0 +1,107 @@
+# machine_types.py
+"""
+All-zones machine-type catalog.
+
+One machineTypes.aggregatedList call covers every zone of the project. The
+catalog is stored as a zone × machine-type availability index:
+
+    {
+        "fetched_at": "...",
+        "specs": {"e2-micro": {"cpus": 2, "memory_mb": 1024}, ...},
+        "zones": {"us-central1-a": ["e2-micro", ...], ...}
+    }
+
+and `build_index` turns it into machine type -> region -> zones so
+region-set queries are plain dictionary lookups.
+"""
+import argparse
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+from tabulate import tabulate
+import gcp_client
+
+CATALOG_FILE = "machine_types_catalog.json"
+
+def fetch_catalog():
+    """Fetch every zone's machine types with a single aggregated listing"""
+    specs = {}
+    zones = {}
+    for scope, machine_types in gcp_client.aggregated_all(
+        gcp_client.compute().machineTypes(),
+        fields="name,guestCpus,memoryMb",
+        items_key="machineTypes",
+        project=gcp_client.get_project(),
+        maxResults=500
+    ):
+        zone = scope.rsplit("/", 1)[-1]
+        zones.setdefault(zone, [])
+        for m in machine_types:
+            specs.setdefault(m["name"], {"cpus": m["guestCpus"], "memory_mb": m["memoryMb"]})
+            zones[zone].append(m["name"])
+
+    return {
+        "fetched_at": datetime.now().isoformat(),
+        "specs": dict(sorted(specs.items())),
+        "zones": {z: sorted(names) for z, names in sorted(zones.items())}
+    }
+
+def save_catalog(catalog, path=CATALOG_FILE):
+    with open(path, "w") as f:
+        json.dump(catalog, f, indent=4)
+
+def load_catalog(path=CATALOG_FILE, refresh=False):
+    """Load the cached catalog, fetching and saving it if missing"""
+    if refresh or not os.path.exists(path):
+        catalog = fetch_catalog()
+        save_catalog(catalog, path)
+        return catalog
+    with open(path) as f:
+        return json.load(f)
+
+def region_of(zone):
+    return zone.rsplit("-", 1)[0]
+
+def build_index(catalog):
+    """machine type -> region -> sorted list of zones offering it"""
+    index = defaultdict(lambda: defaultdict(list))
+    for zone, names in catalog["zones"].items():
+        for name in names:
+            index[name][region_of(zone)].append(zone)
+    return index
+
+def zones_in_region(catalog, region):
+    return [z for z in catalog["zones"] if region_of(z) == region]
+
+def available_in_regions(index, regions):
+    """Machine types offered in every one of `regions`, with their zones"""
+    regions = list(regions)
+    return {
+        name: {r: by_region[r] for r in regions}
+        for name, by_region in sorted(index.items())
+        if all(r in by_region for r in regions)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Which machine types are available in all given regions")
+    parser.add_argument("regions", nargs="*")
+    parser.add_argument("--refresh", action="store_true", help=f"re-fetch {CATALOG_FILE}")
+    args = parser.parse_args()
+
+    catalog = load_catalog(refresh=args.refresh)
+    print(f"📦 {len(catalog['specs'])} machine types across {len(catalog['zones'])} zones "
+          f"(fetched {catalog['fetched_at']})")
+    if not args.regions:
+        return
+
+    matches = available_in_regions(build_index(catalog), args.regions)
+    rows = [
+        [name, catalog["specs"][name]["cpus"], catalog["specs"][name]["memory_mb"],
+         "; ".join(f"{r}: {','.join(z.rsplit('-', 1)[-1] for z in zones)}" for r, zones in by_region.items())]
+        for name, by_region in matches.items()
+    ]
+    print(tabulate(rows, headers=["Machine Type", "vCPUs", "Memory MB", "Zones"], tablefmt="grid"))
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,34 @@
 # create_config.py
+import argparse
 import json
+import os
+import sys
+
+# mcbench lives at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mcbench.latency import print_latencies, region_latencies
+
+CONFIG_FILE = "deployment_config.json"
+
+def show_region_latencies(sort_by_latency=False):
+    """Latency from this machine to every region of the machine-type catalog"""
+    from machine_types import load_catalog, region_of  # needs the GCP client libraries
+
+    regions = sorted({region_of(zone) for zone in load_catalog()["zones"]})
+    print_latencies(region_latencies("gcp", regions), sort=sort_by_latency)
+
+def build_config(regions, image, machine_type):
+    """One deployment of `image` on `machine_type` per region"""
+    return {"deployments": [
+        {"region": region, "image": image, "machine_type": machine_type}
+        for region in regions
+    ]}
+
+def save_config(config):
+    with open(CONFIG_FILE, "w") as f:
+        json.dump(config, f, indent=4)
+
+    print(f"Config saved to {CONFIG_FILE}")
 
 def create_config():
     config = {"deployments": []}
@@ -11,16 +40,22 @@ def create_config():
         image = input("Enter image (e.g. debian-12, ubuntu-2204-lts): ").strip()
         machine_type = input("Enter machine type (e.g. e2-micro, e2-medium): ").strip()
 
-        config["deployments"].append({
-            "region": region,
-            "image": image,
-            "machine_type": machine_type
-        })
-
-    with open("deployment_config.json", "w") as f:
-        json.dump(config, f, indent=4)
+        config["deployments"] += build_config([region], image, machine_type)["deployments"]
 
-    print("Config saved to deployment_config.json")
+    save_config(config)
 
 if __name__ == "__main__":
-    create_config()
+    parser = argparse.ArgumentParser(description=f"Create {CONFIG_FILE} (interactively unless --region is given)")
+    parser.add_argument("--latency", action="store_true",
+                        help="first show the TCP/TLS latency from here to each region")
+    parser.add_argument("--sort-by-latency", action="store_true", help="with --latency, fastest region first")
+    parser.add_argument("--region", action="append", dest="regions", help="deploy to this region (repeat it)")
+    parser.add_argument("--image", default="debian-12", help="with --region, e.g. debian-12, ubuntu-2204-lts")
+    parser.add_argument("--machine-type", default="e2-micro", help="with --region, e.g. e2-micro, e2-medium")
+    args = parser.parse_args()
+    if args.latency or args.sort_by_latency:
+        show_region_latencies(args.sort_by_latency)
+    if args.regions:
+        save_config(build_config(args.regions, args.image, args.machine_type))
+    else:
+        create_config()
@@ -0,0 +1,102 @@
+# zone_placement.py
+"""
+Zone placement for GCP deployments.
+
+Candidate zones for a region come from the machine-type catalog (only zones
+that offer the machine type), loaded once per run by ZoneCatalog and shared
+by the run's concurrent deployments. They are ranked by their failure history,
+which is kept in zone_history.json across runs, and deploy.py walks the
+ranking, moving on to the next zone on capacity or unsupported-type errors.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from googleapiclient.errors import HttpError
+from machine_types import load_catalog, build_index, zones_in_region
+
+HISTORY_FILE = "zone_history.json"
+
+# Operation error codes that mean "try another zone"
+RETRYABLE_CODES = {
+    "ZONE_RESOURCE_POOL_EXHAUSTED",
+    "ZONE_RESOURCE_POOL_EXHAUSTED_WITH_DETAILS",
+    "RESOURCE_POOL_EXHAUSTED",
+    "QUOTA_EXCEEDED_IN_ZONE",
+    "UNSUPPORTED_OPERATION",
+}
+
+
+def error_reason(error):
+    """Short reason string for an operation error dict or an HttpError"""
+    if isinstance(error, HttpError):
+        return f"HTTP {error.resp.status}: {error.reason}"
+    codes = [e.get("code", "") for e in error.get("errors", [])]
+    return ",".join(codes) or "UNKNOWN"
+
+
+def is_placement_error(error):
+    """True when the failure is about the zone rather than the request itself"""
+    if isinstance(error, HttpError):
+        reason = str(error.reason)
+        # Machine type missing in this zone is reported as 400/404 on machineType
+        return (error.resp.status in (400, 404) and "machineType" in reason) or error.resp.status == 503
+    return any(e.get("code") in RETRYABLE_CODES for e in error.get("errors", []))
+
+
+class ZoneHistory:
+    """Per-zone attempt/failure counts persisted between runs"""
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.zones = json.load(f)
+        else:
+            self.zones = {}
+
+    def failure_rate(self, zone):
+        stats = self.zones.get(zone, {})
+        # Laplace smoothing so unseen zones rank between good and bad ones
+        return (stats.get("failures", 0) + 1) / (stats.get("attempts", 0) + 2)
+
+    def record(self, zone, success, reason=None):
+        with self._lock:
+            stats = self.zones.setdefault(zone, {"attempts": 0, "failures": 0})
+            stats["attempts"] += 1
+            if not success:
+                stats["failures"] += 1
+                stats["last_failure"] = datetime.now().isoformat()
+                stats["last_failure_reason"] = reason
+            with open(self.path, "w") as f:
+                json.dump(self.zones, f, indent=4)
+
+
+class ZoneCatalog:
+    """The machine-type catalog and its index, loaded (or fetched) once, on first use"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.catalog = None
+        self.index = None
+
+    def load(self):
+        # Concurrent deployments wait for the first one instead of each fetching and saving the catalog
+        with self._lock:
+            if self.catalog is None:
+                self.catalog = load_catalog()
+                self.index = build_index(self.catalog)
+        return self.catalog, self.index
+
+
+def candidate_zones(region, machine_type, zone_catalog):
+    """Zones of `region` offering `machine_type`, falling back to all its zones"""
+    catalog, index = zone_catalog.load()
+    zones = index.get(machine_type, {}).get(region) or zones_in_region(catalog, region)
+    return zones or [f"{region}-a"]
+
+
+def ranked_zones(region, machine_type, history, zone_catalog):
+    """Healthiest zones first; ties keep alphabetical order (zone "a" first)"""
+    return sorted(candidate_zones(region, machine_type, zone_catalog), key=lambda z: (history.failure_rate(z), z))
@@ -6,24 +6,38 @@ AWS Deployment Script (Clean Start & Resilient)
 - Creates EC2 instances
 - Measures deployment time
 - Handles failures gracefully
-- Deletes previous deployed_resources.json & deployment_times.json
+- Archives previous deployed_resources.json & deployment_times.json to history/
 - Saves:
   1. deployed_resources.json → VM ID, key, security group, etc.
   2. deployment_times.json → deployment start/end times
 - Shows a summary table of all deployed instances at the end
+- Writes every create to deploy_journal.jsonl first; after a crash,
+  --resume cleans up what the crashed run left behind and deploys only the
+  config entries that did not finish
 """
 
-import boto3
+import argparse
 import json
 import time
 import os
+import shutil
+import sys
+import uuid
 from datetime import datetime
 from tabulate import tabulate
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
+
+# mcbench lives at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from mcbench import journal as wal
+from mcbench._scripts import AWS_DIR, load_script
+from mcbench.reaper import run_tags
 
 CONFIG_FILE = "config.json"
 RESOURCES_FILE = "deployed_resources.json"
 TIMES_FILE = "deployment_times.json"
+JOURNAL_FILE = wal.JOURNAL_FILE
+HISTORY_DIR = "history"
 
 HARDCODED_PASSWORD = "Admin123!"  # Not recommended for production
 
@@ -52,14 +66,7 @@ def append_json(path, new_entry):
     save_json(path, data)
 
 
-def display_summary_table(resources_file):
-    if not os.path.exists(resources_file):
-        print("⚠️ No deployed resources to display.")
-        return
-
-    with open(resources_file, "r") as f:
-        data = json.load(f)
-
+def display_summary_table(data):
     if not data:
         print("⚠️ No deployed resources to display.")
         return
@@ -83,117 +90,256 @@ def display_summary_table(resources_file):
 
 
 def clean_previous_data():
-    """Delete previous deployment JSON files if they exist"""
-    for file in [RESOURCES_FILE, TIMES_FILE]:
+    """Move previous deployment JSON files into history/ so past runs are kept"""
+    unfinished = wal.unfinished(JOURNAL_FILE)
+    if unfinished:
+        print(f"⚠️ The previous run did not finish {len(unfinished)} deployment(s); "
+              f"its resources may still exist (run with --resume to clean them up)")
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    for file in [RESOURCES_FILE, TIMES_FILE, JOURNAL_FILE]:
         if os.path.exists(file):
-            os.remove(file)
-            print(f"🗑️ Deleted previous {file}")
-
-
-def main():
-    # Delete previous deployment data
-    clean_previous_data()
-
-    configs = load_config()
-    print(f"🚀 Deploying to {len(configs)} region(s)")
-
-    for cfg in configs:
-        region = cfg["region"]
-        ami_id = cfg["ami_id"]
-        instance_type = cfg["instance_type"]
-        architecture = cfg["architecture"]
-
-        print(f"\n🌍 Deploying in {region} ...")
-        ec2 = boto3.client("ec2", region_name=region)
-        start_time = time.time()
-        instance_id = None
-        key_name = None
-        key_path = None
-        sg_id = None
+            stamp = datetime.fromtimestamp(os.path.getmtime(file)).strftime("%Y%m%d-%H%M%S")
+            stem, ext = os.path.splitext(file)
+            archived = os.path.join(HISTORY_DIR, f"{stem}-{stamp}{ext}")
+            shutil.move(file, archived)
+            print(f"📦 Archived previous {file} to {archived}")
+
+
+def tag_specifications(run_id, *resource_types):
+    """Run ID tags for mcbench/reaper.py, applied as the resources are created"""
+    tags = [{"Key": k, "Value": v} for k, v in run_tags(run_id).items()]
+    return [{"ResourceType": t, "Tags": tags} for t in resource_types]
+
+
+def deploy_region(cfg, journal=wal.NULL_JOURNAL, unit=None):
+    """Deploy one config entry; returns (deployed_data, times_data).
+
+    A failed entry still lists whatever was created before the failure, so
+    aws-destroy.py can delete it.
+    """
+    region = cfg["region"]
+    unit = unit or region
+    run_id = cfg.get("run_id") or journal.run_id
+    import boto3  # before the clock starts, so the first deployment is not charged for the import
+    ami_id = cfg["ami_id"]
+    instance_type = cfg["instance_type"]
+    architecture = cfg["architecture"]
+
+    print(f"\n🌍 Deploying in {region} ...")
+    ec2 = boto3.client("ec2", region_name=region)
+    start_time = time.time()
+    instance_id = None
+    key_name = None
+    key_path = None
+    sg_id = None
+    public_ip = None
+    deploy_time = 0
+    failed = False
+    # Unique per deployment so concurrent runs in one region never collide
+    suffix = f"{int(start_time)}-{uuid.uuid4().hex[:6]}"
+
+    try:
+        # Create Security Group
+        sg_name = f"temp-sg-{suffix}"
+        journal.intent(unit, "security_group", sg_name, region=region)
+        sg = ec2.create_security_group(GroupName=sg_name, Description="Temporary SG for short-lived VM",
+                                       TagSpecifications=tag_specifications(run_id, "security-group"))
+        sg_id = sg["GroupId"]
+        journal.created(unit, "security_group", sg_name, sg_id)
+
+        # Allow SSH (mcbench/mesh.py opens its own port only while it runs)
+        ec2.authorize_security_group_ingress(
+            GroupId=sg_id,
+            IpPermissions=[{
+                "IpProtocol": "tcp",
+                "FromPort": 22,
+                "ToPort": 22,
+                "IpRanges": [{"CidrIp": "0.0.0.0/0"}]
+            }]
+        )
+
+        # Create Key Pair
+        new_key_name = f"temp-key-{suffix}"
+        journal.intent(unit, "key_pair", new_key_name, region=region, key_file=f"{new_key_name}.pem")
+        key = ec2.create_key_pair(KeyName=new_key_name, TagSpecifications=tag_specifications(run_id, "key-pair"))
+        key_name, key_path = new_key_name, f"{new_key_name}.pem"
+        journal.created(unit, "key_pair", key_name, key_name)
+        key_material = key["KeyMaterial"]
+        with open(key_path, "w") as f:
+            f.write(key_material)
+        os.chmod(key_path, 0o400)
+
+        # Launch EC2 instance (optionally with a first-boot script).
+        # The client token makes the launch idempotent and lets --resume find
+        # the instance even if we crash before learning its id.
+        user_data = {"UserData": cfg["user_data"]} if cfg.get("user_data") else {}
+        journal.intent(unit, "instance", suffix, region=region, client_token=suffix)
+        response = ec2.run_instances(
+            ImageId=ami_id,
+            InstanceType=instance_type,
+            MinCount=1,
+            MaxCount=1,
+            KeyName=key_name,
+            SecurityGroupIds=[sg_id],
+            ClientToken=suffix,
+            TagSpecifications=tag_specifications(run_id, "instance", "volume"),
+            **user_data
+        )
+        instance = response["Instances"][0]
+        instance_id = instance["InstanceId"]
+        journal.created(unit, "instance", suffix, instance_id)
+
+        # Wait for running
+        waiter = ec2.get_waiter("instance_running")
+        waiter.wait(InstanceIds=[instance_id])
+
+        end_time = time.time()
+        deploy_time = end_time - start_time
+        print(f"✅ Instance {instance_id} running in {deploy_time:.2f} seconds")
+
+        # Looked up after timing stops; needed to reach the VM over SSH
+        reservations = ec2.describe_instances(InstanceIds=[instance_id])["Reservations"]
+        public_ip = reservations[0]["Instances"][0].get("PublicIpAddress")
+
+    except (ClientError, BotoCoreError) as e:
+        # BotoCoreError covers the waiter giving up (WaiterError)
+        print(f"⚠️ Deployment failed in {region}: {e}")
+        failed = True
+        end_time = time.time()
         deploy_time = 0
-        failed = False
 
-        try:
-            # Create Security Group
-            sg_name = f"temp-sg-{int(start_time)}"
-            sg = ec2.create_security_group(GroupName=sg_name, Description="Temporary SG for short-lived VM")
-            sg_id = sg["GroupId"]
-
-            # Allow SSH
-            ec2.authorize_security_group_ingress(
-                GroupId=sg_id,
-                IpPermissions=[{
-                    "IpProtocol": "tcp",
-                    "FromPort": 22,
-                    "ToPort": 22,
-                    "IpRanges": [{"CidrIp": "0.0.0.0/0"}]
-                }]
-            )
-
-            # Create Key Pair
-            key_name = f"temp-key-{int(start_time)}"
-            key = ec2.create_key_pair(KeyName=key_name)
-            key_material = key["KeyMaterial"]
-            key_path = f"{key_name}.pem"
-            with open(key_path, "w") as f:
-                f.write(key_material)
-            os.chmod(key_path, 0o400)
-
-            # Launch EC2 instance
-            response = ec2.run_instances(
-                ImageId=ami_id,
-                InstanceType=instance_type,
-                MinCount=1,
-                MaxCount=1,
-                KeyName=key_name,
-                SecurityGroupIds=[sg_id]
-            )
-            instance = response["Instances"][0]
-            instance_id = instance["InstanceId"]
-
-            # Wait for running
-            waiter = ec2.get_waiter("instance_running")
-            waiter.wait(InstanceIds=[instance_id])
-
-            end_time = time.time()
-            deploy_time = end_time - start_time
-            print(f"✅ Instance {instance_id} running in {deploy_time:.2f} seconds")
-
-        except ClientError as e:
-            print(f"⚠️ Deployment failed in {region}: {e}")
-            failed = True
-            end_time = time.time()
-            deploy_time = 0
-
-        # Save deployed resources
-        deployed_data = {
-            "Region": region,
-            "InstanceId": instance_id,
-            "AMI": ami_id,
-            "InstanceType": instance_type,
-            "Architecture": architecture,
-            "KeyName": key_name if not failed else None,
-            "KeyFile": key_path if not failed else None,
-            "SecurityGroupId": sg_id if not failed else None,
-            "Password": HARDCODED_PASSWORD if not failed else None,
-            "Failed": failed
-        }
+    # Save deployed resources
+    deployed_data = {
+        "Region": region,
+        "InstanceId": instance_id,
+        "PublicIp": public_ip,
+        "AMI": ami_id,
+        "InstanceType": instance_type,
+        "Architecture": architecture,
+        "KeyName": key_name,
+        "KeyFile": key_path,
+        "SecurityGroupId": sg_id,
+        "Password": HARDCODED_PASSWORD if not failed else None,
+        "Failed": failed
+    }
+
+    # Save deployment times
+    times_data = {
+        "Region": region,
+        "InstanceId": instance_id,
+        "InstanceType": instance_type,
+        "StartTime": datetime.fromtimestamp(start_time).isoformat(),
+        "EndTime": datetime.fromtimestamp(end_time).isoformat(),
+        "ElapsedSeconds": deploy_time
+    }
+    return deployed_data, times_data
+
+
+def config_units(configs):
+    """Journal unit of each config entry: its position and region"""
+    return [(f"{i}:{cfg['region']}", cfg) for i, cfg in enumerate(configs)]
+
+
+def find_resource(unit, resource):
+    """Current id of a journaled resource, or None if it does not exist"""
+    import boto3
+    ec2 = boto3.client("ec2", region_name=resource["region"])
+    try:
+        if resource["kind"] == "security_group":
+            groups = ec2.describe_security_groups(
+                Filters=[{"Name": "group-name", "Values": [resource["name"]]}])["SecurityGroups"]
+            return groups[0]["GroupId"] if groups else None
+        if resource["kind"] == "key_pair":
+            pairs = ec2.describe_key_pairs(
+                Filters=[{"Name": "key-name", "Values": [resource["name"]]}])["KeyPairs"]
+            return pairs[0]["KeyName"] if pairs else None
+        reservations = ec2.describe_instances(Filters=[
+            {"Name": "client-token", "Values": [resource["client_token"]]},
+            {"Name": "instance-state-name", "Values": ["pending", "running", "stopping", "stopped"]},
+        ])["Reservations"]
+        return reservations[0]["Instances"][0]["InstanceId"] if reservations else None
+    except ClientError as e:
+        # Assume it exists: cleaning up something already gone is harmless
+        print(f"⚠️ Could not look up {resource['kind']} {resource['name']}: {e}")
+        return resource.get("id") or resource["name"]
+
+
+def delete_leaked(unit, resources):
+    """Delete what a crashed deployment left behind (instance first, then its SG and key)"""
+    destroyer = load_script(AWS_DIR, "aws-destroy.py", "aws_destroy")
+    ids = {r["kind"]: r for r in resources}
+    info = destroyer.destroy_resource({
+        "Region": resources[0]["region"],
+        "InstanceId": ids.get("instance", {}).get("id"),
+        "SecurityGroupId": ids.get("security_group", {}).get("id"),
+        "KeyName": ids.get("key_pair", {}).get("id"),
+        "KeyFile": ids.get("key_pair", {}).get("key_file"),
+        "Failed": False,
+    })
+    return not any("failed" in status for status in info["Status"])
+
+
+def resume(configs):
+    """Reconcile the journal with AWS; returns (journal, config units still to deploy, finished journal entries)"""
+    state = wal.fold(wal.load(JOURNAL_FILE))
+    if state["run"] is None:
+        print(f"⚠️ No {JOURNAL_FILE} to resume from; starting a fresh run")
+        clean_previous_data()
+        return wal.Journal.start(JOURNAL_FILE), config_units(configs), []
+
+    print(f"🔁 Resuming run {state['run']['run_id']}: checking {len(state['units'])} journaled deployment(s) ...")
+    done, leaked = wal.reconcile(state, find_resource)
+    if leaked:
+        print(f"🧹 Cleaning up {sum(len(r) for r in leaked.values())} leaked resource(s) "
+              f"from {len(leaked)} unfinished deployment(s) ...")
+    journal = wal.Journal(JOURNAL_FILE, state["run"]["run_id"])
+    failed = wal.clean(journal, state, done, leaked, delete_leaked)
+    if failed:
+        print(f"⚠️ Could not clean up {', '.join(failed)}; not redeploying them (see the messages above)")
+
+    # The tracking files are rebuilt from the journal, so they match what exists
+    finished = [done[unit] for unit, _ in config_units(configs) if unit in done]
+    save_json(RESOURCES_FILE, [entry["deployed"] for entry in finished])
+    save_json(TIMES_FILE, [entry["times"] for entry in finished])
+    print(f"⏭️ Skipping {len(done)} finished deployment(s)")
+    return journal, [(unit, cfg) for unit, cfg in config_units(configs) if unit not in done and unit not in failed], finished
+
+
+def deploy(configs, resume_run=False):
+    """Deploy every config entry; returns (deployed resources, deployment times), a resumed run's finished ones first"""
+    if resume_run:
+        journal, units, finished = resume(configs)
+    else:
+        # Archive previous deployment data
+        clean_previous_data()
+        journal, units, finished = wal.Journal.start(JOURNAL_FILE), config_units(configs), []
+    resources = [entry["deployed"] for entry in finished]
+    times = [entry["times"] for entry in finished]
+    print(f"🚀 Deploying to {len(units)} region(s)")
+
+    for unit, cfg in units:
+        deployed_data, times_data = deploy_region(cfg, journal, unit)
+        resources.append(deployed_data)
+        times.append(times_data)
         append_json(RESOURCES_FILE, deployed_data)
-
-        # Save deployment times
-        times_data = {
-            "Region": region,
-            "InstanceId": instance_id,
-            "StartTime": datetime.fromtimestamp(start_time).isoformat(),
-            "EndTime": datetime.fromtimestamp(end_time).isoformat(),
-            "ElapsedSeconds": deploy_time
-        }
         append_json(TIMES_FILE, times_data)
+        if not deployed_data["Failed"]:
+            journal.done(unit, {"deployed": deployed_data, "times": times_data})
 
         print(f"📁 Deployment data saved to {RESOURCES_FILE} and {TIMES_FILE}")
 
     # Show summary table
-    display_summary_table(RESOURCES_FILE)
+    display_summary_table(resources)
+    return resources, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deploy one EC2 instance per entry of config.json")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue a crashed run from deploy_journal.jsonl instead of starting over")
+    args = parser.parse_args()
+
+    deploy(load_config(), args.resume)
 
 
 if __name__ == "__main__":
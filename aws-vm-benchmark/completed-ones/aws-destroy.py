@@ -3,17 +3,22 @@
 AWS Destroy Script (Updated for multi-region & failed deployments)
 - Iterates through all entries in deployed_resources.json
 - Deletes EC2 instances, Security Groups, and Key Pairs
-- Skips failed instances gracefully
+- Also deletes what a failed deployment created before it failed
 - Shows a summary table of destroyed resources
 """
 
-import boto3
 import json
 import os
-from botocore.exceptions import ClientError
+from botocore.exceptions import ClientError, WaiterError
 from tabulate import tabulate
 
 RESOURCES_FILE = "deployed_resources.json"
+# Resources deleted already (or never created) count as destroyed
+NOT_FOUND_CODES = {"InvalidInstanceID.NotFound", "InvalidGroup.NotFound", "InvalidKeyPair.NotFound"}
+
+
+def not_found(error):
+    return isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") in NOT_FOUND_CODES
 
 
 def load_resources():
@@ -34,23 +39,27 @@ def destroy_resource(entry):
     sg_id = entry.get("SecurityGroupId")
     key_name = entry.get("KeyName")
     key_file = entry.get("KeyFile")
-    failed = entry.get("Failed", False)
 
     print(f"\n🛑 Destroying resources in {region} ...")
+    import boto3  # only when there is something to destroy
     ec2 = boto3.client("ec2", region_name=region)
     destroyed_info = {"Region": region, "InstanceId": instance_id, "SG": sg_id, "KeyName": key_name, "Status": []}
 
-    # Terminate instance (skip if InstanceId is None or failed)
-    if instance_id and not failed:
+    # Terminate instance (skip if InstanceId is None; a failed deployment may still have one)
+    if instance_id:
         try:
             ec2.terminate_instances(InstanceIds=[instance_id])
             waiter = ec2.get_waiter("instance_terminated")
             waiter.wait(InstanceIds=[instance_id])
             print(f"✅ Instance {instance_id} terminated")
             destroyed_info["Status"].append("Instance terminated")
-        except ClientError as e:
-            print(f"⚠️ Could not terminate instance {instance_id}: {e}")
-            destroyed_info["Status"].append(f"Instance termination failed: {e}")
+        except (ClientError, WaiterError) as e:
+            if not_found(e):
+                print(f"ℹ️ Instance {instance_id} does not exist")
+                destroyed_info["Status"].append("Instance already gone")
+            else:
+                print(f"⚠️ Could not terminate instance {instance_id}: {e}")
+                destroyed_info["Status"].append(f"Instance termination failed: {e}")
     else:
         destroyed_info["Status"].append("Instance skipped")
 
@@ -61,8 +70,12 @@ def destroy_resource(entry):
             print(f"✅ Security Group {sg_id} deleted")
             destroyed_info["Status"].append("SG deleted")
         except ClientError as e:
-            print(f"⚠️ Could not delete SG {sg_id}: {e}")
-            destroyed_info["Status"].append(f"SG deletion failed: {e}")
+            if not_found(e):
+                print(f"ℹ️ Security Group {sg_id} does not exist")
+                destroyed_info["Status"].append("SG already gone")
+            else:
+                print(f"⚠️ Could not delete SG {sg_id}: {e}")
+                destroyed_info["Status"].append(f"SG deletion failed: {e}")
     else:
         destroyed_info["Status"].append("SG skipped")
 
@@ -75,8 +88,12 @@ def destroy_resource(entry):
             print(f"✅ Key Pair {key_name} and local key file deleted")
             destroyed_info["Status"].append("Key deleted")
         except ClientError as e:
-            print(f"⚠️ Could not delete key {key_name}: {e}")
-            destroyed_info["Status"].append(f"Key deletion failed: {e}")
+            if not_found(e):
+                print(f"ℹ️ Key Pair {key_name} does not exist")
+                destroyed_info["Status"].append("Key already gone")
+            else:
+                print(f"⚠️ Could not delete key {key_name}: {e}")
+                destroyed_info["Status"].append(f"Key deletion failed: {e}")
     else:
         destroyed_info["Status"].append("Key skipped")
 
@@ -103,11 +120,8 @@ def display_destroy_summary(destroyed_entries):
     print(tabulate(table_data, headers=headers, tablefmt="grid"))
 
 
-def main():
-    resources = load_resources()
-    if not resources:
-        return
-
+def destroy(resources):
+    """Destroy every entry of deployed_resources.json; returns the destroy summary"""
     destroyed_entries = []
     for entry in resources:
         destroyed_info = destroy_resource(entry)
@@ -116,8 +130,18 @@ def main():
     display_destroy_summary(destroyed_entries)
 
     # Optionally, clear the resources file
-    os.remove(RESOURCES_FILE)
-    print(f"\n🗑️ {RESOURCES_FILE} cleared. Cleanup complete!")
+    if os.path.exists(RESOURCES_FILE):
+        os.remove(RESOURCES_FILE)
+        print(f"\n🗑️ {RESOURCES_FILE} cleared. Cleanup complete!")
+    return destroyed_entries
+
+
+def main():
+    resources = load_resources()
+    if not resources:
+        return
+
+    destroy(resources)
 
 
 if __name__ == "__main__":
@@ -205,8 +205,8 @@ tr:nth-child(even) {{ background-color: #f2f2f2; }}
     path.write_text("\n".join(html), encoding="utf-8")
 
 # ==== MAIN ====
-async def main():
-    regions = load_regions()
+async def fetch(regions):
+    """Fetch AMIs and VM types of `regions`, save them as JSON & HTML; returns (amis by region/owner, VM types)"""
     session = aioboto3.Session()
     semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
 
@@ -232,6 +232,10 @@ async def main():
     save_json(OUTPUT_VM_JSON, vm_results)
     generate_static_html_vms(vm_results, OUTPUT_VM_HTML)
     print(f"✅ VM JSON & HTML saved -> {OUTPUT_VM_JSON}, {OUTPUT_VM_HTML}")
+    return organized_amis, vm_results
+
+async def main():
+    await fetch(load_regions())
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,11 +1,18 @@
 # fetch_enabled_regions
-import boto3
+import argparse
 import json
+import os
+import sys
 from pathlib import Path
 from flask import Flask, request, jsonify, send_from_directory
 import threading
 import webbrowser
 
+# mcbench lives at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from mcbench import trace
+from mcbench.latency import by_latency, describe, latency_key, region_latencies
+
 # ==== CONFIG PATHS ====
 OUTPUT_DIR = Path(".")
 ALL_REGIONS_FILE = OUTPUT_DIR / "all_regions.json"
@@ -15,6 +22,7 @@ REGIONS_HTML_FILE = OUTPUT_DIR / "regions.html"
 # ==== REGION FETCHER ====
 def fetch_enabled_regions():
     """Fetch only AWS regions that are enabled for this account"""
+    import boto3
     ec2 = boto3.client("ec2")
     response = ec2.describe_regions(AllRegions=True)
     enabled = [
@@ -29,10 +37,12 @@ def save_json(path, data):
     with open(path, "w") as f:
         json.dump(data, f, indent=2)
 
-def generate_html(regions):
-    """Generate a simple HTML page with checkboxes to select regions """
+def generate_html(regions, latencies):
+    """Generate a simple HTML page with checkboxes to select regions, each with its latency from here"""
     checkboxes = "".join(
-        f'<label><input type="checkbox" value="{r}"> {r}</label><br>'
+        f'<div data-region="{r}" data-latency="{latency_key(latencies[r])}">'
+        f'<label><input type="checkbox" value="{r}"> {r}</label>'
+        f' <span class="latency">{describe(latencies[r])}</span></div>'
         for r in regions
     )
     html_content = f"""
@@ -51,14 +61,27 @@ def generate_html(regions):
                 font-size: 14px;
             }}
             button:hover {{ background-color: #005f99; }}
+            .latency {{ color: #666; font-size: 12px; }}
         </style>
     </head>
     <body>
         <h2>🌎 Select Enabled AWS Regions</h2>
-        <p>Only regions enabled in your AWS account are shown.</p>
-        {checkboxes}
+        <p>Only regions enabled in your AWS account are shown, with the TCP connect and TLS
+        handshake time from this machine to each region's EC2 endpoint.</p>
+        <p>Sort by: <a href="#" onclick="sortRegions(false); return false">name</a> |
+        <a href="#" onclick="sortRegions(true); return false">latency</a></p>
+        <div id="regions">{checkboxes}</div>
         <br><button onclick="saveSelection()">Save Selection</button>
         <script>
+        function sortRegions(byLatency) {{
+            const list = document.getElementById('regions');
+            Array.from(list.children)
+                .sort((a, b) => byLatency
+                    ? parseFloat(a.dataset.latency) - parseFloat(b.dataset.latency)
+                    : a.dataset.region.localeCompare(b.dataset.region))
+                .forEach(item => list.appendChild(item));
+        }}
+
         function saveSelection() {{
             let selected = [];
             document.querySelectorAll('input[type=checkbox]:checked')
@@ -88,13 +111,18 @@ def generate_html(regions):
         f.write(html_content)
 
 # ==== FLASK APP ====
-def launch_selector(port=5000, open_browser=True):
+def launch_selector(port=5000, open_browser=True, sort_by_latency=False):
     """Start a small Flask app that lets the user select enabled regions"""
     app = Flask(__name__)
 
-    regions = fetch_enabled_regions()
-    save_json(ALL_REGIONS_FILE, regions)
-    generate_html(regions)
+    trace.instrument_boto3()
+    with trace.stage("fetch", cloud="aws", operation="describe-regions"):
+        regions = fetch_enabled_regions()
+        save_json(ALL_REGIONS_FILE, regions)
+        with trace.span("latency", cloud="aws", operation="probe"):
+            latencies = region_latencies("aws", regions)
+        with trace.span("render", operation="regions.html"):
+            generate_html(by_latency(latencies) if sort_by_latency else regions, latencies)
 
     @app.route("/")
     def serve_html():
@@ -126,5 +154,9 @@ def launch_selector(port=5000, open_browser=True):
 
 # ==== MAIN ====
 if __name__ == "__main__":
-    thread = launch_selector()
+    parser = argparse.ArgumentParser(description="Pick the AWS regions to benchmark")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--sort-by-latency", action="store_true", help="list the fastest regions first")
+    args = parser.parse_args()
+    thread = launch_selector(args.port, sort_by_latency=args.sort_by_latency)
     thread.join()
@@ -4,14 +4,20 @@ AWS Deployment Config Generator (Interactive)
 ---------------------------------------------
 Reads regions from 'select_regions.json', gathers user inputs for
 each region, and shows a tabular summary before saving to 'config.json'.
+With --ami-id (and --yes) nothing is asked, so it can be scripted:
+
+    python selector.py --ami-id us-east-1=ami-0abc --ami-id eu-west-1=ami-0def --instance-type t3.micro --yes
 """
 
+import argparse
 import json
 from pathlib import Path
 from tabulate import tabulate
 
 SELECTED_REGIONS_FILE = Path("selected_regions.json")
 OUTPUT_FILE = Path("config.json")
+DEFAULT_INSTANCE_TYPE = "t2.micro"
+ARCHITECTURES = ["x86_64", "arm64"]
 
 
 def load_regions():
@@ -36,14 +42,18 @@ def ask_user_for_region_config(region):
     print(f"\n🗺️  Configuring deployment for region: {region}")
     ami_name = input("   → AMI Name (e.g., Ubuntu Server 24.04 LTS): ").strip()
     ami_id = input("   → AMI ID (region-specific): ").strip()
-    instance_type = input("   → Instance Type (default: t2.micro): ").strip() or "t2.micro"
+    instance_type = input(f"   → Instance Type (default: {DEFAULT_INSTANCE_TYPE}): ").strip() or DEFAULT_INSTANCE_TYPE
 
     while True:
         arch = input("   → Architecture [x86_64 / arm64] (default: x86_64): ").strip().lower() or "x86_64"
-        if arch in ["x86_64", "arm64"]:
+        if arch in ARCHITECTURES:
             break
         print("     ⚠️ Please choose either 'x86_64' or 'arm64'")
 
+    return region_config(region, ami_name, ami_id, instance_type, arch)
+
+
+def region_config(region, ami_name, ami_id, instance_type=DEFAULT_INSTANCE_TYPE, arch="x86_64"):
     return {
         "region": region,
         "ami_name": ami_name,
@@ -53,6 +63,29 @@ def ask_user_for_region_config(region):
     }
 
 
+def ami_ids_for(regions, values):
+    """Map each region to its AMI from --ami-id values: REGION=AMI_ID pairs, or one AMI ID for every region"""
+    ami_ids = {}
+    for value in values:
+        region, sep, ami_id = value.rpartition("=")
+        if sep:
+            ami_ids[region] = ami_id
+        else:
+            ami_ids.update(dict.fromkeys(regions, ami_id))
+    missing = [r for r in regions if r not in ami_ids]
+    if missing:
+        raise ValueError(f"No AMI ID given for {', '.join(missing)} (AMI IDs are region-specific)")
+    return {r: ami_ids[r] for r in regions}
+
+
+def save_configs(configs):
+    with open(OUTPUT_FILE, "w") as f:
+        json.dump(configs, f, indent=4)
+
+    print(f"\n✅ Configuration saved to {OUTPUT_FILE.resolve()}")
+    print("   You can now use this file to deploy region-specific AMIs.")
+
+
 def display_summary(configs):
     """Display a table summarizing all region configurations"""
     table_data = [
@@ -71,31 +104,43 @@ def display_summary(configs):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Write config.json for the regions in selected_regions.json")
+    parser.add_argument("--ami-id", action="append", metavar="[REGION=]AMI_ID",
+                        help="AMI per region (repeat it), or one AMI ID for every region; skips the questions")
+    parser.add_argument("--ami-name", default="", help="label for the AMI, e.g. 'Ubuntu Server 24.04 LTS'")
+    parser.add_argument("--instance-type", default=DEFAULT_INSTANCE_TYPE)
+    parser.add_argument("--architecture", choices=ARCHITECTURES, default="x86_64")
+    parser.add_argument("--yes", action="store_true", help="save without asking for confirmation")
+    args = parser.parse_args()
+
     print("🚀 AWS Deployment Config Generator\n")
 
     regions = load_regions()
     print(f"📦 Loaded {len(regions)} regions: {', '.join(regions)}")
 
-    configs = []
-    for region in regions:
-        region_config = ask_user_for_region_config(region)
-        configs.append(region_config)
+    if args.ami_id:
+        try:
+            ami_ids = ami_ids_for(regions, args.ami_id)
+        except ValueError as e:
+            print(f"❌ {e}")
+            exit(1)
+        configs = [region_config(r, args.ami_name, ami_ids[r], args.instance_type, args.architecture)
+                   for r in regions]
+    else:
+        configs = [ask_user_for_region_config(region) for region in regions]
 
     # Show tabular summary
     display_summary(configs)
 
     # Ask for confirmation
-    confirm = input("\n💾 Save this configuration to config.json? [Y/n]: ").strip().lower()
-    if confirm not in ["", "y", "yes"]:
-        print("❌ Operation cancelled. Nothing was saved.")
-        return
+    if not args.yes:
+        confirm = input("\n💾 Save this configuration to config.json? [Y/n]: ").strip().lower()
+        if confirm not in ["", "y", "yes"]:
+            print("❌ Operation cancelled. Nothing was saved.")
+            return
 
     # Save the combined configuration
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(configs, f, indent=4)
-
-    print(f"\n✅ Configuration saved to {OUTPUT_FILE.resolve()}")
-    print("   You can now use this file to deploy region-specific AMIs.")
+    save_configs(configs)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,6 @@
+"""
+mcbench - multi-cloud benchmark orchestration.
+
+Runs the existing Azure, AWS and GCP deployment code side by side on one
+asyncio event loop and writes every result in one normalized schema.
+"""
@@ -0,0 +1,3 @@
+from mcbench.cli import main
+
+main()
@@ -0,0 +1,33 @@
+"""
+Loading the per-cloud scripts.
+
+The cloud folders are plain script directories ("Azure Benchmark",
+"aws-vm-benchmark/completed-ones", "GCP-VM-Benchmark") whose names and file
+names are not importable, so they are loaded by path. Each folder is put on
+sys.path so their own sibling imports (e.g. `import gcp_client`) still work.
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+AZURE_DIR = REPO_ROOT / "Azure Benchmark"
+AWS_DIR = REPO_ROOT / "aws-vm-benchmark" / "completed-ones"
+GCP_DIR = REPO_ROOT / "GCP-VM-Benchmark"
+
+
+def load_script(directory, filename, module_name):
+    """Import `directory/filename` as `module_name` (cached in sys.modules)"""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    if str(directory) not in sys.path:
+        sys.path.insert(0, str(directory))
+    spec = importlib.util.spec_from_file_location(module_name, directory / filename)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    return module
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+In-VM benchmark agent.
+
+Self-contained (standard library only, Python 3.7+) so it can be shipped to
+a fresh VM through cloud-init / user-data and run as-is; see
+mcbench/userdata.py. Every test runs for a fixed duration so results from
+differently sized VMs are comparable and a run's length is predictable.
+
+- cpu:     integer and float loops on one core, then the integer loop on
+           1, 2, 4 ... N processes to show multi-core scaling
+- memory:  large buffer copies (memcpy bandwidth)
+- disk:    sequential write/read with 1 MiB blocks, random 4 KiB read/write
+           IOPS (O_DIRECT when the filesystem supports it)
+- network: loopback TCP throughput and round-trip latency
+
+--mesh-server / --mesh-client test the network between two VMs instead
+(see mcbench/mesh.py).
+
+With --push-url the result is also POSTed to the run's ingest endpoint
+(mcbench/ingest.py), retrying with exponential backoff.
+
+Runs locally on any Linux box:
+
+    python3 mcbench/agent.py --duration 2 --tests cpu,memory
+"""
+import argparse
+import json
+import math
+import mmap
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+
+AGENT_VERSION = 1
+TESTS = ("cpu", "memory", "disk", "network")
+MIB = 1024 * 1024
+BLOCK = 4096
+PUSH_ATTEMPTS = 8
+
+
+def rounded(value, digits=4):
+    """Keep the JSON compact: a few significant digits are plenty"""
+    return float(f"{value:.{digits}g}")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+# ---------- CPU ----------
+
+def int_work(duration):
+    """Integer ops (LCG steps) completed in `duration` seconds"""
+    deadline = time.perf_counter() + duration
+    ops, x = 0, 1
+    while time.perf_counter() < deadline:
+        for _ in range(10000):
+            x = (x * 1103515245 + 12345) & 0x7FFFFFFF
+        ops += 10000
+    return ops
+
+
+def float_work(duration):
+    deadline = time.perf_counter() + duration
+    ops, x = 0, 1.5
+    while time.perf_counter() < deadline:
+        for _ in range(10000):
+            x = math.sqrt(x * 1.000001 + 0.5)
+        ops += 10000
+    return ops
+
+
+def worker_counts(cpus):
+    counts, n = [], 1
+    while n < cpus:
+        counts.append(n)
+        n *= 2
+    return counts + [cpus]
+
+
+def cpu_test(duration):
+    # The integer and float runs share the budget with the scaling runs
+    counts = worker_counts(os.cpu_count() or 1)
+    slot = duration / (2 + len(counts))
+    single_int = int_work(slot) / slot
+    single_float = float_work(slot) / slot
+
+    scaling = []
+    context = multiprocessing.get_context("fork") if hasattr(os, "fork") else multiprocessing
+    for workers in counts:
+        with context.Pool(workers) as pool:
+            total = sum(pool.map(int_work, [slot] * workers)) / slot
+        scaling.append({
+            "workers": workers,
+            "int_ops_s": rounded(total),
+            "efficiency": rounded(total / (workers * single_int), 3),
+        })
+
+    return {
+        "int_ops_s": rounded(single_int),
+        "float_ops_s": rounded(single_float),
+        "scaling": scaling,
+    }
+
+
+# ---------- Memory ----------
+
+def memory_test(duration, buffer_mb=256):
+    size = buffer_mb * MIB
+    src = bytearray(os.urandom(MIB)) * buffer_mb
+    dst = bytearray(size)
+    copies, deadline = 0, time.perf_counter() + duration
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        dst[:] = src
+        copies += 1
+    elapsed = time.perf_counter() - started
+    return {"buffer_mb": buffer_mb, "copy_gib_s": rounded(copies * size / elapsed / 1024 ** 3)}
+
+
+# ---------- Disk ----------
+
+def open_direct(path, flags):
+    """Open with O_DIRECT so the page cache does not inflate results; fall back if unsupported"""
+    direct = getattr(os, "O_DIRECT", 0)
+    if direct:
+        try:
+            return os.open(path, flags | direct), True
+        except OSError:
+            pass
+    return os.open(path, flags), False
+
+
+def drop_cache(fd):
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def random_io(path, size, duration, write):
+    fd, direct = open_direct(path, os.O_RDWR if write else os.O_RDONLY)
+    buf = mmap.mmap(-1, BLOCK)  # page aligned, as O_DIRECT requires
+    blocks = size // BLOCK
+    ops, deadline = 0, time.perf_counter() + duration
+    started = time.perf_counter()
+    try:
+        if not direct:
+            drop_cache(fd)
+        while time.perf_counter() < deadline:
+            offset = random.randrange(blocks) * BLOCK
+            if write:
+                os.pwritev(fd, [buf], offset)
+            else:
+                os.preadv(fd, [buf], offset)
+            ops += 1
+        if write:
+            os.fsync(fd)
+        elapsed = time.perf_counter() - started
+    finally:
+        os.close(fd)
+        buf.close()
+    return rounded(ops / elapsed), direct
+
+
+def disk_test(duration, directory, size_mb=512):
+    path = os.path.join(directory, f"mcbench-disk-{os.getpid()}.bin")
+    chunk = os.urandom(MIB)
+    slot = duration / 4
+    try:
+        # Sequential write: up to size_mb or the time slot, then fsync so it is on disk
+        written, started = 0, time.perf_counter()
+        with open(path, "wb", buffering=0) as f:
+            while written < size_mb and time.perf_counter() - started < slot:
+                f.write(chunk)
+                written += 1
+            os.fsync(f.fileno())
+        write_mib_s = written / (time.perf_counter() - started)
+        # Random I/O needs a file of the full size even if the write slot ended early
+        if written < size_mb:
+            with open(path, "r+b") as f:
+                f.truncate(size_mb * MIB)
+
+        fd = os.open(path, os.O_RDONLY)
+        drop_cache(fd)
+        read, started = 0, time.perf_counter()
+        while time.perf_counter() - started < slot and os.read(fd, MIB):
+            read += 1
+        os.close(fd)
+        read_mib_s = read / (time.perf_counter() - started)
+
+        read_iops, direct = random_io(path, size_mb * MIB, slot, write=False)
+        write_iops, _ = random_io(path, size_mb * MIB, slot, write=True)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+    return {
+        "file_mb": size_mb,
+        "seq_write_mib_s": rounded(write_mib_s),
+        "seq_read_mib_s": rounded(read_mib_s),
+        "rand_read_iops": read_iops,
+        "rand_write_iops": write_iops,
+        "direct_io": direct,
+    }
+
+
+# ---------- Network ----------
+
+def serve_once(server, handler):
+    def run():
+        conn, _ = server.accept()
+        with conn:
+            handler(conn)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def sink(conn):
+    buf = bytearray(256 * 1024)
+    while conn.recv_into(buf):
+        pass
+
+
+def echo(conn):
+    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    while True:
+        data = conn.recv(1)
+        if not data:
+            return
+        conn.sendall(data)
+
+
+def loopback_server():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    return server
+
+
+def network_test(duration):
+    slot = duration / 2
+
+    with loopback_server() as server:
+        thread = serve_once(server, sink)
+        payload = b"\0" * (128 * 1024)
+        sent, started = 0, time.perf_counter()
+        with socket.create_connection(server.getsockname()) as client:
+            while time.perf_counter() - started < slot:
+                client.sendall(payload)
+                sent += len(payload)
+        elapsed = time.perf_counter() - started
+        thread.join()
+
+    with loopback_server() as server:
+        thread = serve_once(server, echo)
+        rtts, deadline = [], time.perf_counter() + slot
+        with socket.create_connection(server.getsockname()) as client:
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                client.sendall(b"x")
+                client.recv(1)
+                rtts.append(time.perf_counter() - t0)
+        thread.join()
+    rtts.sort()
+
+    return {
+        "loopback_gbit_s": rounded(sent * 8 / elapsed / 1e9),
+        "rtt_p50_us": rounded(percentile(rtts, 50) * 1e6),
+        "rtt_p99_us": rounded(percentile(rtts, 99) * 1e6),
+    }
+
+
+# ---------- Mesh (VM to VM) ----------
+
+MESH_MODES = {b"E": echo, b"S": sink}
+
+
+def handle_mesh(conn):
+    with conn:
+        handler = MESH_MODES.get(conn.recv(1))
+        if handler:
+            handler(conn)
+
+
+def mesh_server(port, idle_timeout):
+    """Echo/sink connections from other VMs until none arrives for `idle_timeout` seconds"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("0.0.0.0", port))
+    server.listen(8)
+    server.settimeout(idle_timeout)
+    with server:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                return
+            conn.settimeout(None)
+            threading.Thread(target=handle_mesh, args=(conn,), daemon=True).start()
+
+
+def mesh_client(host, port, duration):
+    """Round-trip time, then one-way bulk throughput, from this VM to a mesh server"""
+    slot = duration / 2
+
+    rtts = []
+    with socket.create_connection((host, port), timeout=10) as conn:
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn.sendall(b"E")
+        deadline = time.perf_counter() + slot
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            conn.sendall(b"x")
+            if not conn.recv(1):
+                raise ConnectionError("mesh server closed the connection")
+            rtts.append(time.perf_counter() - t0)
+    rtts.sort()
+
+    payload = b"\0" * (128 * 1024)
+    with socket.create_connection((host, port), timeout=10) as conn:
+        conn.sendall(b"S")
+        sent, started = 0, time.perf_counter()
+        while time.perf_counter() - started < slot:
+            conn.sendall(payload)
+            sent += len(payload)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "gbit_s": rounded(sent * 8 / elapsed / 1e9),
+        "rtt_p50_us": rounded(percentile(rtts, 50) * 1e6),
+        "rtt_p99_us": rounded(percentile(rtts, 99) * 1e6),
+        "rtt_samples": len(rtts),
+    }
+
+
+# ---------- Runner ----------
+
+def host_info():
+    info = {"cpus": os.cpu_count(), "python": platform.python_version(),
+            "kernel": platform.release(), "machine": platform.machine()}
+    try:
+        with open("/proc/meminfo") as f:
+            info["mem_mb"] = int(f.readline().split()[1]) // 1024
+        with open("/proc/cpuinfo") as f:
+            info["cpu_model"] = next((l.split(":", 1)[1].strip() for l in f if l.startswith("model name")), None)
+    except OSError:
+        pass
+    return info
+
+
+def run_tests(tests, duration, disk_dir, disk_size_mb, memory_mb, tags=None):
+    """Run the selected tests; a failing test is reported, not fatal"""
+    result = {
+        "agent_version": AGENT_VERSION,
+        "tags": tags or {},
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "duration_per_test_sec": duration,
+        "host": host_info(),
+    }
+    runners = {
+        "cpu": lambda: cpu_test(duration),
+        "memory": lambda: memory_test(duration, memory_mb),
+        "disk": lambda: disk_test(duration, disk_dir, disk_size_mb),
+        "network": lambda: network_test(duration),
+    }
+    for name in tests:
+        started = time.perf_counter()
+        try:
+            result[name] = runners[name]()
+        except Exception as e:
+            result[name] = {"error": f"{type(e).__name__}: {e}"}
+        result[name]["elapsed_sec"] = rounded(time.perf_counter() - started, 3)
+    result["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    return result
+
+
+def push_result(line, url, token, attempts=PUSH_ATTEMPTS):
+    """POST the result; the endpoint dedupes, so retrying after a lost response is safe"""
+    request = urllib.request.Request(url, data=line.encode(), method="POST", headers={
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+    })
+    for attempt in range(attempts):
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            if e.code in (400, 401, 404, 413):
+                raise  # retrying cannot fix these
+        except OSError:
+            pass
+        time.sleep(min(60, 2 ** attempt) + random.random())
+    raise RuntimeError(f"could not push result to {url} after {attempts} attempts")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark this machine's CPU, memory, disk and loopback network")
+    parser.add_argument("--tests", default=",".join(TESTS), help=f"comma separated subset of {','.join(TESTS)}")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per test")
+    parser.add_argument("--disk-dir", default="/var/tmp")
+    parser.add_argument("--disk-size-mb", type=int, default=512)
+    parser.add_argument("--memory-mb", type=int, default=256)
+    parser.add_argument("--tag", action="append", default=[], metavar="KEY=VALUE",
+                        help="copied into the result, e.g. run_id=... job_id=...")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    parser.add_argument("--push-url", help="POST the result to this ingest endpoint")
+    parser.add_argument("--token", help="bearer token for --push-url")
+    parser.add_argument("--mesh-server", type=int, metavar="PORT",
+                        help="serve mesh tests for other VMs instead of benchmarking")
+    parser.add_argument("--mesh-idle-timeout", type=float, default=900,
+                        help="seconds without a mesh connection before --mesh-server exits")
+    parser.add_argument("--mesh-client", metavar="HOST:PORT",
+                        help="measure RTT and throughput to another VM's --mesh-server")
+    args = parser.parse_args(argv)
+
+    if args.mesh_server:
+        mesh_server(args.mesh_server, args.mesh_idle_timeout)
+        return None
+    if args.mesh_client:
+        host, port = args.mesh_client.rsplit(":", 1)
+        result = mesh_client(host, int(port), args.duration)
+        print(json.dumps(result, separators=(",", ":"), sort_keys=True))
+        return result
+
+    tests = [t.strip() for t in args.tests.split(",") if t.strip()]
+    unknown = set(tests) - set(TESTS)
+    if unknown:
+        parser.error(f"unknown test(s): {', '.join(sorted(unknown))}")
+    tags = dict(tag.split("=", 1) for tag in args.tag)
+
+    result = run_tests(tests, args.duration, args.disk_dir, args.disk_size_mb, args.memory_mb, tags)
+    line = json.dumps(result, separators=(",", ":"), sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(line + "\n")
+    print(line)
+    if args.push_url:
+        push_result(line, args.push_url, args.token)
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+One command line for the per-cloud scripts.
+
+    python -m mcbench <cloud> <stage> [<stage> ...] [options]
+
+Stages run in this order, whichever order they are given in:
+
+- fetch    refresh the cloud's catalog (regions, VM sizes, images)
+- select   choose regions, size and image (the scripts' prompts and region
+           pages, as flags)
+- deploy   one VM per selected region
+- bench    SSH/cloud-init readiness of every VM, then --command/--script
+- destroy  delete what deploy created
+- report   table of provisioning times, plus the cloud's chart
+
+Stages given together run in one process and hand their results to the
+next in memory. The scripts' files (selected_regions.json, config.json,
+deployment_info.json, deployment_config.json, the deployment logs) are
+still written, so a stage can be run on its own later, but they are read
+only when the stage producing them is not part of the same command.
+Nothing is asked on stdin, so runs can be batched and scripted. If a stage
+fails, the rest are skipped except destroy, so VMs are not left running.
+
+Commands run in the cloud's script folder, where the scripts keep their
+files. Only the chosen cloud's module is imported, and the cloud SDKs only
+by the stages that call them.
+
+    python -m mcbench aws select deploy bench report destroy --regions us-east-1,eu-west-1 \\
+        --image us-east-1=ami-0abc --image eu-west-1=ami-0def --size t3.micro --command "uname -a"
+    python -m mcbench azure fetch select --regions eastus,westeurope --size Standard_B1s
+    python -m mcbench azure deploy --subscription 1
+    python -m mcbench gcp select deploy report --regions us-central1,europe-west1 --size e2-micro
+"""
+import argparse
+import os
+import sys
+import traceback
+from mcbench import trace
+from mcbench.commands import STAGES, get_commands
+from mcbench.commands.base import StageError
+
+
+def region_list(value):
+    return [r.strip() for r in value.split(",") if r.strip()]
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("stages", nargs="+", choices=STAGES, metavar="STAGE", help=" | ".join(STAGES))
+    common.add_argument("--regions", type=region_list, help="comma-separated regions (select, fetch)")
+    common.add_argument("--size", help="VM size / instance type / machine type (select)")
+    common.add_argument("--trace", metavar="PREFIX", help="write spans to PREFIX.trace.json and PREFIX.otlp.json")
+    common.add_argument("--profile", metavar="DIR", help="with --trace, also cProfile each stage into DIR")
+    bench = common.add_argument_group("bench")
+    what = bench.add_mutually_exclusive_group()
+    what.add_argument("--command", help="run on every VM after the readiness probe")
+    what.add_argument("--script", help="local script file, run on every VM with `sh -s`")
+    bench.add_argument("--concurrency", type=int, help="SSH sessions at a time")
+    bench.add_argument("--ready-timeout", type=int, help="seconds to wait for each VM to become ready")
+
+    parser = argparse.ArgumentParser(prog="mcbench", description="Fetch, select, deploy, bench, destroy and "
+                                     "report on one cloud, as one command")
+    clouds = parser.add_subparsers(dest="cloud", required=True)
+
+    aws = clouds.add_parser("aws", parents=[common], help="scripts in aws-vm-benchmark/completed-ones")
+    aws.add_argument("--image", action="append", metavar="[REGION=]AMI_ID",
+                     help="AMI per region (repeat it), or one AMI ID for every region (select)")
+    aws.add_argument("--ami-name", default="", help="label for the AMI (select)")
+    aws.add_argument("--architecture", choices=["x86_64", "arm64"], default="x86_64", help="AMI architecture (select)")
+    aws.add_argument("--resume", action="store_true", help="continue a crashed deploy from its journal")
+
+    azure = clouds.add_parser("azure", parents=[common], help="scripts in 'Azure Benchmark'")
+    azure.add_argument("--image", help="OS image name (select)")
+    azure.add_argument("--subscription", help="option number or ID (deploy, destroy; if there are several)")
+    azure.add_argument("--resume", action="store_true", help="continue a crashed deploy from its journal")
+
+    gcp = clouds.add_parser("gcp", parents=[common], help="scripts in GCP-VM-Benchmark")
+    gcp.add_argument("--image", help="image family, e.g. debian-12, ubuntu-2204-lts (select)")
+    gcp.add_argument("--max-concurrency", type=int, help="creates/deletes in flight (deploy, destroy)")
+    gcp.add_argument("--gcp-user", help="SSH user (bench; default: local user)")
+    gcp.add_argument("--gcp-key", help="SSH key (bench; default: the key `gcloud compute ssh` installs)")
+    return parser
+
+
+def run_stages(commands, cloud, stages, args):
+    """Run `stages` in STAGES order sharing one context; returns whether all of them succeeded"""
+    ctx, failed = {}, []
+    for stage in [s for s in STAGES if s in stages]:
+        if failed and stage != "destroy":
+            print(f"⏭️ Skipping {cloud} {stage}")
+            continue
+        print(f"\n▶️ {cloud} {stage}")
+        try:
+            with trace.stage(stage, cloud=cloud):
+                getattr(commands, stage)(ctx, args)
+        except StageError as e:
+            print(f"❌ {cloud} {stage}: {e}")
+            failed.append(stage)
+        except Exception:
+            traceback.print_exc()
+            print(f"❌ {cloud} {stage} failed")
+            failed.append(stage)
+    return not failed
+
+
+def main():
+    args = build_parser().parse_args()
+    # Paths on the command line are relative to where it was typed, not to the cloud's folder
+    for name in ("script", "trace", "profile", "gcp_key"):
+        if getattr(args, name, None):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+    if args.trace:
+        trace.enable(args.trace, args.profile)
+
+    commands = get_commands(args.cloud)
+    os.chdir(commands.DIRECTORY)
+    if trace.enabled():
+        commands.instrument()
+    sys.exit(0 if run_stages(commands, args.cloud, args.stages, args) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+The per-cloud stages of the mcbench CLI (see mcbench/cli.py).
+
+Each cloud module wraps that cloud's scripts in the same six stages, every
+one a `stage(ctx, args)` function. `ctx` carries what earlier stages of the
+same command produced (regions, catalog, deploy config, deployed VMs,
+timings), so chained stages hand data over in memory. A cloud's module,
+and through it the cloud's SDK, is imported only when its stages run.
+"""
+import importlib
+
+STAGES = ("fetch", "select", "deploy", "bench", "destroy", "report")
+
+COMMANDS = {
+    "azure": "mcbench.commands.azure",
+    "aws": "mcbench.commands.aws",
+    "gcp": "mcbench.commands.gcp",
+}
+
+
+def get_commands(cloud):
+    return importlib.import_module(COMMANDS[cloud])
@@ -0,0 +1,108 @@
+"""
+AWS stages, on the scripts in aws-vm-benchmark/completed-ones:
+
+- fetch:   enabled regions (select-regions.py), then AMIs and instance
+           types of the selected regions (fetch-region-info.py)
+- select:  selected_regions.json and config.json (selector.py's questions
+           as --regions/--image/--size/--architecture)
+- deploy:  aws-deploy.py          - destroy: aws-destroy.py
+- bench:   readiness and --command over SSH
+- report:  provisioning times and plot-graph.py's chart
+"""
+import asyncio
+from mcbench import trace
+from mcbench._scripts import AWS_DIR, load_script
+from mcbench.commands.base import StageError, bench as bench_targets, read_json, report_timings, selected_regions
+
+DIRECTORY = AWS_DIR
+
+
+def script(filename):
+    name = filename[:-3].replace("-", "_")
+    return load_script(AWS_DIR, filename, name if name.startswith("aws_") else "aws_" + name)
+
+
+def instrument():
+    trace.instrument_boto3()
+
+
+def enabled_regions(ctx):
+    if "enabled_regions" not in ctx:
+        regions_script = script("select-regions.py")
+        ctx["enabled_regions"] = regions_script.fetch_enabled_regions()
+        regions_script.save_json(regions_script.ALL_REGIONS_FILE, ctx["enabled_regions"])
+    return ctx["enabled_regions"]
+
+
+def fetch(ctx, args):
+    print(f"🌎 {len(enabled_regions(ctx))} region(s) enabled for this account")
+    try:
+        regions = selected_regions(ctx, args, script("select-regions.py").SELECTED_REGIONS_FILE)
+    except StageError:
+        print("ℹ️ Select regions (--regions) to also fetch their AMIs and instance types")
+        return
+    _, ctx["catalog"] = asyncio.run(script("fetch-region-info.py").fetch(regions))
+
+
+def select(ctx, args):
+    regions_script = script("select-regions.py")
+    selector = script("selector.py")
+    if not args.regions:
+        raise StageError("Pass --regions")
+    regions = args.regions
+    if "enabled_regions" in ctx:
+        unknown = [r for r in regions if r not in ctx["enabled_regions"]]
+        if unknown:
+            raise StageError(f"Not enabled for this account: {', '.join(unknown)}")
+    regions_script.save_json(regions_script.SELECTED_REGIONS_FILE, regions)
+    ctx["regions"] = regions
+    print(f"🗂️ {len(regions)} region(s) saved to {regions_script.SELECTED_REGIONS_FILE}")
+
+    if not args.image:
+        print("ℹ️ Pass --image [REGION=]AMI_ID to also write config.json")
+        return
+    instance_type = args.size or selector.DEFAULT_INSTANCE_TYPE
+    offered = {c["region"]: {t["InstanceType"] for t in c["instance_types"]} for c in ctx.get("catalog", [])}
+    missing = [r for r in regions if r in offered and offered[r] and instance_type not in offered[r]]
+    if missing:
+        raise StageError(f"{instance_type} is not offered in {', '.join(missing)}")
+    try:
+        ami_ids = selector.ami_ids_for(regions, args.image)
+    except ValueError as e:
+        raise StageError(str(e))
+    configs = [selector.region_config(r, args.ami_name, ami_ids[r], instance_type, args.architecture)
+               for r in regions]
+    selector.display_summary(configs)
+    selector.save_configs(configs)
+    ctx["config"] = configs
+
+
+def deploy(ctx, args):
+    deployer = script("aws-deploy.py")
+    configs = ctx.get("config") or read_json(deployer.CONFIG_FILE, "select")
+    ctx["deployed"], ctx["timings"] = deployer.deploy(configs, args.resume)
+
+
+def bench(ctx, args):
+    from mcbench import ssh
+    bench_targets(ssh.aws_targets(entries=ctx.get("deployed")), args)
+
+
+def destroy(ctx, args):
+    destroyer = script("aws-destroy.py")
+    resources = ctx["deployed"] if "deployed" in ctx else destroyer.load_resources()
+    if not resources:
+        print("⚠️ Nothing to destroy.")
+        return
+    summary = destroyer.destroy(resources)
+    failed = [d for d in summary if any("failed" in status for status in d["Status"])]
+    if failed:
+        raise StageError(f"{len(failed)} region(s) were not fully destroyed; see the summary above")
+
+
+def report(ctx, args):
+    deployer = script("aws-deploy.py")
+    times = ctx.get("timings") or read_json(deployer.TIMES_FILE, "deploy")
+    report_timings("aws", times)
+    if any(t["ElapsedSeconds"] for t in times):
+        script("plot-graph.py").plot(times)
@@ -0,0 +1,127 @@
+"""
+Azure stages, on the scripts in "Azure Benchmark":
+
+- fetch:   regions (fetch_regions.py), then VM sizes and images of the
+           selected regions (fetch_vm_data.py) and their HTML pages
+- select:  JSON-data/selected_regions.json (the region selector page) and
+           deployment_info.json (selector.py's questions as --size/--image)
+- deploy:  deploy_VMs.py          - destroy: cleanup.py
+- bench:   readiness and --command over SSH
+- report:  provisioning times and deploy_VMs.py's chart
+
+--subscription replaces the subscription prompt; it is needed only if the
+account has more than one.
+"""
+import asyncio
+import os
+from mcbench import trace
+from mcbench._scripts import AZURE_DIR, load_script
+from mcbench.commands.base import StageError, bench as bench_targets, read_json, report_timings, selected_regions
+
+DIRECTORY = AZURE_DIR
+DATA_DIR = "JSON-data"
+REGIONS_FILE = os.path.join(DATA_DIR, "regions.json")
+SELECTED_REGIONS_FILE = os.path.join(DATA_DIR, "selected_regions.json")
+# VM details selector.py shows; unknown when the sizes were not fetched
+UNKNOWN_VM_DETAILS = {"vcpus": None, "memory_gb": None, "max_data_disks": None}
+
+
+def script(filename):
+    name = filename[:-3]
+    return load_script(AZURE_DIR, filename, "azure_" + name.lower())
+
+
+def instrument():
+    trace.instrument_azure()
+
+
+def save_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    script("selector.py").save_json(path, data)
+
+
+def fetch(ctx, args):
+    ctx["all_regions"] = [r["name"] for r in script("fetch_regions.py").fetch_regions()]
+    try:
+        regions = selected_regions(ctx, args, SELECTED_REGIONS_FILE)
+    except StageError:
+        print("ℹ️ Select regions (--regions) to also fetch their VM sizes and images")
+        return
+    vm_data = asyncio.run(script("fetch_vm_data.py").fetch_vm_data(regions))
+    if vm_data is None:
+        raise StageError("No subscriptions found in the Azure account")
+    script("generate_html_tables.py").write_region_pages(vm_data)
+    ctx["catalog"] = vm_data
+
+
+def select(ctx, args):
+    selector = script("selector.py")
+    if not args.regions:
+        raise StageError("Pass --regions")
+    regions = args.regions
+    known = ctx.get("all_regions")
+    if known is None and os.path.exists(REGIONS_FILE):
+        known = [r["name"] for r in read_json(REGIONS_FILE, "fetch")]
+    unknown = [r for r in regions if known and r not in known]
+    if unknown:
+        raise StageError(f"Unknown region(s): {', '.join(unknown)}")
+    save_json(SELECTED_REGIONS_FILE, regions)
+    ctx["regions"] = regions
+    print(f"🗂️ {len(regions)} region(s) saved to {SELECTED_REGIONS_FILE}")
+
+    if not args.size:
+        print("ℹ️ Pass --size (and --image) to also write deployment_info.json")
+        return
+    vm_data = ctx.get("catalog")
+    if vm_data is None and os.path.exists(selector.VM_FILE):
+        vm_data = read_json(selector.VM_FILE, "fetch")
+    if vm_data is None:
+        print(f"⚠️ No VM sizes fetched; {args.size} is not checked against the regions")
+        vm_details = UNKNOWN_VM_DETAILS
+    else:
+        vm_details, missing = selector.find_vm_size(vm_data, regions, args.size)
+        if missing:
+            raise StageError(f"VM size '{args.size}' is NOT available in: {', '.join(missing)}")
+    info = selector.deployment_info(args.size, args.image or "", vm_details, regions)
+    save_json(selector.DEPLOYMENT_FILE, info)
+    print(f"💾 Configuration saved to {selector.DEPLOYMENT_FILE}")
+    ctx["config"] = info["vm_config"]
+
+
+def deploy(ctx, args):
+    vm_config = ctx.get("config") or read_json(script("selector.py").DEPLOYMENT_FILE, "select")["vm_config"]
+    subscription_id, entries = script("deploy_VMs.py").deploy(vm_config, args.subscription, args.resume, ask=False)
+    if subscription_id is None:
+        raise StageError("No subscription to deploy to")
+    ctx["subscription_id"] = subscription_id
+    ctx["deployed"] = ctx["timings"] = entries
+
+
+def bench(ctx, args):
+    from mcbench import ssh
+    bench_targets(ssh.azure_targets(entries=ctx.get("deployed")), args)
+
+
+def destroy(ctx, args):
+    cleanup = script("cleanup.py")
+    subscription_id = ctx.get("subscription_id")
+    if subscription_id is None:
+        subscriptions = cleanup.list_subscriptions(cleanup.get_credentials())
+        subscription_id = subscriptions and cleanup.choose_subscription(subscriptions, args.subscription, ask=False)
+        if not subscription_id:
+            raise StageError("No subscription to clean up")
+    cleanup_data = None
+    if "deployed" in ctx:
+        cleanup_data = [{"resource_group": e["resource_group"], "location": e["location"], "vm_name": e["vm_name"]}
+                        for e in ctx["deployed"]]
+    remaining = cleanup.cleanup_resources(subscription_id, cleanup_data)
+    if remaining:
+        raise StageError(f"Could not start deleting {len(remaining)} resource group(s)")
+
+
+def report(ctx, args):
+    deployer = script("deploy_VMs.py")
+    entries = ctx.get("timings") or read_json(deployer.DEPLOYMENT_LOG_FILE, "deploy")
+    report_timings("azure", entries)
+    deployer.plot_deployment_times(entries)
+    print(f"📈 Deployment time graph saved as {deployer.DEPLOYMENT_PLOT_FILE}")
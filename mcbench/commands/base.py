@@ -0,0 +1,69 @@
+import asyncio
+import json
+import os
+import statistics
+from tabulate import tabulate
+
+
+class StageError(ValueError):
+    """A stage cannot run, e.g. its input was neither produced earlier in the command nor saved by an earlier one"""
+
+
+def read_json(path, what):
+    """JSON saved by an earlier command; `what` names the stage that writes it"""
+    if not os.path.exists(path):
+        raise StageError(f"{path} not found: run {what} first")
+    with open(path) as f:
+        return json.load(f)
+
+
+def selected_regions(ctx, args, path, what="select"):
+    """Regions of --regions, else the ones selected earlier in this command, else those saved in `path`"""
+    regions = args.regions or ctx.get("regions")
+    if not regions and os.path.exists(path):
+        regions = read_json(path, what)
+    if not regions:
+        raise StageError(f"No regions: pass --regions or run {what} first")
+    return regions
+
+
+def bench(targets, args):
+    """Time each VM's readiness (TCP 22, SSH banner, cloud-init), then run --command/--script on all of them"""
+    from mcbench import readiness, ssh  # asyncssh, only when benchmarking
+
+    if not targets:
+        raise StageError("No reachable VMs (is there a public IP in the deployment output?)")
+    ready_timeout = args.ready_timeout or readiness.DEFAULT_READY_TIMEOUT
+    print(f"⏱️ Probing {len(targets)} VM(s) (times are seconds from now)...")
+    readiness.print_phases(asyncio.run(readiness.probe_targets(targets, ready_timeout)))
+    if not (args.command or args.script):
+        return
+
+    script = None
+    if args.script:
+        with open(args.script) as f:
+            script = f.read()
+    concurrency = args.concurrency or ssh.DEFAULT_CONCURRENCY
+    print(f"🔌 Running on {len(targets)} VM(s), {concurrency} at a time...")
+    results = asyncio.run(ssh.run_everywhere(targets, args.command, script, concurrency, ready_timeout))
+    ssh.print_results(results)
+    failed = [r for r in results if r["exit_status"] != 0]
+    if failed:
+        raise StageError(f"the command failed on {len(failed)} of {len(results)} VM(s)")
+
+
+def report_timings(cloud, entries):
+    """Provisioning time of every VM of a per-cloud script's output, as history rows see them"""
+    from mcbench.history import legacy_rows  # numpy
+
+    if not entries:
+        raise StageError("No deployments to report on")
+    rows = list(legacy_rows(cloud, entries))
+    print(tabulate([[vm, region, size or "-", "✅" if ok else "❌", "-" if sec is None else f"{sec:.2f}"]
+                    for vm, _, region, size, _, ok, sec, _ in rows],
+                   headers=["VM", "Region", "Size", "Status", "Provision s"], tablefmt="grid"))
+    times = [sec for *_, ok, sec, _ in rows if ok]
+    if times:
+        print(f"📊 {len(times)} of {len(rows)} succeeded; median {statistics.median(times):.2f}s, "
+              f"fastest {min(times):.2f}s, slowest {max(times):.2f}s")
+    return rows
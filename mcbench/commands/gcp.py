@@ -0,0 +1,89 @@
+"""
+GCP stages, on the scripts in GCP-VM-Benchmark:
+
+- fetch:   machine-type catalog of every zone (machine_types.py) and the
+           newest public OS image per family (fetch_os_images.py)
+- select:  deployment_config.json (selector.py's questions as
+           --regions/--size/--image), checked against the catalog
+- deploy:  deploy.py, concurrently  - destroy: delete_VM.py
+- bench:   readiness and --command over SSH
+- report:  provisioning times
+"""
+import asyncio
+import os
+from mcbench import trace
+from mcbench._scripts import GCP_DIR, load_script
+from mcbench.commands.base import StageError, bench as bench_targets, read_json, report_timings
+
+DIRECTORY = GCP_DIR
+DEFAULT_IMAGE = "debian-12"
+DEFAULT_MACHINE_TYPE = "e2-micro"
+
+
+def script(filename, module_name=None):
+    return load_script(GCP_DIR, filename, module_name or "gcp_" + filename[:-3].lower())
+
+
+def machine_types():
+    # The name deploy.py's own imports use, so there is one copy of the module
+    return script("machine_types.py", "machine_types")
+
+
+def instrument():
+    trace.instrument_gcp(script("gcp_client.py", "gcp_client"))
+
+
+def fetch(ctx, args):
+    catalog = machine_types().load_catalog(refresh=True)
+    print(f"📦 {len(catalog['specs'])} machine types across {len(catalog['zones'])} zones")
+    ctx["catalog"] = catalog
+    script("fetch_os_images.py", "fetch_os_images").fetch_all_os_images(latest_only=True)
+
+
+def select(ctx, args):
+    if not args.regions:
+        raise StageError("Pass --regions")
+    machine_type = args.size or DEFAULT_MACHINE_TYPE
+    types = machine_types()
+    catalog = ctx.get("catalog")
+    if catalog is None and os.path.exists(types.CATALOG_FILE):
+        catalog = types.load_catalog()
+    if catalog is None:
+        print(f"⚠️ No machine-type catalog fetched; {machine_type} is not checked against the regions")
+    else:
+        offered = types.build_index(catalog).get(machine_type, {})
+        missing = [r for r in args.regions if r not in offered]
+        if missing:
+            raise StageError(f"{machine_type} is not offered in {', '.join(missing)}")
+    selector = script("selector.py")
+    config = selector.build_config(args.regions, args.image or DEFAULT_IMAGE, machine_type)
+    selector.save_config(config)
+    ctx["regions"] = args.regions
+    ctx["config"] = config
+
+
+def deploy(ctx, args):
+    deployer = script("deploy.py")
+    config = ctx.get("config") or read_json(deployer.CONFIG_FILE, "select")
+    details = asyncio.run(deployer.deploy_vms_concurrent(args.max_concurrency or deployer.MAX_CONCURRENCY, config))
+    ctx["deployed"] = ctx["timings"] = details
+
+
+def bench(ctx, args):
+    from mcbench import ssh
+    bench_targets(ssh.gcp_targets(username=args.gcp_user, key_file=args.gcp_key or ssh.GCP_KEY,
+                                  entries=ctx.get("deployed")), args)
+
+
+def destroy(ctx, args):
+    delete_vm = script("delete_VM.py")
+    details = ctx["deployed"] if "deployed" in ctx else read_json(delete_vm.DEPLOYMENT_DETAILS_FILE, "deploy")
+    _, remaining = asyncio.run(delete_vm.delete_vms_async(
+        max_concurrency=args.max_concurrency or delete_vm.MAX_ZONE_CONCURRENCY, deployment_details=details))
+    if remaining:
+        raise StageError(f"{len(remaining)} VM(s) could not be deleted (listed in {delete_vm.REMAINING_FILE})")
+
+
+def report(ctx, args):
+    details = ctx.get("timings") or read_json(script("deploy.py").DEPLOYMENT_DETAILS_FILE, "deploy")
+    report_timings("gcp", details)
@@ -0,0 +1,279 @@
+"""
+Historical results and regression detection.
+
+Every run's provisioning samples are kept in one SQLite database,
+results/history.sqlite. Samples are indexed by (cloud, region, size,
+succeeded, run_started_at, provision_sec), a covering index: the baseline
+for a cell is read from the index alone, newest first, so comparing a run
+stays a few index range scans per cell no matter how many runs are stored.
+
+A run is compared cell by cell against a rolling baseline: the newest
+`window` successful samples of the same (cloud, region, size) from earlier
+runs. The two samples are tested with a two-sided Mann-Whitney U test
+(no normality assumption, robust to the long tails provisioning times
+have), and a cell is reported as a regression or improvement only if the
+test is significant AND the median moved by at least `min_shift`.
+
+Besides mcbench runs, the per-cloud scripts' own outputs (current and
+archived under their history/ folders) can be ingested:
+
+    python -m mcbench.history ingest
+    python -m mcbench.history compare <run_id> [--window 50]
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import sqlite3
+from datetime import datetime, timezone
+import numpy as np
+from tabulate import tabulate
+from mcbench._scripts import AWS_DIR, AZURE_DIR, GCP_DIR
+from mcbench.results import RESULTS_DIR, load_records
+
+HISTORY_FILE = "history.sqlite"
+HISTORY_DB = os.path.join(RESULTS_DIR, HISTORY_FILE)
+DEFAULT_WINDOW = 50
+DEFAULT_ALPHA = 0.05
+DEFAULT_MIN_SHIFT = 0.10  # ignore significant but tiny (<10%) median shifts
+MIN_SAMPLES = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    run_id TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    run_started_at TEXT NOT NULL,
+    cloud TEXT NOT NULL,
+    region TEXT NOT NULL,
+    size TEXT,
+    image TEXT,
+    succeeded INTEGER NOT NULL,
+    provision_sec REAL,
+    PRIMARY KEY (run_id, job_id)
+);
+CREATE INDEX IF NOT EXISTS samples_by_cell
+    ON samples (cloud, region, size, succeeded, run_started_at, provision_sec);
+"""
+
+# Where the per-cloud scripts leave their outputs, current and archived
+LEGACY_SOURCES = {
+    "azure": [os.path.join(AZURE_DIR, "JSON-data", "deployment_log.json"),
+              os.path.join(AZURE_DIR, "JSON-data", "history", "deployment_log-*.json")],
+    "aws": [os.path.join(AWS_DIR, "deployment_times.json"),
+            os.path.join(AWS_DIR, "history", "deployment_times-*.json")],
+    "gcp": [os.path.join(GCP_DIR, "deployment_details.json"),
+            os.path.join(GCP_DIR, "history", "deployment_details-*.json")],
+}
+
+
+def connect(path=HISTORY_DB):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def to_utc_iso(value, naive_is_local=False):
+    """Normalize a timestamp so text order is time order in the index"""
+    if value is None:
+        return None
+    stamp = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    if stamp.tzinfo is None:
+        stamp = stamp.astimezone() if naive_is_local else stamp.replace(tzinfo=timezone.utc)
+    return stamp.astimezone(timezone.utc).isoformat()
+
+
+def insert_samples(conn, run_id, rows):
+    """rows: (job_id, cloud, region, size, image, succeeded, provision_sec, start_time)"""
+    rows = list(rows)
+    if not rows:
+        return 0
+    # A run keeps its first start time, so re-ingesting a growing file never moves it
+    started = conn.execute("SELECT MIN(run_started_at) FROM samples WHERE run_id = ?", (run_id,)).fetchone()[0]
+    if started is None:
+        starts = [r[7] for r in rows if r[7]]
+        started = min(starts) if starts else to_utc_iso(datetime.now(timezone.utc))
+    with conn:
+        cursor = conn.executemany(
+            "INSERT OR IGNORE INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(run_id, job_id, started, cloud, region, size, image, int(ok), sec)
+             for job_id, cloud, region, size, image, ok, sec, _ in rows],
+        )
+    return cursor.rowcount
+
+
+def record_run(conn, records):
+    """Add an mcbench run's normalized records to the history"""
+    if not records:
+        return 0
+    return insert_samples(conn, records[0]["run_id"], (
+        (r["job_id"], r["cloud"], r["region"], r["size"], r["image"], r["status"] == "succeeded",
+         r.get("provision_sec"), to_utc_iso(r.get("start_time") or r.get("dispatched_at")))
+        for r in records
+    ))
+
+
+def legacy_rows(cloud, entries):
+    """Map one per-cloud script's output file onto history rows"""
+    for e in entries:
+        if cloud == "azure":
+            yield (e["vm_name"], cloud, e["location"], e.get("vm_size"), None, True,
+                   e["duration_seconds"], to_utc_iso(e["start_time_utc"]))
+        elif cloud == "aws":
+            ok = bool(e.get("InstanceId")) and e["ElapsedSeconds"] > 0
+            yield (e.get("InstanceId") or f"{e['Region']}-{e['StartTime']}", cloud, e["Region"],
+                   e.get("InstanceType"), None, ok, e["ElapsedSeconds"] if ok else None,
+                   to_utc_iso(e["StartTime"], naive_is_local=True))
+        else:
+            ok = not e.get("failed")
+            yield (e["vm_name"], cloud, e["region"], e["machine_type"], e.get("image"), ok,
+                   e.get("deployment_time_sec") if ok else None,
+                   to_utc_iso(e.get("start_time") or (e.get("failed_attempts") or [{}])[0].get("submitted_at")))
+
+
+def ingest_legacy(conn, sources=LEGACY_SOURCES):
+    """Ingest the per-cloud scripts' files; each file is one run, keyed by its first start time"""
+    added = 0
+    for cloud, patterns in sources.items():
+        for path in sorted(p for pattern in patterns for p in glob.glob(pattern)):
+            with open(path) as f:
+                entries = json.load(f)
+            rows = list(legacy_rows(cloud, entries))
+            starts = [r[7] for r in rows if r[7]]
+            if not starts:
+                continue
+            added += insert_samples(conn, f"legacy-{cloud}-{min(starts)}", rows)
+    return added
+
+
+def ingest_results(conn, results_dir=RESULTS_DIR):
+    """Ingest every mcbench run in the results directory (already stored runs are skipped)"""
+    added = 0
+    for path in sorted(glob.glob(os.path.join(results_dir, "*.jsonl"))):
+        # Only <run_id>.jsonl: <name>.<kind>.jsonl files (agent, mesh ...) hold other records
+        if "." not in os.path.basename(path)[:-len(".jsonl")]:
+            added += record_run(conn, load_records(path))
+    return added
+
+
+def mann_whitney(x, y):
+    """Two-sided Mann-Whitney U test (normal approximation, tie and continuity corrected).
+
+    Returns (U of x, p-value).
+    """
+    n1, n2 = len(x), len(y)
+    values = np.concatenate([x, y])
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    ranks = (np.cumsum(counts) - (counts - 1) / 2)[inverse]
+    u = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+
+    n = n1 + n2
+    tie_term = (counts ** 3 - counts).sum() / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return u, 1.0
+    z = (abs(u - n1 * n2 / 2) - 0.5) / sigma
+    return u, min(1.0, math.erfc(max(z, 0) / math.sqrt(2)))
+
+
+def baseline(conn, cloud, region, size, before, window=DEFAULT_WINDOW):
+    """Newest `window` successful samples of a cell from runs started before `before`"""
+    rows = conn.execute(
+        "SELECT provision_sec FROM samples INDEXED BY samples_by_cell "
+        "WHERE cloud = ? AND region = ? AND size IS ? AND succeeded = 1 AND run_started_at < ? "
+        "ORDER BY run_started_at DESC LIMIT ?",
+        (cloud, region, size, before, window),
+    ).fetchall()
+    return np.fromiter((r[0] for r in rows), dtype=float, count=len(rows))
+
+
+def compare_run(conn, run_id, window=DEFAULT_WINDOW, alpha=DEFAULT_ALPHA, min_shift=DEFAULT_MIN_SHIFT):
+    """One report row per (cloud, region, size) of the run"""
+    current = {}
+    started = None
+    for cloud, region, size, sec, run_started_at in conn.execute(
+        "SELECT cloud, region, size, provision_sec, run_started_at FROM samples "
+        "WHERE run_id = ? AND succeeded = 1", (run_id,)
+    ):
+        current.setdefault((cloud, region, size), []).append(sec)
+        started = run_started_at
+    if started is None:
+        raise ValueError(f"No successful samples for run '{run_id}' in the history")
+
+    report = []
+    for (cloud, region, size), values in sorted(current.items(), key=lambda kv: tuple(map(str, kv[0]))):
+        new = np.array(values, dtype=float)
+        base = baseline(conn, cloud, region, size, started, window)
+        row = {"cloud": cloud, "region": region, "size": size,
+               "n_new": len(new), "n_baseline": len(base),
+               "median_new": float(np.median(new)),
+               "median_baseline": float(np.median(base)) if len(base) else None,
+               "shift": None, "p_value": None}
+
+        if len(new) < MIN_SAMPLES or len(base) < MIN_SAMPLES:
+            row["verdict"] = "insufficient data"
+        else:
+            row["shift"] = row["median_new"] / row["median_baseline"] - 1 if row["median_baseline"] else 0.0
+            _, row["p_value"] = mann_whitney(new, base)
+            if row["p_value"] < alpha and abs(row["shift"]) >= min_shift:
+                row["verdict"] = "regression" if row["shift"] > 0 else "improvement"
+            else:
+                row["verdict"] = "no change"
+        report.append(row)
+    return report
+
+
+def print_report(run_id, report):
+    icons = {"regression": "🔺", "improvement": "🟢", "no change": "✅", "insufficient data": "❔"}
+    rows = [
+        [r["cloud"], r["region"], r["size"] or "-", r["n_new"], r["n_baseline"],
+         f"{r['median_new']:.2f}",
+         "-" if r["median_baseline"] is None else f"{r['median_baseline']:.2f}",
+         "-" if r["shift"] is None else f"{r['shift']:+.0%}",
+         "-" if r["p_value"] is None else f"{r['p_value']:.3f}",
+         f"{icons[r['verdict']]} {r['verdict']}"]
+        for r in report
+    ]
+    print(f"\n📉 Regression report for {run_id} (median provisioning seconds vs rolling baseline):\n")
+    print(tabulate(rows, headers=["Cloud", "Region", "Size", "n", "n base", "Median", "Base median",
+                                  "Shift", "p", "Verdict"], tablefmt="grid"))
+    regressions = sum(r["verdict"] == "regression" for r in report)
+    print(f"\n{'🔺' if regressions else '✅'} {regressions} regression(s) in {len(report)} cell(s)")
+
+
+def write_report(run_id, report, results_dir=RESULTS_DIR):
+    path = os.path.join(results_dir, f"{run_id}.regressions.json")
+    with open(path, "w") as f:
+        json.dump({"run_id": run_id, "cells": report}, f, indent=2)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep benchmark history and detect provisioning-time regressions")
+    parser.add_argument("--db", default=HISTORY_DB)
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest = sub.add_parser("ingest", help="add mcbench results and the per-cloud scripts' outputs")
+    ingest.add_argument("--results-dir", default=RESULTS_DIR)
+    ingest.add_argument("--no-legacy", action="store_true", help="only ingest mcbench results")
+    compare = sub.add_parser("compare", help="compare a run against its rolling baseline")
+    compare.add_argument("run_id")
+    compare.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="baseline samples per cell")
+    compare.add_argument("--alpha", type=float, default=DEFAULT_ALPHA)
+    compare.add_argument("--min-shift", type=float, default=DEFAULT_MIN_SHIFT)
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == "ingest":
+        added = ingest_results(conn, args.results_dir)
+        if not args.no_legacy:
+            added += ingest_legacy(conn)
+        print(f"📥 Added {added} sample(s) to {args.db}")
+    else:
+        report = compare_run(conn, args.run_id, args.window, args.alpha, args.min_shift)
+        print_report(args.run_id, report)
+        print(f"📁 Report saved to {write_report(args.run_id, report)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Import-time guard for the CLI scripts and Flask apps.
+
+Heavy libraries (the cloud SDKs, matplotlib, numpy, asyncssh) are imported
+by the functions that use them, not at startup. This checks that it stays
+that way: every entry point is imported in a fresh interpreter under
+`python -X importtime`, and it fails if
+
+- the import takes longer than the entry point's budget (median of
+  --repeat cold starts, interpreter startup excluded), or
+- a module of its `forbidden` list was loaded.
+
+The slowest top-level imports from -X importtime are listed so a
+regression points at its cause. Budgets are for a typical laptop; scale
+them on slower machines. Entry points whose own dependencies are missing
+are reported as skipped.
+
+    python -m mcbench.importtime
+    python -m mcbench.importtime gcp/app.py aws/aws-deploy.py --repeat 5 --scale 2
+"""
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from tabulate import tabulate
+from mcbench._scripts import AWS_DIR, AZURE_DIR, GCP_DIR, REPO_ROOT
+
+SDKS = ("boto3", "aioboto3", "azure.identity", "azure.mgmt", "azure.core", "googleapiclient.discovery",
+        "google.auth", "httplib2")
+PLOTTING = ("matplotlib", "seaborn", "pandas")
+HEAVY = SDKS + PLOTTING + ("numpy", "asyncssh")
+DEFAULT_REPEAT = 3
+TOP_IMPORTS = 3
+
+# name: (module, or (directory, script file)), budget in ms, modules that must not be loaded
+ENTRY_POINTS = {
+    "mcbench.cli": ("mcbench.cli", 250, HEAVY + ("flask",)),
+    "mcbench.orchestrator": ("mcbench.orchestrator", 250, HEAVY + ("flask",)),
+    "mcbench.reaper": ("mcbench.reaper", 200, HEAVY + ("flask",)),
+    "mcbench.latency": ("mcbench.latency", 200, HEAVY + ("flask",)),
+    "azure/deploy_VMs.py": ((AZURE_DIR, "deploy_VMs.py"), 200, HEAVY + ("flask",)),
+    "azure/cleanup.py": ((AZURE_DIR, "cleanup.py"), 150, HEAVY + ("flask",)),
+    "azure/app.py": ((AZURE_DIR, "app.py"), 500, HEAVY),
+    "gcp/app.py": ((GCP_DIR, "app.py"), 500, HEAVY),
+    "gcp/deploy.py": ((GCP_DIR, "deploy.py"), 200, HEAVY + ("flask",)),
+    "gcp/delete_VM.py": ((GCP_DIR, "delete_VM.py"), 200, HEAVY + ("flask",)),
+    "aws/aws-deploy.py": ((AWS_DIR, "aws-deploy.py"), 200, HEAVY + ("flask",)),
+    "aws/aws-destroy.py": ((AWS_DIR, "aws-destroy.py"), 150, HEAVY + ("flask",)),
+    "aws/plot-graph.py": ((AWS_DIR, "plot-graph.py"), 100, HEAVY + ("flask",)),
+    "aws/select-regions.py": ((AWS_DIR, "select-regions.py"), 500, HEAVY),
+}
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {repo!r})
+started = time.perf_counter()
+{load}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"ms": elapsed * 1000, "modules": sorted(sys.modules)}}))
+"""
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def child_code(target):
+    if isinstance(target, str):
+        load = f"import importlib; importlib.import_module({target!r})"
+    else:
+        directory, filename = target
+        load = (f"from mcbench._scripts import load_script; "
+                f"load_script(__import__('pathlib').Path({str(directory)!r}), {filename!r}, '_entry_point')")
+    return CHILD.format(repo=str(REPO_ROOT), load=load)
+
+
+def top_imports(stderr, count=TOP_IMPORTS):
+    """Slowest top-level imports as (module, cumulative ms)"""
+    top = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match and not match.group(3):
+            top.append((match.group(4), int(match.group(2)) / 1000))
+    return sorted(top, key=lambda item: -item[1])[:count]
+
+
+def loaded(modules, names):
+    return sorted({name for name in names for m in modules if m == name or m.startswith(name + ".")})
+
+
+def measure(target, repeat=DEFAULT_REPEAT):
+    """{"ms": median import time, "modules": [...], "top": [...]} or {"error": ...}"""
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", child_code(target)],
+                              capture_output=True, text=True, cwd=REPO_ROOT)
+        if proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+        runs.append((json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr))
+    result, stderr = runs[-1]
+    return {"ms": statistics.median(r["ms"] for r, _ in runs), "modules": result["modules"],
+            "top": top_imports(stderr)}
+
+
+def check(names, repeat=DEFAULT_REPEAT, scale=1.0):
+    """Rows for the report and whether every entry point passed"""
+    rows, ok = [], True
+    for name in names:
+        target, budget_ms, forbidden = ENTRY_POINTS[name]
+        result = measure(target, repeat)
+        budget = budget_ms * scale
+        if "error" in result:
+            missing = result["error"].startswith("ModuleNotFoundError")
+            ok = ok and missing
+            rows.append([name, "-", f"{budget:.0f}", "-", "", f"{'⏭️ skipped' if missing else '❌'} {result['error']}"])
+            continue
+        heavy = loaded(result["modules"], forbidden)
+        passed = result["ms"] <= budget and not heavy
+        ok = ok and passed
+        rows.append([name, f"{result['ms']:.0f}", f"{budget:.0f}", ", ".join(heavy) or "-",
+                     ", ".join(f"{m} {ms:.0f}" for m, ms in result["top"]), "✅" if passed else "❌"])
+    return rows, ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import time of every entry point, against budgets")
+    parser.add_argument("entry_points", nargs="*", metavar="ENTRY_POINT",
+                        help=f"default: all of {', '.join(ENTRY_POINTS)}")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="fresh interpreters per entry point")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget (slow machines)")
+    args = parser.parse_args()
+    unknown = [name for name in args.entry_points if name not in ENTRY_POINTS]
+    if unknown:
+        parser.error(f"unknown entry point(s): {', '.join(unknown)}")
+
+    rows, ok = check(args.entry_points or list(ENTRY_POINTS), args.repeat, args.scale)
+    print(tabulate(rows, headers=["Entry point", "Import ms", "Budget ms", "Heavy modules loaded",
+                                  "Slowest imports (ms)", "Status"], tablefmt="grid"))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Push-based collection of in-guest benchmark results.
+
+Instead of SSHing into every VM, the agent on each VM POSTs its JSON result
+to /ingest/<run_id> with the run's bearer token. Each run gets a fresh
+token (results/<run_id>.token, mode 0600) that is handed to its VMs in the
+user data, so one run's VMs cannot write into another run.
+
+Results are deduplicated by the agent's job_id tag, so retries after a
+lost response are harmless, and appended straight to
+results/<run_id>.agent.jsonl. The orchestrator blocks on `wait_for`
+(a condition variable) until every expected job has reported or the
+timeout passes; nothing polls the VMs.
+
+The endpoint can be served three ways:
+- by the orchestrator itself, in-process (spec "ingest" section)
+- inside the Azure or GCP Flask app (blueprint registered at /ingest)
+- standalone: python -m mcbench.ingest --port 8787
+"""
+import argparse
+import hmac
+import os
+import re
+import secrets
+import threading
+import time
+from flask import Blueprint, Flask, abort, jsonify, request
+from werkzeug.serving import make_server
+from mcbench import metrics
+from mcbench.results import AGENT_RESULTS, RESULTS_DIR, ResultsStore
+
+DEFAULT_PORT = 8787
+MAX_BODY_BYTES = 1024 * 1024
+RUN_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def token_path(run_id, results_dir=RESULTS_DIR):
+    return os.path.join(results_dir, f"{run_id}.token")
+
+
+def new_run_token(run_id, results_dir=RESULTS_DIR):
+    """Create the run's ingest token, readable only by the current user"""
+    token = secrets.token_urlsafe(24)
+    os.makedirs(results_dir, exist_ok=True)
+    fd = os.open(token_path(run_id, results_dir), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token)
+    return token
+
+
+class RunInbox:
+    """Agent results received for one run"""
+
+    def __init__(self, run_id, token, results_dir=RESULTS_DIR):
+        self.run_id = run_id
+        self.token = token
+        self.store = ResultsStore(run_id, results_dir, kind=AGENT_RESULTS)
+        # Results already on disk count, so a restarted server still dedupes
+        self.received = {r.get("tags", {}).get("job_id") for r in self.store.records()}
+        self._cond = threading.Condition()
+
+    def authorized(self, header):
+        scheme, _, token = (header or "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), self.token.encode())
+
+    def add(self, result):
+        """Store a result unless its job already reported; returns True if it was new"""
+        job_id = result["tags"]["job_id"]
+        with self._cond:
+            if job_id in self.received:
+                return False
+            result["received_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            self.store.append(result)
+            self.received.add(job_id)
+            self._cond.notify_all()
+        return True
+
+    def wait_for(self, job_ids, timeout):
+        """Block until every job in `job_ids` has reported or `timeout` passes; returns the missing ones"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                missing = set(job_ids) - self.received
+                remaining = deadline - time.monotonic()
+                if not missing or remaining <= 0:
+                    return missing
+                self._cond.wait(remaining)
+
+
+class Ingest:
+    """Inboxes of every run this process accepts results for"""
+
+    def __init__(self, results_dir=RESULTS_DIR):
+        self.results_dir = results_dir
+        self._inboxes = {}
+        self._lock = threading.Lock()
+
+    def open_run(self, run_id, token):
+        with self._lock:
+            inbox = self._inboxes[run_id] = RunInbox(run_id, token, self.results_dir)
+        return inbox
+
+    def inbox(self, run_id):
+        """The run's inbox; runs started by another process are picked up from their token file"""
+        with self._lock:
+            if run_id not in self._inboxes:
+                try:
+                    with open(token_path(run_id, self.results_dir)) as f:
+                        token = f.read().strip()
+                except FileNotFoundError:
+                    return None
+                self._inboxes[run_id] = RunInbox(run_id, token, self.results_dir)
+            return self._inboxes[run_id]
+
+
+def create_blueprint(ingest):
+    bp = Blueprint("ingest", __name__)
+
+    @bp.route("/<run_id>", methods=["POST"])
+    def receive(run_id):
+        if not RUN_ID_PATTERN.match(run_id):
+            abort(404)
+        inbox = ingest.inbox(run_id)
+        if inbox is None:
+            abort(404)
+        if not inbox.authorized(request.headers.get("Authorization")):
+            abort(401)
+        if (request.content_length or 0) > MAX_BODY_BYTES:
+            abort(413)
+
+        result = request.get_json(silent=True)
+        if not isinstance(result, dict) or not isinstance(result.get("tags"), dict) or not result["tags"].get("job_id"):
+            abort(400)
+        if result["tags"].get("run_id", run_id) != run_id:
+            abort(400)
+
+        stored = inbox.add(result)
+        return jsonify({"status": "stored" if stored else "duplicate"}), 201 if stored else 200
+
+    return bp
+
+
+def create_app(ingest):
+    app = Flask(__name__)
+    app.config["MAX_CONTENT_LENGTH"] = MAX_BODY_BYTES
+    app.register_blueprint(create_blueprint(ingest), url_prefix="/ingest")
+    app.register_blueprint(metrics.create_blueprint())
+    return app
+
+
+def serve_in_background(ingest, host="0.0.0.0", port=DEFAULT_PORT):
+    """Run the endpoint on a daemon thread; call .shutdown() on the result when done"""
+    server = make_server(host, port, create_app(ingest), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"📥 Accepting benchmark results on http://{host}:{server.server_port}/ingest/<run_id>")
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Standalone endpoint that benchmark VMs push results to")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    create_app(Ingest(args.results_dir)).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Write-ahead journal for the deploy scripts.
+
+aws-deploy.py and deploy_VMs.py track what they created in
+deployed_resources.json / to_clean.json only after a deployment succeeds,
+so a crash halfway leaves resources nobody knows about. The journal closes
+that gap. Every line is flushed and fsync'ed before the call it describes:
+
+    {"op": "run",     "run_id": ..., ...}               a fresh run starts
+    {"op": "intent",  "unit": ..., "kind": ..., "name": ..., ...}  before a create call
+    {"op": "created", "unit": ..., "kind": ..., "name": ..., "id": ...}
+    {"op": "done",    "unit": ..., "entry": {...}}       the unit is fully deployed
+    {"op": "cleaned", "unit": ...}                      --resume removed what it left behind
+
+A unit is what the script deploys in one go (an AWS config entry, an Azure
+region). After a crash, `--resume` folds the journal into per-unit state,
+asks the cloud which of the intended resources of unfinished units exist,
+deletes those in one parallel pass and deploys only the units that are not
+done. The scripts own the cloud calls; this module only keeps the log.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOURNAL_FILE = "deploy_journal.jsonl"
+RECONCILE_CONCURRENCY = 16
+
+
+class Journal:
+    """Append-only, fsync'ed JSONL log of deploy intents and outcomes"""
+
+    def __init__(self, path=JOURNAL_FILE, run_id=None):
+        self.path = path
+        self.run_id = run_id
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start(cls, path=JOURNAL_FILE, run_id=None, **fields):
+        """A new journal for a fresh run (the caller archives any previous one)"""
+        journal = cls(path, run_id or new_run_id())
+        journal.write("run", run_id=journal.run_id, **fields)
+        return journal
+
+    def write(self, op, **fields):
+        line = json.dumps({"op": op, "at": time.time(), **fields}, default=str)
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def intent(self, unit, kind, name, **fields):
+        self.write("intent", unit=unit, kind=kind, name=name, **fields)
+
+    def created(self, unit, kind, name, resource_id=None):
+        self.write("created", unit=unit, kind=kind, name=name, id=resource_id)
+
+    def done(self, unit, entry):
+        self.write("done", unit=unit, entry=entry)
+
+    def cleaned(self, unit):
+        self.write("cleaned", unit=unit)
+
+    def records(self):
+        return load(self.path)
+
+
+class _NullJournal:
+    """Used when a script's functions are called without a journal (e.g. by the orchestrator)"""
+    run_id = None
+
+    def intent(self, unit, kind, name, **fields):
+        pass
+
+    def created(self, unit, kind, name, resource_id=None):
+        pass
+
+    def done(self, unit, entry):
+        pass
+
+
+NULL_JOURNAL = _NullJournal()
+
+
+def new_run_id():
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+
+def load(path=JOURNAL_FILE):
+    """Journal records; a torn last line (crash mid-write) is ignored"""
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return records
+
+
+def fold(records):
+    """{"run": run record, "units": {unit: {"done": entry | None, "resources": {(kind, name): resource}}}}"""
+    state = {"run": None, "units": {}}
+    for record in records:
+        if record["op"] == "run":
+            state["run"] = record
+            continue
+        if record["op"] == "cleaned":
+            # The next attempt starts from scratch
+            state["units"][record["unit"]] = {"done": None, "resources": {}}
+            continue
+        unit = state["units"].setdefault(record["unit"], {"done": None, "resources": {}})
+        if record["op"] == "done":
+            unit["done"] = record["entry"]
+            continue
+        key = (record["kind"], record["name"])
+        resource = unit["resources"].setdefault(key, {"id": None})
+        resource.update({k: v for k, v in record.items() if k not in ("op", "at", "unit") and v is not None})
+    return state
+
+
+def reconcile(state, exists, concurrency=RECONCILE_CONCURRENCY):
+    """
+    Check the journal against the cloud.
+
+    `exists(unit, resource)` returns the resource's current cloud id, or
+    None if it is gone. Returns (done, leaked): the units whose deployment
+    finished and still exists, and {unit: [existing resources]} of every
+    other unit.
+    """
+    checks = [(unit, resource) for unit, s in state["units"].items() for resource in s["resources"].values()]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        found = list(executor.map(lambda check: exists(*check), checks))
+
+    existing = {}
+    for (unit, resource), resource_id in zip(checks, found):
+        if resource_id:
+            existing.setdefault(unit, []).append({**resource, "id": resource_id})
+
+    done, leaked = {}, {}
+    for unit, s in state["units"].items():
+        if s["done"] is not None and len(existing.get(unit, [])) == len(s["resources"]):
+            done[unit] = s["done"]
+        elif existing.get(unit):
+            leaked[unit] = existing[unit]
+    return done, leaked
+
+
+def unfinished(path=JOURNAL_FILE):
+    """Units of the journal's run that never reached done"""
+    return [unit for unit, s in fold(load(path))["units"].items() if s["done"] is None]
+
+
+def clean(journal, state, done, leaked, delete, concurrency=RECONCILE_CONCURRENCY):
+    """
+    Run delete(unit, resources) for every leaked unit in parallel and mark
+    every unfinished unit that left nothing behind as cleaned. Returns the
+    units whose resources could not be deleted; they must not be redeployed
+    until a later --resume cleans them.
+    """
+    units = list(leaked)
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(units)))) as executor:
+        outcomes = list(executor.map(lambda unit: delete(unit, leaked[unit]), units))
+    failed = [unit for unit, ok in zip(units, outcomes) if not ok]
+    for unit in state["units"]:
+        if unit not in done and unit not in failed:
+            journal.cleaned(unit)
+    return failed
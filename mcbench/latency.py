@@ -0,0 +1,247 @@
+"""
+Client-to-region latency.
+
+Measures, from the operator's machine, how long it takes to reach each
+region's regional API endpoint:
+
+- dns_ms:      resolving the endpoint's name
+- connect_ms:  TCP handshake (median of SAMPLES connections)
+- tls_ms:      TLS handshake on top of the TCP connection (median)
+
+All regions are probed concurrently on one event loop. Results, failures
+included, are cached per endpoint in results/latency_cache.json for
+CACHE_TTL_SEC, so the region selectors can show them on every page load
+without probing every time. Web pages use cached_latencies(), which never
+probes inside the request: it returns what the cache has and refreshes
+stale endpoints in a background thread.
+
+The endpoints are per-cloud templates (ENDPOINTS). GCP's googleapis.com
+hosts are served by Google's anycast front ends, so for GCP the numbers
+describe the path to the nearest Google edge rather than to the region.
+
+For testing, every region can be pointed at a local server:
+
+    python -m mcbench.latency aws us-east-1 eu-west-1 --endpoint 127.0.0.1:8443 --insecure
+    python -m mcbench.latency azure eastus westeurope northeurope --sort
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import ssl
+import statistics
+import threading
+import time
+from tabulate import tabulate
+from mcbench import metrics
+from mcbench._scripts import REPO_ROOT
+from mcbench.results import RESULTS_DIR
+
+ENDPOINTS = {
+    "aws": "ec2.{region}.amazonaws.com",
+    "azure": "{region}.management.azure.com",
+    "gcp": "{region}-run.googleapis.com",
+}
+HTTPS_PORT = 443
+SAMPLES = 3
+TIMEOUT = 3
+DEFAULT_CONCURRENCY = 64
+CACHE_TTL_SEC = 600
+UNREACHABLE_MS = 1e9
+CACHE_FILE = REPO_ROOT / RESULTS_DIR / "latency_cache.json"
+
+_cache_lock = threading.Lock()  # read-merge-write of the cache file
+_refresh_lock = threading.Lock()
+_refreshing = set()  # clouds with a background refresh in flight
+
+
+def insecure_context():
+    """TLS without certificate checks, for local stand-in endpoints with self-signed certificates"""
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+async def handshake(address, host, port, ssl_context, timeout):
+    """(tcp_sec, tls_sec) for one fresh connection"""
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    transport, protocol = await asyncio.wait_for(loop.create_connection(asyncio.Protocol, address, port), timeout)
+    try:
+        connected = time.perf_counter()
+        transport = await asyncio.wait_for(
+            loop.start_tls(transport, protocol, ssl_context, server_hostname=host), timeout)
+        return connected - started, time.perf_counter() - connected
+    finally:
+        transport.close()
+
+
+async def probe_endpoint(host, port=HTTPS_PORT, ssl_context=None, samples=SAMPLES, timeout=TIMEOUT):
+    """DNS, TCP connect and TLS handshake times of one endpoint, in ms"""
+    result = {"host": host, "port": port, "dns_ms": None, "connect_ms": None, "tls_ms": None,
+              "error": None, "measured_at": time.time()}
+    loop = asyncio.get_running_loop()
+    try:
+        started = time.perf_counter()
+        infos = await asyncio.wait_for(loop.getaddrinfo(host, port, type=socket.SOCK_STREAM), timeout)
+        result["dns_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+        times = [await handshake(infos[0][4][0], host, port, ssl_context or ssl.create_default_context(), timeout)
+                 for _ in range(samples)]
+        result["connect_ms"] = round(statistics.median(t[0] for t in times) * 1000, 2)
+        result["tls_ms"] = round(statistics.median(t[1] for t in times) * 1000, 2)
+    except (OSError, asyncio.TimeoutError) as e:
+        result["error"] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+    return result
+
+
+async def probe_all(hosts, port=HTTPS_PORT, ssl_context=None, concurrency=DEFAULT_CONCURRENCY):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(host):
+        async with semaphore:
+            return await probe_endpoint(host, port, ssl_context)
+
+    return await asyncio.gather(*(limited(h) for h in hosts))
+
+
+def load_cache(path=CACHE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_cache(cache, path=CACHE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp, path)
+
+
+def cache_key(host, port):
+    return f"{host}:{port}"
+
+
+def endpoint_hosts(cloud, regions, template=None):
+    template = template or ENDPOINTS[cloud]
+    return {region: template.format(region=region) for region in regions}
+
+
+def is_stale(cache, host, port, ttl, now):
+    return now - cache.get(cache_key(host, port), {}).get("measured_at", 0) >= ttl
+
+
+def region_latencies(cloud, regions, ttl=CACHE_TTL_SEC, refresh=False, template=None, port=HTTPS_PORT,
+                     ssl_context=None, cache_path=CACHE_FILE):
+    """{region: probe result}; endpoints measured less than `ttl` seconds ago come from the cache"""
+    hosts = endpoint_hosts(cloud, regions, template)
+    # save_cache replaces the file atomically, so reading needs no lock
+    cache = load_cache(cache_path)
+    now = time.time()
+    stale = sorted({h for h in hosts.values() if refresh or is_stale(cache, h, port, ttl, now)})
+    metrics.cache_lookup("latency", hits=len(set(hosts.values())) - len(stale), misses=len(stale))
+    if stale:
+        print(f"📡 Probing {len(stale)} {cloud} endpoint(s)...")
+        results = asyncio.run(probe_all(stale, port, ssl_context))
+        # The probes run unlocked; merge into whatever other callers saved meanwhile
+        with _cache_lock:
+            cache = load_cache(cache_path)
+            for result in results:
+                cache[cache_key(result["host"], port)] = result
+            save_cache(cache, cache_path)
+    return {region: cache[cache_key(host, port)] for region, host in hosts.items()}
+
+
+def refresh_in_background(cloud, regions, **kwargs):
+    """Run region_latencies in a daemon thread, at most one per cloud at a time"""
+    with _refresh_lock:
+        if cloud in _refreshing:
+            return None
+        _refreshing.add(cloud)
+
+    def run():
+        try:
+            region_latencies(cloud, regions, **kwargs)
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(cloud)
+
+    thread = threading.Thread(target=run, name=f"latency-{cloud}", daemon=True)
+    thread.start()
+    return thread
+
+
+def cached_latencies(cloud, regions, ttl=CACHE_TTL_SEC, template=None, port=HTTPS_PORT, ssl_context=None,
+                     cache_path=CACHE_FILE):
+    """{region: cached probe result, or None if never measured} without blocking on probes.
+
+    Stale or missing endpoints are probed in the background, for the next call.
+    """
+    hosts = endpoint_hosts(cloud, regions, template)
+    cache = load_cache(cache_path)
+    now = time.time()
+    if any(is_stale(cache, h, port, ttl, now) for h in hosts.values()):
+        refresh_in_background(cloud, regions, ttl=ttl, template=template, port=port, ssl_context=ssl_context,
+                              cache_path=cache_path)
+    else:
+        metrics.cache_lookup("latency", hits=len(set(hosts.values())), misses=0)
+    return {region: cache.get(cache_key(host, port)) for region, host in hosts.items()}
+
+
+def latency_key(result):
+    """Sort key: TCP connect time, unreachable or unmeasured endpoints last (also used by the selector pages)"""
+    return UNREACHABLE_MS if result is None or result["connect_ms"] is None else result["connect_ms"]
+
+
+def by_latency(latencies):
+    return sorted(latencies, key=lambda region: latency_key(latencies[region]))
+
+
+def describe(result):
+    if result is None:
+        return "measuring..."
+    if result["connect_ms"] is None:
+        return "unreachable"
+    return f"{result['connect_ms']:.0f} ms (TLS {result['tls_ms']:.0f} ms)"
+
+
+def print_latencies(latencies, sort=False):
+    regions = by_latency(latencies) if sort else list(latencies)
+
+    def fmt(value):
+        return "-" if value is None else f"{value:.1f}"
+
+    print(tabulate([[r, latencies[r]["host"], fmt(latencies[r]["dns_ms"]), fmt(latencies[r]["connect_ms"]),
+                     fmt(latencies[r]["tls_ms"]), latencies[r]["error"] or ""] for r in regions],
+                   headers=["Region", "Endpoint", "DNS ms", "TCP connect ms", "TLS handshake ms", "Error"],
+                   tablefmt="grid"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TCP connect and TLS handshake latency to regional API endpoints")
+    parser.add_argument("cloud", choices=sorted(ENDPOINTS))
+    parser.add_argument("regions", nargs="+")
+    parser.add_argument("--sort", action="store_true", help="fastest region first")
+    parser.add_argument("--ttl", type=int, default=CACHE_TTL_SEC, help="seconds a cached result stays valid")
+    parser.add_argument("--refresh", action="store_true", help="ignore the cache")
+    parser.add_argument("--endpoint", metavar="HOST:PORT", help="probe this endpoint for every region (testing)")
+    parser.add_argument("--insecure", action="store_true", help="do not verify TLS certificates")
+    parser.add_argument("--cache", default=str(CACHE_FILE))
+    args = parser.parse_args()
+
+    template, port = None, HTTPS_PORT
+    if args.endpoint:
+        template, port = args.endpoint.rsplit(":", 1)
+        port = int(port)
+    latencies = region_latencies(args.cloud, args.regions, args.ttl, args.refresh, template, port,
+                                 insecure_context() if args.insecure else None, args.cache)
+    print_latencies(latencies, args.sort)
+
+
+if __name__ == "__main__":
+    main()
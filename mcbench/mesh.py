@@ -0,0 +1,323 @@
+"""
+VM-to-VM network mesh.
+
+Every VM of a deployment measures round-trip time and bulk TCP throughput
+to every other VM. Pairs are scheduled in round-robin rounds (the circle
+method): in each round every host is in at most one pair, the two
+directions of a pair run one after the other, and the pairs of a round run
+in parallel. So no host ever serves or runs more than one test at a time,
+and n hosts need n-1 rounds (n if n is odd, one host sitting out each).
+
+Results are grouped by "cloud:region" into two matrices, rows being the
+sending region: median RTT p50 in ms and median throughput in Gbit/s (NaN
+where nothing was measured; the diagonal needs two VMs in one region).
+They are saved with the region labels as results/<name>.mesh.npz, every
+single test goes to results/<name>.mesh.jsonl, and --plot draws both as
+heatmaps.
+
+The test server is mcbench/agent.py --mesh-server, copied over SSH, on
+MESH_PORT. The port is opened for the duration of the mesh, only from the
+mesh's own VMs: in the security groups of the AWS VMs, and by a firewall
+rule of the GCP default network that applies only to VMs with deploy.py's
+network tag (the Azure VMs have no NSG). Both are removed afterwards;
+mcbench/reaper.py finds GCP rules a crashed mesh left.
+
+    python -m mcbench.mesh --run <run_id> --plot
+    python -m mcbench.mesh --aws --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import uuid
+from collections import defaultdict
+import numpy as np
+from tabulate import tabulate
+from mcbench import ssh
+from mcbench._scripts import GCP_DIR, load_script
+from mcbench.reaper import GCP_FIREWALL_PREFIX, GCP_NETWORK_TAG
+from mcbench.results import MESH_RESULTS, RESULTS_DIR, ResultsStore, utcnow
+from mcbench.userdata import agent_payload
+
+MESH_PORT = 5201
+DEFAULT_DURATION = 10
+IDLE_TIMEOUT = 900  # the server exits by itself if the mesh is aborted
+REMOTE_AGENT = "/tmp/mcbench-agent.py"
+
+
+def region_label(t):
+    return f"{t['cloud']}:{t['region']}"
+
+
+def rounds(count):
+    """Circle-method round robin over hosts 0..count-1: each round is a list of disjoint pairs"""
+    hosts = list(range(count))
+    if count % 2:
+        hosts.append(None)  # whoever is paired with None sits the round out
+    n = len(hosts)
+    schedule = []
+    for _ in range(n - 1):
+        pairs = [(hosts[i], hosts[n - 1 - i]) for i in range(n // 2)]
+        schedule.append([(a, b) for a, b in pairs if a is not None and b is not None])
+        hosts = [hosts[0], hosts[-1], *hosts[1:-1]]
+    return schedule
+
+
+def server_script(port, idle_timeout=IDLE_TIMEOUT):
+    return f"""
+echo '{agent_payload()}' | base64 -d | gunzip > {REMOTE_AGENT}
+pkill -f '{REMOTE_AGENT} --mesh-server' || true
+nohup python3 {REMOTE_AGENT} --mesh-server {port} --mesh-idle-timeout {idle_timeout} </dev/null >/dev/null 2>&1 &
+sleep 1
+"""
+
+
+STOP_SERVER = f"pkill -f '{REMOTE_AGENT} --mesh-server' || true"
+
+
+def source_ranges(targets):
+    return sorted({f"{t['host']}/32" for t in targets})
+
+
+def open_aws_port(targets, port, opened):
+    """Allow the mesh port from every target in the AWS VMs' security groups"""
+    import boto3
+    from botocore.exceptions import ClientError
+
+    permission = {"IpProtocol": "tcp", "FromPort": port, "ToPort": port,
+                  "IpRanges": [{"CidrIp": cidr, "Description": "mcbench mesh"} for cidr in source_ranges(targets)]}
+    regions = defaultdict(list)
+    for t in targets:
+        if t["cloud"] == "aws":
+            regions[t["region"]].append(t["name"])
+    for region, instance_ids in regions.items():
+        ec2 = boto3.client("ec2", region_name=region)
+        reservations = ec2.describe_instances(InstanceIds=instance_ids)["Reservations"]
+        for group_id in sorted({g["GroupId"] for r in reservations for i in r["Instances"]
+                                for g in i["SecurityGroups"]}):
+            try:
+                ec2.authorize_security_group_ingress(GroupId=group_id, IpPermissions=[permission])
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "InvalidPermission.Duplicate":
+                    raise
+            opened.append(("aws", region, group_id, permission))
+    print(f"🔓 Opened tcp:{port} in {len(opened)} AWS security group(s)")
+
+
+def gcp_firewall_body(name, targets, port):
+    """Mesh port open to the tagged benchmark VMs, from the mesh's VMs only"""
+    return {
+        "name": name,
+        "network": "global/networks/default",
+        "description": "VM-to-VM network tests of mcbench/mesh.py",
+        "allowed": [{"IPProtocol": "tcp", "ports": [str(port)]}],
+        "sourceRanges": source_ranges(targets),
+        "targetTags": [GCP_NETWORK_TAG],
+    }
+
+
+def create_gcp_firewall(targets, port):
+    """A firewall rule for this mesh only; returns its name"""
+    gcp_client = load_script(GCP_DIR, "gcp_client.py", "gcp_client")
+    name = f"{GCP_FIREWALL_PREFIX}-{uuid.uuid4().hex[:8]}"
+    op = gcp_client.execute(gcp_client.compute().firewalls().insert(
+        project=gcp_client.get_project(), body=gcp_firewall_body(name, targets, port)))
+    op = gcp_client.wait_global_operation(op)
+    if op.get("error"):
+        raise RuntimeError(f"Could not create GCP firewall rule {name}: {op['error']}")
+    print(f"🔓 Created GCP firewall rule {name} for tcp:{port} from {len(targets)} VM(s)")
+    return name
+
+
+def open_mesh_port(targets, port, opened):
+    """Open the mesh port between the targets; what was opened is appended to `opened` as it is"""
+    if any(t["cloud"] == "aws" for t in targets):
+        open_aws_port(targets, port, opened)
+    if any(t["cloud"] == "gcp" for t in targets):
+        opened.append(("gcp", create_gcp_firewall(targets, port)))
+
+
+def close_mesh_port(opened):
+    for item in opened:
+        try:
+            if item[0] == "aws":
+                import boto3
+                _, region, group_id, permission = item
+                boto3.client("ec2", region_name=region).revoke_security_group_ingress(
+                    GroupId=group_id, IpPermissions=[permission])
+            else:
+                gcp_client = load_script(GCP_DIR, "gcp_client.py", "gcp_client")
+                gcp_client.wait_global_operation(gcp_client.execute(gcp_client.compute().firewalls().delete(
+                    project=gcp_client.get_project(), firewall=item[1])))
+                print(f"🔒 Deleted GCP firewall rule {item[1]}")
+        except Exception as e:
+            print(f"⚠️ Could not close the mesh port ({item[:-1] if item[0] == 'aws' else item[1]}): {e}")
+
+
+async def measure(pool, src, dst, port, duration):
+    """One direction: `src` runs the client against `dst`'s server"""
+    lines = []
+
+    def on_line(t, stream, line):
+        if stream == "stdout":
+            lines.append(line)
+        else:
+            ssh.print_line(t, stream, line)
+
+    command = f"python3 {REMOTE_AGENT} --mesh-client {dst['host']}:{port} --duration {duration}"
+    result = await ssh.run_on(pool, src, command, on_line=on_line)
+    test = {
+        "src": src["name"], "dst": dst["name"],
+        "src_region": region_label(src), "dst_region": region_label(dst),
+        "measured_at": utcnow().isoformat(), "error": None,
+    }
+    if result["exit_status"] == 0 and lines:
+        test.update(json.loads(lines[-1]))
+    else:
+        test["error"] = result["error"] or f"exit status {result['exit_status']}"
+    return test
+
+
+async def pair_both_ways(pool, a, b, port, duration):
+    # Sequential, so neither host is ever in two tests at once
+    return [await measure(pool, a, b, port, duration), await measure(pool, b, a, port, duration)]
+
+
+async def run_mesh(targets, port=MESH_PORT, duration=DEFAULT_DURATION, on_test=None):
+    """Every ordered pair of targets, one test per host at a time; returns the test dicts"""
+    pool = ssh.SshPool()
+    tests = []
+    try:
+        print(f"🚀 Starting mesh servers on {len(targets)} VM(s)...")
+        started = await ssh.run_everywhere(targets, None, server_script(port), pool=pool)
+        hosts = [t for t, r in zip(targets, started) if r["exit_status"] == 0]
+        for t, r in zip(targets, started):
+            if r["exit_status"] != 0:
+                print(f"⚠️ Leaving {t['name']} out of the mesh: {r['error'] or r['exit_status']}")
+
+        schedule = rounds(len(hosts))
+        for number, pairs in enumerate(schedule, 1):
+            print(f"🔁 Round {number}/{len(schedule)}: {len(pairs)} pair(s) in parallel")
+            results = await asyncio.gather(*(pair_both_ways(pool, hosts[a], hosts[b], port, duration)
+                                             for a, b in pairs))
+            for test in (test for both in results for test in both):
+                if on_test:
+                    on_test(test)
+                tests.append(test)
+
+        await ssh.run_everywhere(hosts, STOP_SERVER, pool=pool)
+    finally:
+        await pool.close()
+    return tests
+
+
+def matrices(tests):
+    """(labels, rtt_ms, gbit_s): region x region medians, rows = sender"""
+    labels = sorted({t["src_region"] for t in tests} | {t["dst_region"] for t in tests})
+    index = {label: i for i, label in enumerate(labels)}
+    rtt_ms = np.full((len(labels), len(labels)), np.nan)
+    gbit_s = np.full((len(labels), len(labels)), np.nan)
+
+    cells = defaultdict(list)
+    for t in tests:
+        if t["error"] is None:
+            cells[index[t["src_region"]], index[t["dst_region"]]].append((t["rtt_p50_us"] / 1000, t["gbit_s"]))
+    for cell, values in cells.items():
+        rtt_ms[cell], gbit_s[cell] = np.median(np.array(values), axis=0)
+    return labels, rtt_ms, gbit_s
+
+
+def mesh_path(name, results_dir=RESULTS_DIR, ext="npz"):
+    return os.path.join(results_dir, f"{name}.{MESH_RESULTS}.{ext}")
+
+
+def save_matrices(path, labels, rtt_ms, gbit_s):
+    np.savez(path, labels=np.array(labels), rtt_ms=rtt_ms, gbit_s=gbit_s)
+    print(f"💾 Matrices saved to {path}")
+
+
+def load_matrices(path):
+    with np.load(path) as data:
+        return [str(label) for label in data["labels"]], data["rtt_ms"], data["gbit_s"]
+
+
+def print_matrix(title, labels, matrix, fmt):
+    print(f"\n{title} (rows send, columns receive)")
+    rows = [[label, *("-" if np.isnan(v) else format(v, fmt) for v in row)] for label, row in zip(labels, matrix)]
+    print(tabulate(rows, headers=["", *labels], tablefmt="grid"))
+
+
+def plot_mesh(labels, rtt_ms, gbit_s, path):
+    """Side-by-side RTT and throughput heatmaps"""
+    import matplotlib.pyplot as plt
+
+    size = max(6, len(labels) * 0.7)
+    fig, axes = plt.subplots(1, 2, figsize=(2 * size + 2, size))
+    for ax, matrix, title, cmap, fmt in ((axes[0], rtt_ms, "RTT p50 (ms)", "viridis_r", ".3g"),
+                                         (axes[1], gbit_s, "Throughput (Gbit/s)", "viridis", ".3g")):
+        image = ax.imshow(np.ma.masked_invalid(matrix), cmap=cmap)
+        fig.colorbar(image, ax=ax, fraction=0.046)
+        ax.set_title(title)
+        ax.set_xticks(range(len(labels)), labels, rotation=90, fontsize=7)
+        ax.set_yticks(range(len(labels)), labels, fontsize=7)
+        ax.set_xlabel("Receiving region")
+        ax.set_ylabel("Sending region")
+        for (i, j), value in np.ndenumerate(matrix):
+            if not np.isnan(value):
+                ax.text(j, i, format(value, fmt), ha="center", va="center", fontsize=6, color="white")
+    fig.tight_layout()
+    fig.savefig(path, dpi=200)
+    print(f"📈 Heatmaps saved as {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RTT and throughput between every pair of deployed VMs")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--aws", action="store_true")
+    source.add_argument("--azure", action="store_true")
+    source.add_argument("--gcp", action="store_true")
+    source.add_argument("--run", metavar="RUN_ID", help="VMs of an mcbench run")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds per direction of a pair")
+    parser.add_argument("--port", type=int, default=MESH_PORT)
+    parser.add_argument("--gcp-user", help="SSH user for GCP VMs (default: local user)")
+    parser.add_argument("--gcp-key", default=ssh.GCP_KEY)
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--plot", action="store_true", help="also save results/<name>.mesh.png")
+    args = parser.parse_args()
+
+    if args.aws:
+        name, targets = "aws", ssh.aws_targets()
+    elif args.azure:
+        name, targets = "azure", ssh.azure_targets()
+    elif args.gcp:
+        name, targets = "gcp", ssh.gcp_targets(username=args.gcp_user, key_file=args.gcp_key)
+    else:
+        name = args.run
+        targets = ssh.run_targets(args.run, args.results_dir, gcp_user=args.gcp_user, gcp_key=args.gcp_key)
+    if len(targets) < 2:
+        print("⚠️ A mesh needs at least two reachable VMs")
+        sys.exit(1)
+
+    store = ResultsStore(name, args.results_dir, kind=MESH_RESULTS)
+    opened = []
+    try:
+        open_mesh_port(targets, args.port, opened)
+        tests = asyncio.run(run_mesh(targets, args.port, args.duration, on_test=store.append))
+    finally:
+        close_mesh_port(opened)
+    failed = [t for t in tests if t["error"]]
+    print(f"\n✅ {len(tests) - len(failed)} of {len(tests)} test(s) succeeded")
+    for t in failed:
+        print(f"❌ {t['src']} -> {t['dst']}: {t['error']}")
+
+    labels, rtt_ms, gbit_s = matrices(tests)
+    print_matrix("RTT p50 (ms)", labels, rtt_ms, ".2f")
+    print_matrix("Throughput (Gbit/s)", labels, gbit_s, ".2f")
+    save_matrices(mesh_path(name, args.results_dir), labels, rtt_ms, gbit_s)
+    if args.plot:
+        plot_mesh(labels, rtt_ms, gbit_s, mesh_path(name, args.results_dir, "png"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Prometheus metrics for the Flask apps.
+
+Both apps serve GET /metrics in the Prometheus text format:
+
+- mcbench_deployments_in_flight{cloud}           provisioning jobs running now
+- mcbench_api_calls_total{cloud,operation,outcome}
+- mcbench_api_call_duration_seconds{cloud,operation}  histogram
+- mcbench_api_throttled_total{cloud,operation}
+- mcbench_api_retries_total{cloud,operation}
+- mcbench_cache_requests_total{cache,result} and mcbench_cache_hit_ratio{cache}
+- mcbench_job_queue_depth{app}, mcbench_jobs_running{app}
+
+The cloud API and deployment numbers come from the spans of mcbench/trace.py
+(install() registers a span listener and the SDK instrumentation records
+spans from then on). Azure spans are per HTTP attempt, so a retried Azure
+call counts one retry on each repeated attempt; AWS spans carry botocore's
+retry count for the whole call.
+
+Only the GCP app calls its cloud in-process (its fetch jobs), so only it
+exports API, deployment and job metrics. The Azure app makes no Azure calls
+itself (deploy_VMs.py and cleanup.py run as separate processes, with their
+own traces), so its /metrics has the latency cache counters only.
+
+Hot paths never take a lock: every thread increments its own slots
+(per-thread shards) and a scrape sums them. Histograms have fixed buckets,
+so observing a value is a bisect and two additions. Slots of finished
+threads are folded into a retired total, so the threaded Flask server does
+not grow the shard list.
+"""
+import threading
+import weakref
+from bisect import bisect_left
+from mcbench import trace
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+API_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class _Slot:
+    __slots__ = ("values", "__weakref__")
+
+    def __init__(self, size):
+        self.values = [0] * size
+
+
+class Shards:
+    """Per-thread value arrays: writers never share a slot, readers sum them"""
+
+    def __init__(self, size):
+        self.size = size
+        self._local = threading.local()
+        self._live = []
+        self._retired = [0] * size
+        self._lock = threading.Lock()
+
+    def mine(self):
+        try:
+            return self._local.slot.values
+        except AttributeError:
+            slot = self._local.slot = _Slot(self.size)
+            with self._lock:
+                self._live.append(slot.values)
+            # The thread-local slot is dropped when its thread ends
+            weakref.finalize(slot, self._retire, slot.values)
+            return slot.values
+
+    def _retire(self, values):
+        with self._lock:
+            self._live = [v for v in self._live if v is not values]
+            self._retired = [a + b for a, b in zip(self._retired, values)]
+
+    def total(self):
+        with self._lock:
+            shards = [self._retired, *self._live]
+        return [sum(column) for column in zip(*shards)]
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=(), registry=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _shards(self, labels, size):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        shards = self._children.get(key)
+        if shards is None:
+            with self._lock:
+                shards = self._children.setdefault(key, Shards(size))
+        return shards
+
+    def children(self):
+        with self._lock:
+            return list(self._children.items())
+
+    def label_text(self, key, extra=()):
+        pairs = [*zip(self.labelnames, key), *extra]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{n}="{escape(v)}"' for n, v in pairs) + "}"
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        self._shards(labels, 1).mine()[0] += amount
+
+    def value(self, **labels):
+        return self._shards(labels, 1).total()[0]
+
+    def samples(self):
+        return [f"{self.name}{self.label_text(key)} {number(shards.total()[0])}" for key, shards in self.children()]
+
+
+class Gauge(Metric):
+    """inc/dec from any thread, or a function evaluated at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), registry=None):
+        super().__init__(name, help, labelnames, registry)
+        self._functions = {}
+
+    def inc(self, amount=1, **labels):
+        self._shards(labels, 1).mine()[0] += amount
+
+    def dec(self, amount=1, **labels):
+        self._shards(labels, 1).mine()[0] -= amount
+
+    def set_function(self, fn, **labels):
+        self._functions[tuple(str(labels.get(n, "")) for n in self.labelnames)] = fn
+
+    def samples(self):
+        values = {key: shards.total()[0] for key, shards in self.children()}
+        for key, fn in list(self._functions.items()):
+            values[key] = fn()
+        return [f"{self.name}{self.label_text(key)} {number(v)}" for key, v in values.items()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=API_BUCKETS, registry=None):
+        super().__init__(name, help, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        # Slots: one per bucket, +Inf, then the running sum
+        values = self._shards(labels, len(self.buckets) + 2).mine()
+        values[bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def samples(self):
+        lines = []
+        for key, shards in self.children():
+            *counts, total = shards.total()
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else number(bound)
+                lines.append(f"{self.name}_bucket{self.label_text(key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{self.label_text(key)} {number(total)}")
+            lines.append(f"{self.name}_count{self.label_text(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def render(self):
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REGISTRY = Registry()
+
+DEPLOYMENTS_IN_FLIGHT = Gauge("mcbench_deployments_in_flight", "Provisioning jobs currently running", ["cloud"])
+API_CALLS = Counter("mcbench_api_calls_total", "Cloud API calls", ["cloud", "operation", "outcome"])
+API_DURATION = Histogram("mcbench_api_call_duration_seconds", "Cloud API call latency", ["cloud", "operation"])
+API_THROTTLED = Counter("mcbench_api_throttled_total", "Cloud API calls rejected by throttling",
+                        ["cloud", "operation"])
+API_RETRIES = Counter("mcbench_api_retries_total", "Cloud API retries", ["cloud", "operation"])
+CACHE_REQUESTS = Counter("mcbench_cache_requests_total", "Cache lookups", ["cache", "result"])
+CACHE_HIT_RATIO = Gauge("mcbench_cache_hit_ratio", "Share of cache lookups that were hits", ["cache"])
+JOB_QUEUE_DEPTH = Gauge("mcbench_job_queue_depth", "Jobs waiting to start", ["app"])
+JOBS_RUNNING = Gauge("mcbench_jobs_running", "Jobs currently running", ["app"])
+
+_caches = set()
+
+
+def cache_lookup(cache, hits=0, misses=0):
+    """Count cache hits and misses; the cache's hit ratio gauge appears on first use"""
+    if hits:
+        CACHE_REQUESTS.inc(hits, cache=cache, result="hit")
+    if misses:
+        CACHE_REQUESTS.inc(misses, cache=cache, result="miss")
+    if cache not in _caches:
+        _caches.add(cache)
+
+        def ratio():
+            hit = CACHE_REQUESTS.value(cache=cache, result="hit")
+            total = hit + CACHE_REQUESTS.value(cache=cache, result="miss")
+            return hit / total if total else 0.0
+
+        CACHE_HIT_RATIO.set_function(ratio, cache=cache)
+
+
+def observe_span(event, span):
+    attributes = span.attributes
+    if span.name == "provision":
+        if event == "start":
+            DEPLOYMENTS_IN_FLIGHT.inc(cloud=attributes.get("cloud"))
+        else:
+            DEPLOYMENTS_IN_FLIGHT.dec(cloud=attributes.get("cloud"))
+        return
+    if event != "end" or not span.name.endswith(".api"):
+        return
+    cloud, operation = attributes.get("cloud"), attributes.get("operation")
+    API_CALLS.inc(cloud=cloud, operation=operation, outcome="error" if span.error else "ok")
+    API_DURATION.observe((span.end_ns - span.start_ns) / 1e9, cloud=cloud, operation=operation)
+    if attributes.get("throttled"):
+        API_THROTTLED.inc(cloud=cloud, operation=operation)
+    retries = attributes.get("retries", 0)
+    if retries:
+        API_RETRIES.inc(retries if cloud == "aws" else 1, cloud=cloud, operation=operation)
+
+
+def install():
+    """Feed the span-based metrics from now on"""
+    trace.add_listener(observe_span)
+
+
+def create_blueprint(registry=REGISTRY):
+    from flask import Blueprint, Response  # metrics are also recorded by CLI processes without Flask
+
+    bp = Blueprint("metrics", __name__)
+
+    @bp.route("/metrics")
+    def metrics():
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+
+    return bp
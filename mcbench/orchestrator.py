@@ -0,0 +1,296 @@
+"""
+Multi-cloud benchmark orchestrator.
+
+Expands one spec into jobs for every cloud and runs them concurrently on a
+single asyncio event loop. The cloud SDKs are blocking, so each job runs on
+a worker thread; the Scheduler enforces per-cloud, per-region and global
+in-flight limits. Records land in results/<run_id>.jsonl as jobs finish and
+a throughput summary in results/<run_id>.summary.json at the end.
+
+With "readiness" in the spec, each VM is probed for TCP 22, the SSH banner
+and cloud-init completion right after provisioning; the probe does not
+hold a scheduler slot. When the spec benchmarks the VMs and has an
+"ingest" section, the run serves its own ingest endpoint and, after
+provisioning, waits until every benchmarked VM has pushed its agent result
+or the timeout passes.
+
+With --trace the run's spans (stages, provisioning jobs, every cloud API
+call) are exported at exit, see mcbench/trace.py.
+
+    python -m mcbench.orchestrator deploy spec.json
+    python -m mcbench.orchestrator destroy <run_id>
+    python -m mcbench.orchestrator --trace results/trace --profile results/profiles deploy spec.json
+
+asyncssh (readiness), Flask (ingest) and numpy (history) are imported only
+by the runs that use them, so `destroy` and small specs start fast.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from tabulate import tabulate
+from mcbench import metrics, trace
+from mcbench.providers import get_provider
+from mcbench.results import RESULTS_DIR, ResultsStore, load_records, make_record, utcnow
+from mcbench.scheduler import Scheduler
+from mcbench.spec import (DEFAULT_INGEST_TIMEOUT, cloud_concurrency, expand_jobs, load_spec, max_in_flight,
+                          readiness_timeout, region_concurrency)
+
+
+def new_run_id():
+    return f"run-{utcnow():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:4]}"
+
+
+async def prepare_providers(spec, loop, executor):
+    """Prepare every cloud in parallel; a cloud that fails to prepare is reported, not fatal"""
+    providers = {cloud: get_provider(cloud, settings) for cloud, settings in spec["clouds"].items()}
+
+    async def prepare(cloud, provider):
+        try:
+            with trace.span("prepare", cloud=cloud, operation="prepare"):
+                await loop.run_in_executor(executor, trace.in_context(provider.prepare))
+            return cloud, None
+        except Exception as e:
+            print(f"⚠️ [{cloud}] setup failed, its jobs will be marked failed: {e}")
+            return cloud, str(e)
+
+    errors = dict(await asyncio.gather(*(prepare(c, p) for c, p in providers.items())))
+    return providers, errors
+
+
+async def run_job(job, provider, loop, executor, queue_wait_sec, setup_error=None):
+    if setup_error:
+        record = make_record(job, status="failed", error=f"setup failed: {setup_error}")
+    else:
+        try:
+            with trace.span("provision", cloud=job["cloud"], region=job["region"], operation="provision",
+                            size=job["size"], job_id=job["job_id"]) as s:
+                record = await loop.run_in_executor(executor, trace.in_context(provider.provision), job)
+                s.set_attribute("status", record["status"])
+        except Exception as e:
+            record = make_record(job, status="failed", error=str(e))
+
+    record["queue_wait_sec"] = queue_wait_sec
+    outcome = f"{record['provision_sec']:.1f}s" if record["status"] == "succeeded" else f"failed: {record['error']}"
+    print(f"[{job['cloud']}] {job['region']} {job['size']} → {outcome}")
+    return record
+
+
+async def finish_job(record, store, pool=None, readiness_timeout=None):
+    """Probe guest readiness (outside the scheduler slot) and store the record"""
+    if pool is not None and record["status"] == "succeeded":
+        from mcbench import readiness
+        with trace.span("readiness", cloud=record["cloud"], region=record["region"], operation="probe"):
+            await readiness.probe_record(record, pool, readiness_timeout)
+        phases = ", ".join(f"{name} {'-' if record[key] is None else f'{record[key]:.1f}s'}"
+                           for name, key in (("tcp", "tcp_ready_sec"), ("ssh", "ssh_banner_sec"),
+                                             ("cloud-init", "cloud_init_sec")))
+        print(f"[{record['cloud']}] {record['region']} {record['vm_name']} ready: {phases}")
+    store.append(record)
+    return record
+
+
+async def run_benchmark(spec, run_id=None, results_dir=RESULTS_DIR):
+    run_id = run_id or new_run_id()
+    jobs = expand_jobs(spec, run_id)
+    store = ResultsStore(run_id, results_dir)
+    with open(os.path.join(results_dir, f"{run_id}.spec.json"), "w") as f:
+        json.dump(spec, f, indent=2)
+
+    limits = {cloud: cloud_concurrency(spec, cloud) for cloud in spec["clouds"]}
+    scheduler = Scheduler(
+        cloud_limits=limits,
+        region_limits={cloud: region_concurrency(spec, cloud) for cloud in spec["clouds"]},
+        max_in_flight=max_in_flight(spec),
+    )
+    loop = asyncio.get_running_loop()
+    # Served on the ingest endpoint's /metrics while the run lasts
+    metrics.install()
+    metrics.JOB_QUEUE_DEPTH.set_function(scheduler.queue_depth, app="orchestrator")
+    server, inbox = open_ingest(spec, run_id, jobs, results_dir)
+
+    # Sized so the scheduler's limits, not the pool, are the only constraint
+    with ThreadPoolExecutor(max_workers=min(sum(limits.values()), scheduler.max_in_flight) + len(limits)) as executor:
+        providers, setup_errors = await prepare_providers(spec, loop, executor)
+
+        print(f"🚀 {run_id}: {len(jobs)} job(s) across {', '.join(limits)}")
+        probe_timeout = readiness_timeout(spec)
+        pool = None
+        if probe_timeout:
+            from mcbench import ssh
+            pool = ssh.SshPool()
+        finishing = []
+
+        async def worker(job, wait):
+            record = await run_job(job, providers[job["cloud"]], loop, executor, wait, setup_errors.get(job["cloud"]))
+            finishing.append(asyncio.ensure_future(finish_job(record, store, pool, probe_timeout)))
+            return record
+
+        started = time.monotonic()
+        await scheduler.run(jobs, worker)
+        wall_sec = time.monotonic() - started
+        try:
+            records = await asyncio.gather(*finishing)
+        finally:
+            if pool:
+                await pool.close()
+
+    agent = None
+    if inbox:
+        with trace.span("await_agent_results", operation="ingest"):
+            agent = await await_agent_results(spec, jobs, records, inbox)
+        server.shutdown()
+
+    summary = throughput_summary(run_id, records, wall_sec)
+    if agent:
+        summary["agent_results"] = agent
+    with open(os.path.join(results_dir, f"{run_id}.summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+
+    with trace.span("render", operation="summary"):
+        print_summary(records)
+    print(f"\n⏱️ {summary['completed']} job(s) in {wall_sec:.0f}s → {summary['jobs_per_hour']:.1f} jobs/hour "
+          f"(mean queue wait {summary['mean_queue_wait_sec']:.1f}s)")
+    print(f"📁 Results saved to {store.path}")
+
+    with trace.span("history", operation="compare"):
+        compare_with_history(run_id, records, results_dir)
+    return run_id, records
+
+
+def compare_with_history(run_id, records, results_dir=RESULTS_DIR):
+    """Add the run to the history and report regressions against earlier runs"""
+    from mcbench import history
+    with closing(history.connect(os.path.join(results_dir, history.HISTORY_FILE))) as conn:
+        history.record_run(conn, records)
+        if not any(r["status"] == "succeeded" for r in records):
+            return
+        report = history.compare_run(conn, run_id)
+    if any(r["n_baseline"] for r in report):
+        history.print_report(run_id, report)
+        print(f"📁 Report saved to {history.write_report(run_id, report, results_dir)}")
+
+
+def open_ingest(spec, run_id, jobs, results_dir=RESULTS_DIR):
+    """Serve the run's ingest endpoint and tell benchmarked jobs where to push; returns (server, inbox)"""
+    benchmarked = [job for job in jobs if job["benchmark"] is not None]
+    settings = spec.get("ingest")
+    if not benchmarked:
+        return None, None
+    if not settings:
+        print("⚠️ No 'ingest' section in the spec, agent results will stay on the VMs")
+        return None, None
+
+    from mcbench import ingest
+    collector = ingest.Ingest(results_dir)
+    inbox = collector.open_run(run_id, ingest.new_run_token(run_id, results_dir))
+    host, _, port = settings.get("listen", f"0.0.0.0:{ingest.DEFAULT_PORT}").rpartition(":")
+    server = ingest.serve_in_background(collector, host, int(port))
+
+    push_url = f"{settings['public_url'].rstrip('/')}/ingest/{run_id}"
+    for job in benchmarked:
+        job["benchmark"] = {**job["benchmark"], "push_url": push_url, "token": inbox.token}
+    return server, inbox
+
+
+async def await_agent_results(spec, jobs, records, inbox):
+    """Wait (without polling the VMs) until every benchmarked VM has reported, or time out"""
+    benchmarked = {job["job_id"] for job in jobs if job["benchmark"] is not None}
+    expected = {r["job_id"] for r in records if r["status"] == "succeeded" and r["job_id"] in benchmarked}
+    timeout = spec["ingest"].get("timeout_sec", DEFAULT_INGEST_TIMEOUT)
+
+    print(f"\n⏳ Waiting up to {timeout}s for {len(expected)} benchmark result(s)...")
+    missing = await asyncio.to_thread(inbox.wait_for, expected, timeout)
+    if missing:
+        print(f"⚠️ No benchmark result from {len(missing)} VM(s): {', '.join(sorted(missing))}")
+    print(f"📥 {len(expected) - len(missing)} of {len(expected)} benchmark result(s) in {inbox.store.path}")
+    return {"expected": len(expected), "received": len(expected) - len(missing), "missing": sorted(missing)}
+
+
+def throughput_summary(run_id, records, wall_sec):
+    succeeded = [r for r in records if r["status"] == "succeeded"]
+    waits = [r["queue_wait_sec"] for r in records if r.get("queue_wait_sec") is not None]
+    return {
+        "run_id": run_id,
+        "completed": len(records),
+        "succeeded": len(succeeded),
+        "wall_sec": wall_sec,
+        "jobs_per_hour": len(records) / wall_sec * 3600 if wall_sec else 0.0,
+        "succeeded_per_hour": len(succeeded) / wall_sec * 3600 if wall_sec else 0.0,
+        "mean_queue_wait_sec": statistics.mean(waits) if waits else 0.0,
+        "max_queue_wait_sec": max(waits, default=0.0),
+    }
+
+
+async def destroy_run(run_id, results_dir=RESULTS_DIR):
+    """Delete what every job of a run created; failed jobs too, as they can leave resources behind"""
+    records = load_records(os.path.join(results_dir, f"{run_id}.jsonl"))
+    with open(os.path.join(results_dir, f"{run_id}.spec.json")) as f:
+        spec = json.load(f)
+
+    loop = asyncio.get_running_loop()
+    limits = {cloud: cloud_concurrency(spec, cloud) for cloud in spec["clouds"]}
+    with ThreadPoolExecutor(max_workers=sum(limits.values()) + len(limits)) as executor:
+        providers, setup_errors = await prepare_providers(spec, loop, executor)
+        semaphores = {cloud: asyncio.Semaphore(limit) for cloud, limit in limits.items()}
+
+        async def destroy(record):
+            if setup_errors.get(record["cloud"]):
+                return record, False
+            async with semaphores[record["cloud"]]:
+                try:
+                    with trace.span("destroy", cloud=record["cloud"], region=record["region"], operation="destroy"):
+                        return record, await loop.run_in_executor(
+                            executor, trace.in_context(providers[record["cloud"]].destroy), record)
+                except Exception as e:
+                    print(f"⚠️ [{record['cloud']}] could not delete {record['vm_name'] or record['job_id']}: {e}")
+                    return record, False
+
+        outcomes = await asyncio.gather(*(destroy(r) for r in records))
+
+    remaining = [r for r, ok in outcomes if not ok]
+    print(f"🗑️ Cleaned up {len(outcomes) - len(remaining)} of {len(outcomes)} job(s) from {run_id}")
+    return remaining
+
+
+def print_summary(records):
+    rows = [
+        [r["cloud"], r["region"], r.get("zone") or "-", r["size"], r["image"], r.get("repetition", 0),
+         f"{r['provision_sec']:.2f}" if r["provision_sec"] is not None else "-",
+         "✅" if r["status"] == "succeeded" else "❌"]
+        for r in sorted(records, key=lambda r: (r["cloud"], r["region"], r["size"], r.get("repetition", 0)))
+    ]
+    print("\n📋 Benchmark Summary:\n")
+    print(tabulate(rows, headers=["Cloud", "Region", "Zone", "Size", "Image", "Rep", "Provision s", "Status"], tablefmt="grid"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one benchmark spec across Azure, AWS and GCP")
+    parser.add_argument("--trace", metavar="PREFIX", help="write spans to PREFIX.trace.json and PREFIX.otlp.json")
+    parser.add_argument("--profile", metavar="DIR", help="with --trace, also cProfile each stage into DIR")
+    sub = parser.add_subparsers(dest="command", required=True)
+    deploy = sub.add_parser("deploy", help="provision every job of a spec")
+    deploy.add_argument("spec")
+    deploy.add_argument("--run-id")
+    destroy = sub.add_parser("destroy", help="delete the VMs of a previous run")
+    destroy.add_argument("run_id")
+    args = parser.parse_args()
+    if args.trace:
+        trace.enable(args.trace, args.profile)
+
+    if args.command == "deploy":
+        run_id = args.run_id or new_run_id()
+        with trace.stage("deploy", run_id=run_id):
+            asyncio.run(run_benchmark(load_spec(args.spec), run_id))
+    else:
+        with trace.stage("cleanup", run_id=args.run_id):
+            asyncio.run(destroy_run(args.run_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""
+Cloud providers behind one interface (see base.Provider).
+
+Provider modules are imported only when their cloud is used, so a spec
+that only targets GCP never imports the Azure or AWS SDKs.
+"""
+import importlib
+
+PROVIDERS = {
+    "azure": ("mcbench.providers.azure", "AzureProvider"),
+    "aws": ("mcbench.providers.aws", "AwsProvider"),
+    "gcp": ("mcbench.providers.gcp", "GcpProvider"),
+}
+
+
+def get_provider(cloud, settings):
+    module_name, class_name = PROVIDERS[cloud]
+    return getattr(importlib.import_module(module_name), class_name)(settings)
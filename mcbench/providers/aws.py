@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from mcbench import trace
+from mcbench._scripts import AWS_DIR, load_script
+from mcbench.providers.base import Provider
+from mcbench.results import make_record
+from mcbench.userdata import user_data_for
+
+
+def resolve_ami(image, region):
+    """Plain AMI id, or {"ami": {region: ami_id}, "architecture": ...}"""
+    if isinstance(image, dict):
+        try:
+            return image["ami"][region], image.get("architecture", "x86_64")
+        except KeyError:
+            raise ValueError(f"No AMI configured for {region} in image '{image.get('name')}'")
+    return image, "x86_64"
+
+
+def local_to_utc(local_iso):
+    # aws-deploy.py stamps times with datetime.fromtimestamp (local time)
+    return datetime.fromisoformat(local_iso).astimezone(timezone.utc).isoformat()
+
+
+class AwsProvider(Provider):
+    name = "aws"
+
+    def prepare(self):
+        trace.instrument_boto3()
+        self.deploy = load_script(AWS_DIR, "aws-deploy.py", "aws_deploy")
+        self.destroyer = load_script(AWS_DIR, "aws-destroy.py", "aws_destroy")
+
+    def provision(self, job):
+        record = make_record(job)
+        try:
+            ami_id, architecture = resolve_ami(job["image_spec"], job["region"])
+            deployed, times = self.deploy.deploy_region({
+                "region": job["region"],
+                "ami_id": ami_id,
+                "instance_type": job["size"],
+                "architecture": architecture,
+                "user_data": user_data_for(job),
+                "run_id": job["run_id"],
+            })
+        except Exception as e:
+            record.update(status="failed", error=str(e))
+            return record
+
+        record.update(
+            vm_name=deployed["InstanceId"],
+            resource_id=deployed["InstanceId"],
+            public_ip=deployed.get("PublicIp"),
+            status="failed" if deployed["Failed"] else "succeeded",
+            start_time=local_to_utc(times["StartTime"]),
+            end_time=local_to_utc(times["EndTime"]),
+            provision_sec=None if deployed["Failed"] else times["ElapsedSeconds"],
+            error="deployment failed, see log" if deployed["Failed"] else None,
+            extra={"aws": deployed},
+        )
+        return record
+
+    def destroy(self, record):
+        deployed = record["extra"].get("aws")
+        if not deployed:
+            return True  # failed before aws-deploy.py created anything
+        info = self.destroyer.destroy_resource(deployed)
+        return not any("failed" in status for status in info["Status"])
@@ -0,0 +1,77 @@
+import uuid
+from datetime import datetime, timezone
+from mcbench import trace
+from mcbench._scripts import AZURE_DIR, load_script
+from mcbench.providers.base import Provider
+from mcbench.results import make_record
+from mcbench.userdata import user_data_for
+
+
+def parse_image(image):
+    """'Publisher:Offer:Sku[:Version]' (as in fetch_vm_data.PINNED_IMAGES) or a dict"""
+    if isinstance(image, dict):
+        return {"version": "latest", **image}
+    parts = image.split(":")
+    if len(parts) not in (3, 4):
+        raise ValueError(f"Azure image '{image}' must be Publisher:Offer:Sku[:Version]")
+    publisher, offer, sku = parts[:3]
+    return {"publisher": publisher, "offer": offer, "sku": sku, "version": parts[3] if len(parts) == 4 else "latest"}
+
+
+def as_utc(naive_utc_iso):
+    return datetime.fromisoformat(naive_utc_iso).replace(tzinfo=timezone.utc).isoformat()
+
+
+class AzureProvider(Provider):
+    name = "azure"
+
+    def prepare(self):
+        self.deploy = load_script(AZURE_DIR, "deploy_VMs.py", "azure_deploy_vms")
+        trace.instrument_azure()
+        self.cleanup = load_script(AZURE_DIR, "cleanup.py", "azure_cleanup")
+        self.credential = self.deploy.get_credentials()
+        self.subscription_id = self.settings.get("subscription_id")
+        if not self.subscription_id:
+            from azure.mgmt.subscription import SubscriptionClient
+            subscriptions = list(SubscriptionClient(self.credential).subscriptions.list())
+            if not subscriptions:
+                raise RuntimeError("No Azure subscriptions found. Please log in with 'az login'.")
+            self.subscription_id = subscriptions[0].subscription_id
+
+    def provision(self, job):
+        suffix = uuid.uuid4().hex[:6]
+        resource_group = f"Bench-{job['region']}-{suffix}"
+        vm_name = f"bench-{suffix}"
+        record = make_record(job, vm_name=vm_name, resource_id=resource_group,
+                             extra={"resource_group": resource_group})
+        try:
+            entry = self.deploy.create_infrastructure(
+                credential=self.credential,
+                subscription_id=self.subscription_id,
+                resource_group_name=resource_group,
+                location=job["region"],
+                vm_name=vm_name,
+                vm_size=job["size"],
+                vm_image=parse_image(job["image_spec"]),
+                log_to_files=False,
+                custom_data=user_data_for(job),
+                run_id=job["run_id"]
+            )
+        except Exception as e:
+            record.update(status="failed", error=str(e))
+            return record
+
+        record.update(
+            status="succeeded",
+            public_ip=entry.get("public_ip"),
+            start_time=as_utc(entry["start_time_utc"]),
+            end_time=as_utc(entry["end_time_utc"]),
+            provision_sec=entry["duration_seconds"],
+        )
+        return record
+
+    def destroy(self, record):
+        return self.cleanup.delete_resource_group_async(
+            self.credential, self.subscription_id,
+            record["extra"]["resource_group"], record["region"]
+        )
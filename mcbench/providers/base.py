@@ -0,0 +1,21 @@
+class Provider:
+    """Blocking provisioning interface; the orchestrator runs it on worker threads.
+
+    `provision` and `destroy` must be safe to call from several threads at once.
+    """
+
+    name = None
+
+    def __init__(self, settings):
+        self.settings = settings
+
+    def prepare(self):
+        """One-time setup: load the cloud's scripts, resolve credentials"""
+
+    def provision(self, job):
+        """Create one VM for `job` and return a results.make_record() dict"""
+        raise NotImplementedError
+
+    def destroy(self, record):
+        """Delete everything `provision` created for `record`; returns True on success"""
+        raise NotImplementedError
@@ -0,0 +1,58 @@
+from mcbench import trace
+from mcbench._scripts import GCP_DIR, load_script
+from mcbench.providers.base import Provider
+from mcbench.results import make_record
+from mcbench.userdata import user_data_for
+
+
+class GcpProvider(Provider):
+    name = "gcp"
+
+    def prepare(self):
+        self.deploy = load_script(GCP_DIR, "deploy.py", "gcp_deploy")
+        self.gcp_client = self.deploy.gcp_client
+        trace.instrument_gcp(self.gcp_client)
+        self.history = self.deploy.ZoneHistory()
+        self.zone_catalog = self.deploy.ZoneCatalog()
+        self.deploy.warn_without_ssh_key()
+        self.gcp_client.get_project()  # fail fast without credentials
+
+    def provision(self, job):
+        details = self.deploy.deploy_one({
+            "region": job["region"],
+            "image": job["image_spec"],
+            "machine_type": job["size"],
+            "startup_script": user_data_for(job),
+            "run_id": job["run_id"],
+        }, self.history, self.zone_catalog)
+
+        failed = details.get("failed", False)
+        return make_record(
+            job,
+            zone=details.get("zone"),
+            vm_name=details["vm_name"],
+            resource_id=details["vm_name"],
+            public_ip=details.get("external_ip"),
+            status="failed" if failed else "succeeded",
+            start_time=details.get("start_time"),
+            end_time=details.get("end_time"),
+            provision_sec=details.get("deployment_time_sec"),
+            error=str(details["error"]) if failed else None,
+            extra={"operation": details.get("operation"), "failed_attempts": details["failed_attempts"]},
+        )
+
+    def destroy(self, record):
+        from googleapiclient.errors import HttpError
+        if not record.get("zone"):
+            return True  # failed before any zone was tried
+        compute = self.gcp_client.compute()
+        try:
+            op = self.gcp_client.execute(compute.instances().delete(
+                project=self.gcp_client.get_project(), zone=record["zone"], instance=record["vm_name"]
+            ))
+        except HttpError as e:
+            if e.resp.status == 404:
+                return True  # already deleted, or never created
+            raise
+        op = self.gcp_client.wait_zone_operation(op, zone=record["zone"])
+        return not op.get("error")
@@ -0,0 +1,168 @@
+"""
+Guest readiness after the control plane reports success.
+
+"running" (AWS waiter, Azure LRO, GCE operation DONE) does not mean the VM
+is usable. For each VM this measures, in order:
+
+- tcp_ready_sec:   TCP port 22 accepts connections
+- ssh_banner_sec:  sshd sends its "SSH-" banner
+- cloud_init_sec:  `cloud-init status --wait` returns (None on images
+                   without cloud-init, e.g. GCE Debian)
+
+each as seconds after the control plane's end_time. cloud-init finishes
+after the user-data script, so with a spec "benchmark" cloud_init_sec
+includes the agent's run. Connection attempts
+are started every PROBE_INTERVAL without waiting for earlier ones to time
+out (a booting VM often just drops SYNs), so the resolution is sub-second.
+All VMs are probed concurrently on the event loop.
+
+    python -m mcbench.readiness --aws      (VMs just deployed by aws-deploy.py)
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from tabulate import tabulate
+from mcbench import ssh
+
+PROBE_INTERVAL = 0.25
+ATTEMPT_TIMEOUT = 2
+DEFAULT_READY_TIMEOUT = 600
+CLOUD_INIT_WAIT = "command -v cloud-init >/dev/null 2>&1 || exit 127; cloud-init status --wait >/dev/null"
+NO_CLOUD_INIT = 127
+PHASES = ("tcp_ready_sec", "ssh_banner_sec", "cloud_init_sec")
+
+
+async def first_success(attempt, deadline):
+    """Start `attempt()` every PROBE_INTERVAL until one returns a timestamp; None at the deadline"""
+    tasks = set()
+    try:
+        while time.monotonic() < deadline:
+            tasks.add(asyncio.ensure_future(attempt()))
+            done, tasks = await asyncio.wait(tasks, timeout=PROBE_INTERVAL, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None and task.result():
+                    return task.result()
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def tcp_open(host, port):
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), ATTEMPT_TIMEOUT)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    at = datetime.now(timezone.utc)
+    writer.close()
+    return at
+
+
+async def ssh_banner(host, port):
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), ATTEMPT_TIMEOUT)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    try:
+        line = await asyncio.wait_for(reader.readline(), ATTEMPT_TIMEOUT)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    finally:
+        writer.close()
+    return datetime.now(timezone.utc) if line.startswith(b"SSH-") else None
+
+
+async def cloud_init_done(target, pool, deadline):
+    """(finished_at, status): status is "done", "error", "absent" or the failure"""
+    try:
+        conn = await pool.get(target, max(1, deadline - time.monotonic()))
+        completed = await asyncio.wait_for(conn.run(CLOUD_INIT_WAIT, check=False),
+                                           max(1, deadline - time.monotonic()))
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+    if completed.exit_status == NO_CLOUD_INIT:
+        return None, "absent"
+    return datetime.now(timezone.utc), "done" if completed.exit_status == 0 else "error"
+
+
+async def probe(target, since, timeout=DEFAULT_READY_TIMEOUT, pool=None):
+    """Readiness phases of one VM as seconds after `since` (the control plane's end time)"""
+    deadline = time.monotonic() + timeout
+    host, port = target["host"], target.get("port", 22)
+    phases = dict.fromkeys(PHASES)
+    phases["cloud_init_status"] = None
+
+    def after(at):
+        return None if at is None else (at - since).total_seconds()
+
+    tcp_at = await first_success(lambda: tcp_open(host, port), deadline)
+    phases["tcp_ready_sec"] = after(tcp_at)
+    if tcp_at is None:
+        return phases
+    banner_at = await first_success(lambda: ssh_banner(host, port), deadline)
+    phases["ssh_banner_sec"] = after(banner_at)
+    if banner_at is None or pool is None:
+        return phases
+    done_at, phases["cloud_init_status"] = await cloud_init_done(target, pool, deadline)
+    phases["cloud_init_sec"] = after(done_at)
+    return phases
+
+
+def control_plane_end(record):
+    end = record.get("end_time")
+    if not end:
+        return datetime.now(timezone.utc)
+    stamp = end if isinstance(end, datetime) else datetime.fromisoformat(str(end))
+    return stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)
+
+
+async def probe_record(record, pool, timeout=DEFAULT_READY_TIMEOUT):
+    """Add the readiness phases to a succeeded result record in place"""
+    if record["status"] != "succeeded" or not record.get("public_ip"):
+        return record
+    phases = await probe(ssh.record_target(record), control_plane_end(record), timeout, pool)
+    record["extra"]["cloud_init_status"] = phases.pop("cloud_init_status")
+    record.update(phases)
+    return record
+
+
+def print_phases(rows):
+    def fmt(value):
+        return "-" if value is None else f"{value:.2f}"
+    print(tabulate([[name, host, *(fmt(p[k]) for k in PHASES), p["cloud_init_status"] or "-"]
+                    for name, host, p in rows],
+                   headers=["VM", "Host", "TCP 22 s", "SSH banner s", "cloud-init s", "cloud-init"],
+                   tablefmt="grid"))
+
+
+async def probe_targets(targets, timeout=DEFAULT_READY_TIMEOUT):
+    """Probe deployment-file targets from now (their control plane end time is not recorded there)"""
+    pool = ssh.SshPool()
+    now = datetime.now(timezone.utc)
+    try:
+        results = await asyncio.gather(*(probe(t, now, timeout, pool) for t in targets))
+    finally:
+        await pool.close()
+    return [(t["name"], t["host"], p) for t, p in zip(targets, results)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time until freshly deployed VMs accept SSH and finish cloud-init")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--aws", action="store_true")
+    source.add_argument("--azure", action="store_true")
+    source.add_argument("--gcp", action="store_true")
+    parser.add_argument("--timeout", type=int, default=DEFAULT_READY_TIMEOUT)
+    args = parser.parse_args()
+
+    targets = ssh.aws_targets() if args.aws else ssh.azure_targets() if args.azure else ssh.gcp_targets()
+    if not targets:
+        print("⚠️ No reachable VMs found (is there a public IP in the deployment file?)")
+        return
+    print(f"⏱️ Probing {len(targets)} VM(s) (times are seconds from now)...")
+    print_phases(asyncio.run(probe_targets(targets, args.timeout)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+"""
+Orphan reaper.
+
+Local tracking files get lost, so this finds leftover benchmark resources
+in the clouds themselves. All three clouds, and every region of each, are
+scanned concurrently for resources that are
+
+- tagged (GCP: labelled) mcbench-run-id, as everything the deploy scripts
+  and the orchestrator create now is, or
+- named like the scripts name them (temp-sg-* / temp-key-* and instances
+  using a temp-key-* key pair in AWS, Bench-* resource groups in Azure,
+  auto-vm-* instances in GCP), for resources created before tagging.
+
+GCP firewall rules cannot be labelled; mcbench-mesh* rules that
+mcbench/mesh.py could not delete are found by name.
+
+Resources older than the TTL are deleted in batches: one terminate call per
+AWS region, one batched HTTP request per GCP zone (delete_VM.py), all
+Azure resource group deletes in flight at once. The age comes from the
+mcbench-created tag, else from the cloud's own creation time; resources
+whose age cannot be told are only listed unless --include-unknown-age.
+
+There is no price source in this repo, so the savings are reported in
+VM-hours: how long the orphaned VMs had been running, and the VM-hours
+per day deleting them saves. A report goes to results/reaper-<time>.json.
+
+    python -m mcbench.reaper                              # dry run, all clouds, TTL 6h
+    python -m mcbench.reaper --ttl-hours 2 --delete
+    python -m mcbench.reaper --clouds aws gcp --keep-run run-20250101-120000-ab12 --delete
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from tabulate import tabulate
+from mcbench._scripts import GCP_DIR, load_script
+from mcbench.results import RESULTS_DIR
+
+TAG_RUN_ID = "mcbench-run-id"
+TAG_CREATED = "mcbench-created"
+DEFAULT_TTL_HOURS = 6
+SCAN_CONCURRENCY = 32
+AWS_TERMINATE_BATCH = 500
+AWS_SG_PREFIX = "temp-sg-"
+AWS_KEY_PREFIX = "temp-key-"
+AZURE_RG_PREFIX = "Bench-"
+GCP_VM_PREFIX = "auto-vm-"
+GCP_FIREWALL_PREFIX = "mcbench-mesh"
+GCP_NETWORK_TAG = "mcbench"  # network tag on every benchmark VM, the target of mesh firewall rules
+CLOUDS = ("aws", "azure", "gcp")
+
+
+def run_tags(run_id=None):
+    """Tags (GCP labels) for a resource created now; every value is a valid GCP label value"""
+    tags = {TAG_CREATED: str(int(time.time()))}
+    if run_id:
+        tags[TAG_RUN_ID] = run_id
+    return tags
+
+
+def orphan(cloud, region, kind, resource_id, name, tags, created, vms=(), **extra):
+    return {"cloud": cloud, "region": region, "kind": kind, "id": resource_id, "name": name,
+            "run_id": tags.get(TAG_RUN_ID), "created": created_at(tags, created), "vms": list(vms), **extra}
+
+
+def created_at(tags, fallback=None):
+    """Epoch seconds from the mcbench-created tag, else the cloud's creation time (datetime or epoch)"""
+    try:
+        return float(tags[TAG_CREATED])
+    except (KeyError, ValueError):
+        pass
+    if isinstance(fallback, datetime):
+        return fallback.timestamp()
+    return fallback
+
+
+def chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# ---------- AWS ----------
+
+def aws_regions():
+    import boto3
+    return [r["RegionName"] for r in boto3.client("ec2").describe_regions()["Regions"]]
+
+
+def name_time(name, prefix):
+    """temp-sg-<epoch>-<hex>: aws-deploy.py puts the creation time in the name"""
+    try:
+        return float(name[len(prefix):].split("-")[0])
+    except ValueError:
+        return None
+
+
+def scan_aws_region(region):
+    import boto3
+    ec2 = boto3.client("ec2", region_name=region)
+    found = []
+
+    pages = ec2.get_paginator("describe_instances").paginate(Filters=[
+        {"Name": "instance-state-name", "Values": ["pending", "running", "stopping", "stopped"]}])
+    for page in pages:
+        for reservation in page["Reservations"]:
+            for instance in reservation["Instances"]:
+                tags = {t["Key"]: t["Value"] for t in instance.get("Tags", [])}
+                if TAG_RUN_ID in tags or (instance.get("KeyName") or "").startswith(AWS_KEY_PREFIX):
+                    found.append(orphan("aws", region, "instance", instance["InstanceId"], instance["InstanceId"],
+                                        tags, instance["LaunchTime"], [instance["InstanceType"]]))
+
+    for page in ec2.get_paginator("describe_security_groups").paginate():
+        for group in page["SecurityGroups"]:
+            tags = {t["Key"]: t["Value"] for t in group.get("Tags", [])}
+            if TAG_RUN_ID in tags or group["GroupName"].startswith(AWS_SG_PREFIX):
+                found.append(orphan("aws", region, "security_group", group["GroupId"], group["GroupName"],
+                                    tags, name_time(group["GroupName"], AWS_SG_PREFIX)))
+
+    for pair in ec2.describe_key_pairs()["KeyPairs"]:
+        tags = {t["Key"]: t["Value"] for t in pair.get("Tags", [])}
+        if TAG_RUN_ID in tags or pair["KeyName"].startswith(AWS_KEY_PREFIX):
+            found.append(orphan("aws", region, "key_pair", pair["KeyName"], pair["KeyName"],
+                                tags, pair.get("CreateTime")))
+    return found
+
+
+def scan_aws(executor):
+    return [o for found in executor.map(scan_aws_region, aws_regions()) for o in found]
+
+
+def reap_aws_region(region, orphans):
+    """Terminate all instances in batched calls, wait once, then delete security groups and key pairs"""
+    import boto3
+    from botocore.exceptions import ClientError
+    ec2 = boto3.client("ec2", region_name=region)
+    outcomes = []
+
+    instances = [o for o in orphans if o["kind"] == "instance"]
+    terminated = []
+    for batch in chunks(instances, AWS_TERMINATE_BATCH):
+        try:
+            ec2.terminate_instances(InstanceIds=[o["id"] for o in batch])
+            terminated += batch
+        except ClientError as e:
+            outcomes += [(o, str(e)) for o in batch]
+    if terminated:
+        try:
+            # Security groups cannot be deleted while an instance still uses them
+            ec2.get_waiter("instance_terminated").wait(InstanceIds=[o["id"] for o in terminated])
+        except Exception as e:
+            print(f"⚠️ [aws] {region}: instances still shutting down ({e})")
+    outcomes += [(o, None) for o in terminated]
+
+    for o in orphans:
+        if o["kind"] == "instance":
+            continue
+        try:
+            if o["kind"] == "security_group":
+                ec2.delete_security_group(GroupId=o["id"])
+            else:
+                ec2.delete_key_pair(KeyName=o["id"])
+            outcomes.append((o, None))
+        except ClientError as e:
+            outcomes.append((o, str(e)))
+    return outcomes
+
+
+def reap_aws(orphans, executor):
+    regions = defaultdict(list)
+    for o in orphans:
+        regions[o["region"]].append(o)
+    return [outcome for outcomes in executor.map(lambda r: reap_aws_region(r, regions[r]), regions)
+            for outcome in outcomes]
+
+
+# ---------- Azure ----------
+
+def azure_subscriptions(credential):
+    from azure.mgmt.subscription import SubscriptionClient
+    return [s.subscription_id for s in SubscriptionClient(credential).subscriptions.list()]
+
+
+def scan_azure(executor):
+    from azure.identity import AzureCliCredential
+    from azure.mgmt.compute import ComputeManagementClient
+    from azure.mgmt.resource import ResourceManagementClient
+
+    credential = AzureCliCredential()
+    found = []
+    for subscription_id in azure_subscriptions(credential):
+        resource_client = ResourceManagementClient(credential, subscription_id)
+        groups = [g for g in resource_client.resource_groups.list()
+                  if TAG_RUN_ID in (g.tags or {}) or g.name.startswith(AZURE_RG_PREFIX)]
+        vms = defaultdict(list)
+        for vm in ComputeManagementClient(credential, subscription_id).virtual_machines.list_all():
+            vms[vm.id.split("/")[4].lower()].append(vm.hardware_profile.vm_size)
+
+        def oldest_resource(group):
+            # Untagged groups: age of their oldest resource (an empty group has no age)
+            times = [r.created_time for r in resource_client.resources.list_by_resource_group(
+                group.name, expand="createdTime") if r.created_time]
+            return min(times) if times else None
+
+        fallbacks = executor.map(lambda g: None if TAG_CREATED in (g.tags or {}) else oldest_resource(g), groups)
+        for group, fallback in zip(groups, fallbacks):
+            found.append(orphan("azure", group.location, "resource_group", group.name, group.name, group.tags or {},
+                                fallback, vms[group.name.lower()], subscription_id=subscription_id))
+    return found
+
+
+def reap_azure(orphans, executor):
+    """Start every resource group delete, then wait for all of them"""
+    from azure.identity import AzureCliCredential
+    from azure.mgmt.resource import ResourceManagementClient
+
+    credential = AzureCliCredential()
+
+    def begin(o):
+        try:
+            return ResourceManagementClient(credential, o["subscription_id"]).resource_groups.begin_delete(o["id"])
+        except Exception as e:
+            return e
+
+    def wait(o, poller):
+        if isinstance(poller, Exception):
+            return o, str(poller)
+        try:
+            poller.result()
+            return o, None
+        except Exception as e:
+            return o, str(e)
+
+    pollers = list(executor.map(begin, orphans))
+    return list(executor.map(wait, orphans, pollers))
+
+
+# ---------- GCP ----------
+
+def scan_gcp(executor):
+    deploy = load_script(GCP_DIR, "deploy.py", "gcp_deploy")
+    gcp_client = deploy.gcp_client
+    found = []
+    for scope, instances in gcp_client.aggregated_all(
+            gcp_client.compute().instances(), fields="name,labels,creationTimestamp,machineType,zone",
+            project=gcp_client.get_project()):
+        zone = scope.rsplit("/", 1)[-1]
+        for instance in instances:
+            labels = instance.get("labels", {})
+            if TAG_RUN_ID in labels or instance["name"].startswith(GCP_VM_PREFIX):
+                found.append(orphan("gcp", zone.rsplit("-", 1)[0], "instance", instance["name"], instance["name"],
+                                    labels, datetime.fromisoformat(instance["creationTimestamp"]),
+                                    [instance["machineType"].rsplit("/", 1)[-1]], zone=zone))
+    for rule in gcp_client.list_all(gcp_client.compute().firewalls(), fields="name,creationTimestamp",
+                                    project=gcp_client.get_project()):
+        if rule["name"].startswith(GCP_FIREWALL_PREFIX):
+            found.append(orphan("gcp", "global", "firewall", rule["name"], rule["name"], {},
+                                datetime.fromisoformat(rule["creationTimestamp"])))
+    return found
+
+
+def reap_gcp_firewall(o):
+    from googleapiclient.errors import HttpError
+    gcp_client = load_script(GCP_DIR, "gcp_client.py", "gcp_client")
+    try:
+        op = gcp_client.execute(gcp_client.compute().firewalls().delete(
+            project=gcp_client.get_project(), firewall=o["id"]))
+        op = gcp_client.wait_global_operation(op)
+        return o, str(op["error"]) if op.get("error") else None
+    except HttpError as e:
+        return o, None if e.resp.status == 404 else str(e)
+
+
+def reap_gcp(orphans, executor):
+    """One batched delete request per zone (delete_VM.py), zones in parallel; then the firewall rules"""
+    delete_vm = load_script(GCP_DIR, "delete_VM.py", "gcp_delete_vm")
+    zones = defaultdict(list)
+    for o in orphans:
+        if o["kind"] == "instance":
+            zones[o["zone"]].append({"vm_name": o["id"], "zone": o["zone"]})
+
+    async def reap_all():
+        semaphore = asyncio.Semaphore(delete_vm.MAX_ZONE_CONCURRENCY)
+        return await asyncio.gather(*(delete_vm.delete_zone(z, deps, semaphore) for z, deps in zones.items()))
+
+    outcomes = []
+    by_name = {o["id"]: o for o in orphans}
+    for deleted, remaining in asyncio.run(reap_all()):
+        outcomes += [(by_name[d["vm_name"]], None) for d in deleted]
+        outcomes += [(by_name[r["vm_name"]], str(r["delete_error"])) for r in remaining]
+    outcomes += executor.map(reap_gcp_firewall, [o for o in orphans if o["kind"] == "firewall"])
+    return outcomes
+
+
+SCANNERS = {"aws": scan_aws, "azure": scan_azure, "gcp": scan_gcp}
+REAPERS = {"aws": reap_aws, "azure": reap_azure, "gcp": reap_gcp}
+
+
+def scan(clouds, concurrency=SCAN_CONCURRENCY):
+    """Orphan candidates of every cloud, scanned concurrently; a cloud that cannot be scanned is reported"""
+
+    def scan_cloud(cloud):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            try:
+                return SCANNERS[cloud](executor)
+            except Exception as e:
+                print(f"⚠️ [{cloud}] scan failed: {e}")
+                return []
+
+    with ThreadPoolExecutor(max_workers=len(clouds)) as executor:
+        return [o for found in executor.map(scan_cloud, clouds) for o in found]
+
+
+def expired(orphans, ttl_hours, keep_runs=(), include_unknown_age=False, now=None):
+    now = now or time.time()
+    return [o for o in orphans if o["run_id"] not in keep_runs and (
+        now - o["created"] >= ttl_hours * 3600 if o["created"] is not None else include_unknown_age)]
+
+
+def reap(orphans, concurrency=SCAN_CONCURRENCY):
+    """Delete the orphans, every cloud at once; returns [(orphan, error or None)]"""
+    by_cloud = defaultdict(list)
+    for o in orphans:
+        by_cloud[o["cloud"]].append(o)
+
+    def reap_cloud(cloud):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            try:
+                return REAPERS[cloud](by_cloud[cloud], executor)
+            except Exception as e:
+                print(f"⚠️ [{cloud}] delete failed: {e}")
+                return [(o, str(e)) for o in by_cloud[cloud]]
+
+    with ThreadPoolExecutor(max_workers=max(1, len(by_cloud))) as executor:
+        return [outcome for outcomes in executor.map(reap_cloud, by_cloud) for outcome in outcomes]
+
+
+def age_hours(o, now):
+    return None if o["created"] is None else (now - o["created"]) / 3600
+
+
+def savings(outcomes, now=None):
+    """VM-hours by cloud: how long the deleted VMs had run and what they would have cost per day"""
+    now = now or time.time()
+    summary = defaultdict(lambda: {"deleted": 0, "failed": 0, "vms": 0, "vm_hours_leaked": 0.0,
+                                   "vm_hours_saved_per_day": 0})
+    for o, error in outcomes:
+        s = summary[o["cloud"]]
+        if error:
+            s["failed"] += 1
+            continue
+        s["deleted"] += 1
+        s["vms"] += len(o["vms"])
+        s["vm_hours_leaked"] += len(o["vms"]) * (age_hours(o, now) or 0)
+        s["vm_hours_saved_per_day"] += 24 * len(o["vms"])
+    return dict(summary)
+
+
+def print_orphans(orphans, now=None):
+    now = now or time.time()
+    rows = [[o["cloud"], o["region"], o["kind"], o["name"], o["run_id"] or "-",
+             "?" if o["created"] is None else f"{age_hours(o, now):.1f}", ", ".join(o["vms"]) or "-"]
+            for o in sorted(orphans, key=lambda o: (o["cloud"], o["region"], o["kind"], o["name"]))]
+    print(tabulate(rows, headers=["Cloud", "Region", "Kind", "Name", "Run", "Age h", "VMs"], tablefmt="grid"))
+
+
+def print_savings(summary):
+    rows = [[cloud, s["deleted"], s["failed"], s["vms"], f"{s['vm_hours_leaked']:.1f}", s["vm_hours_saved_per_day"]]
+            for cloud, s in sorted(summary.items())]
+    print("\n💰 Reaper Summary:\n")
+    print(tabulate(rows, headers=["Cloud", "Deleted", "Failed", "VMs", "VM-hours leaked", "VM-hours saved/day"],
+                   tablefmt="grid"))
+
+
+def save_report(report, results_dir=RESULTS_DIR):
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"reaper-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find and delete leaked benchmark resources in every cloud")
+    parser.add_argument("--clouds", nargs="+", choices=CLOUDS, default=list(CLOUDS))
+    parser.add_argument("--ttl-hours", type=float, default=DEFAULT_TTL_HOURS,
+                        help="only resources older than this are reaped")
+    parser.add_argument("--keep-run", action="append", default=[], metavar="RUN_ID",
+                        help="never reap this run's resources (repeatable)")
+    parser.add_argument("--include-unknown-age", action="store_true",
+                        help="also reap pattern matches whose age cannot be told")
+    parser.add_argument("--delete", action="store_true", help="delete them (default: only list)")
+    parser.add_argument("--concurrency", type=int, default=SCAN_CONCURRENCY)
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    print(f"🔍 Scanning {', '.join(args.clouds)} for benchmark resources ...")
+    candidates = scan(args.clouds, args.concurrency)
+    now = time.time()
+    targets = expired(candidates, args.ttl_hours, set(args.keep_run), args.include_unknown_age, now)
+    print(f"Found {len(candidates)} benchmark resource(s), {len(targets)} older than {args.ttl_hours:g}h")
+    if not targets:
+        return
+    print_orphans(targets, now)
+
+    if not args.delete:
+        print("\nDry run: rerun with --delete to remove them.")
+        outcomes = []
+    else:
+        print(f"\n🗑️ Deleting {len(targets)} resource(s) ...")
+        outcomes = reap(targets, args.concurrency)
+        for o, error in outcomes:
+            if error:
+                print(f"⚠️ [{o['cloud']}] could not delete {o['kind']} {o['name']}: {error}")
+        print_savings(savings(outcomes, now))
+
+    path = save_report({"scanned_at": now, "ttl_hours": args.ttl_hours, "clouds": args.clouds,
+                        "orphans": targets, "deleted": args.delete,
+                        "outcomes": [{**o, "error": error} for o, error in outcomes],
+                        "savings": savings(outcomes, now)}, args.results_dir)
+    print(f"📁 Report saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
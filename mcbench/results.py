@@ -0,0 +1,85 @@
+"""
+Normalized result schema and the on-disk results store.
+
+Every provider returns the same record shape regardless of cloud:
+
+    run_id, job_id, cloud, region, zone, size, image, repetition,
+    vm_name, resource_id, public_ip, status ("succeeded" | "failed"),
+    start_time, end_time, provision_sec, dispatched_at, queue_wait_sec,
+    tcp_ready_sec, ssh_banner_sec, cloud_init_sec, error, extra
+
+`provision_sec` is what the cloud took; `queue_wait_sec` is how long the
+job waited for a scheduler slot and is never folded into it. The
+*_ready/banner/cloud_init phases are measured after end_time by
+mcbench/readiness.py when the spec asks for them.
+
+Records for a run are appended to results/<run_id>.jsonl as each job
+finishes, so a crash never loses completed jobs. The in-guest benchmark
+results pushed by the VMs go to results/<run_id>.agent.jsonl, VM-to-VM
+mesh tests to results/<run_id>.mesh.jsonl.
+"""
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+RESULTS_DIR = "results"
+AGENT_RESULTS = "agent"
+MESH_RESULTS = "mesh"
+
+FIELDS = [
+    "run_id", "job_id", "cloud", "region", "zone", "size", "image", "repetition",
+    "vm_name", "resource_id", "public_ip", "status", "start_time", "end_time",
+    "provision_sec", "dispatched_at", "queue_wait_sec",
+    "tcp_ready_sec", "ssh_banner_sec", "cloud_init_sec", "error", "extra",
+]
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def make_record(job, **values):
+    """Start a record from a job and fill in provider-reported values"""
+    record = dict.fromkeys(FIELDS)
+    record.update({
+        "run_id": job["run_id"],
+        "job_id": job["job_id"],
+        "cloud": job["cloud"],
+        "region": job["region"],
+        "size": job["size"],
+        "image": job["image"],
+        "repetition": job.get("repetition", 0),
+        "dispatched_at": job.get("dispatched_at"),
+        "extra": {},
+    })
+    record.update(values)
+    return record
+
+
+class ResultsStore:
+    """Append-only JSONL file per run"""
+
+    def __init__(self, run_id, results_dir=RESULTS_DIR, kind=None):
+        os.makedirs(results_dir, exist_ok=True)
+        self.path = results_path(run_id, results_dir, kind)
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+    def records(self):
+        return load_records(self.path)
+
+
+def results_path(run_id, results_dir=RESULTS_DIR, kind=None):
+    return os.path.join(results_dir, f"{run_id}.{kind}.jsonl" if kind else f"{run_id}.jsonl")
+
+
+def load_records(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
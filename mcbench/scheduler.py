@@ -0,0 +1,89 @@
+"""
+Job scheduler for benchmark runs.
+
+Jobs are dispatched when three budgets all have room:
+- per cloud: the cloud's `max_concurrency` (API concurrency)
+- per region: the cloud's `max_per_region` (regional quota headroom)
+- globally: the spec's `max_in_flight` VM budget
+
+The queue is interleaved round-robin across (cloud, region) so one region
+is never hammered while others sit idle, and a job that cannot start yet
+does not block later jobs that can. Time spent waiting for a slot is
+recorded separately from the provider's provisioning time.
+"""
+import asyncio
+import time
+from collections import defaultdict, deque
+from mcbench.results import utcnow
+from mcbench.spec import DEFAULT_MAX_IN_FLIGHT
+
+
+def interleave(jobs):
+    """Round-robin over (cloud, region) queues, preserving order within each"""
+    queues = defaultdict(deque)
+    for job in jobs:
+        queues[(job["cloud"], job["region"])].append(job)
+    ordered = []
+    while queues:
+        for key in list(queues):
+            ordered.append(queues[key].popleft())
+            if not queues[key]:
+                del queues[key]
+    return ordered
+
+
+class Scheduler:
+    def __init__(self, cloud_limits, region_limits, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        self.cloud_limits = cloud_limits
+        self.region_limits = region_limits
+        self.max_in_flight = max_in_flight
+        self.by_cloud = defaultdict(int)
+        self.by_region = defaultdict(int)
+        self.in_flight = 0
+        self._pending = []
+
+    def has_room(self, job):
+        cloud, region = job["cloud"], job["region"]
+        return (self.in_flight < self.max_in_flight
+                and self.by_cloud[cloud] < self.cloud_limits[cloud]
+                and self.by_region[(cloud, region)] < self.region_limits[cloud])
+
+    def _take(self, job):
+        self.in_flight += 1
+        self.by_cloud[job["cloud"]] += 1
+        self.by_region[(job["cloud"], job["region"])] += 1
+
+    def _release(self, job):
+        self.in_flight -= 1
+        self.by_cloud[job["cloud"]] -= 1
+        self.by_region[(job["cloud"], job["region"])] -= 1
+
+    def queue_depth(self):
+        return len(self._pending)
+
+    async def run(self, jobs, worker):
+        """Run `await worker(job, queue_wait_sec)` for every job; returns results in completion order"""
+        self._pending = interleave(jobs)
+        queued_at = time.monotonic()
+        running = {}
+        results = []
+
+        while self._pending or running:
+            for job in list(self._pending):
+                if self.has_room(job):
+                    self._pending.remove(job)
+                    self._take(job)
+                    wait = time.monotonic() - queued_at
+                    job["dispatched_at"] = utcnow().isoformat()
+                    running[asyncio.ensure_future(worker(job, wait))] = job
+
+            if not running:
+                # Nothing can ever start (e.g. a zero limit); fail loudly instead of spinning
+                raise RuntimeError(f"{len(self._pending)} job(s) can never be scheduled; check the spec limits")
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                self._release(running.pop(task))
+                results.append(task.result())
+
+        return results
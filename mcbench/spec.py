@@ -0,0 +1,162 @@
+"""
+Benchmark spec: one JSON file describing clouds × regions × sizes × images.
+
+    {
+        "name": "weekly-small-vms",
+        "repetitions": 3,                            (per cell, default 1)
+        "max_in_flight": 20,                         (global VM budget)
+        "benchmark": {"duration": 10,                (run mcbench/agent.py on each VM at
+                      "tests": ["cpu", "disk"]},      first boot; true for the defaults)
+        "readiness": {"timeout_sec": 600},            (probe TCP 22 / SSH banner / cloud-init
+                                                      after provisioning; true for defaults)
+        "ingest": {"public_url": "http://203.0.113.10:8787",   (where the VMs push results;
+                   "listen": "0.0.0.0:8787",             served by the orchestrator)
+                   "timeout_sec": 1800},
+        "clouds": {
+            "azure": {
+                "subscription_id": "...",            (optional, first subscription otherwise)
+                "regions": ["eastus", "westeurope"],
+                "sizes": ["Standard_B1s"],
+                "images": ["Canonical:0001-com-ubuntu-server-jammy:22_04-lts-gen2"],
+                "max_concurrency": 4,                (concurrent API calls/VMs for this cloud)
+                "max_per_region": 2                  (per-region quota headroom)
+            },
+            "aws": {
+                "regions": ["us-east-1", "eu-west-1"],
+                "sizes": ["t3.micro"],
+                "images": [{"name": "ubuntu-24.04", "architecture": "x86_64",
+                            "ami": {"us-east-1": "ami-...", "eu-west-1": "ami-..."}}],
+                "max_concurrency": 4
+            },
+            "gcp": {
+                "regions": ["us-central1"],
+                "sizes": ["e2-micro"],
+                "images": ["debian-12"],
+                "max_concurrency": 8
+            }
+        }
+    }
+
+AWS AMIs are region specific, so an AWS image is either a plain AMI id or
+an object mapping regions to AMI ids. A cloud may override "repetitions"
+and "benchmark".
+"""
+import itertools
+import json
+from mcbench.agent import TESTS
+
+CLOUDS = ("azure", "aws", "gcp")
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_PER_REGION = 2
+DEFAULT_MAX_IN_FLIGHT = 32
+DEFAULT_INGEST_TIMEOUT = 1800
+DEFAULT_READINESS_TIMEOUT = 600
+
+
+class SpecError(ValueError):
+    pass
+
+
+def load_spec(path):
+    with open(path) as f:
+        spec = json.load(f)
+    validate_spec(spec)
+    return spec
+
+
+def validate_spec(spec):
+    clouds = spec.get("clouds")
+    if not clouds:
+        raise SpecError("Spec has no 'clouds' section")
+    for cloud, settings in clouds.items():
+        if cloud not in CLOUDS:
+            raise SpecError(f"Unknown cloud '{cloud}' (expected one of {', '.join(CLOUDS)})")
+        for key in ("regions", "sizes", "images"):
+            if not settings.get(key):
+                raise SpecError(f"{cloud}: '{key}' must be a non-empty list")
+        for key in ("max_concurrency", "max_per_region", "repetitions"):
+            if key in settings and (not isinstance(settings[key], int) or settings[key] < 1):
+                raise SpecError(f"{cloud}: '{key}' must be a positive integer")
+        validate_benchmark(settings.get("benchmark"), cloud)
+    for key in ("max_in_flight", "repetitions"):
+        if key in spec and (not isinstance(spec[key], int) or spec[key] < 1):
+            raise SpecError(f"'{key}' must be a positive integer")
+    validate_benchmark(spec.get("benchmark"))
+    readiness = spec.get("readiness")
+    if readiness is not None and not isinstance(readiness, (bool, dict)):
+        raise SpecError("'readiness' must be true/false or an object")
+    ingest = spec.get("ingest")
+    if ingest is not None and not (isinstance(ingest, dict) and isinstance(ingest.get("public_url"), str)):
+        raise SpecError("'ingest' must be an object with a 'public_url'")
+
+
+def validate_benchmark(benchmark, cloud=None):
+    where = f"{cloud}: " if cloud else ""
+    if benchmark is None or isinstance(benchmark, bool):
+        return
+    if not isinstance(benchmark, dict):
+        raise SpecError(f"{where}'benchmark' must be true/false or an object")
+    unknown = set(benchmark.get("tests", ())) - set(TESTS)
+    if unknown:
+        raise SpecError(f"{where}unknown benchmark test(s) {', '.join(sorted(unknown))} (expected {', '.join(TESTS)})")
+    if "duration" in benchmark and not (isinstance(benchmark["duration"], (int, float)) and benchmark["duration"] > 0):
+        raise SpecError(f"{where}benchmark 'duration' must be a positive number of seconds")
+
+
+def benchmark_settings(spec, cloud):
+    """Agent settings for a cloud's VMs, or None if they should not be benchmarked"""
+    benchmark = spec["clouds"][cloud].get("benchmark", spec.get("benchmark"))
+    if benchmark is True:
+        return {}
+    return benchmark or None
+
+
+def image_label(image):
+    """Short, cloud-neutral name of an image entry for result records"""
+    if isinstance(image, dict):
+        return image.get("name") or json.dumps(image, sort_keys=True)
+    return image
+
+
+def expand_jobs(spec, run_id):
+    """Every cloud's regions × sizes × images × repetitions, one job per VM"""
+    jobs = []
+    for cloud, settings in spec["clouds"].items():
+        repetitions = settings.get("repetitions", spec.get("repetitions", 1))
+        benchmark = benchmark_settings(spec, cloud)
+        # Repetition outermost, so repeats of one cell are spread over the run
+        for repetition, region, size, image in itertools.product(
+            range(repetitions), settings["regions"], settings["sizes"], settings["images"]
+        ):
+            jobs.append({
+                "run_id": run_id,
+                "job_id": f"{cloud}-{len(jobs):04d}",
+                "cloud": cloud,
+                "region": region,
+                "size": size,
+                "image": image_label(image),
+                "image_spec": image,
+                "repetition": repetition,
+                "benchmark": benchmark,
+            })
+    return jobs
+
+
+def readiness_timeout(spec):
+    """Seconds to probe each VM for readiness, or None when the spec does not ask for it"""
+    readiness = spec.get("readiness")
+    if not readiness:
+        return None
+    return DEFAULT_READINESS_TIMEOUT if readiness is True else readiness.get("timeout_sec", DEFAULT_READINESS_TIMEOUT)
+
+
+def cloud_concurrency(spec, cloud):
+    return spec["clouds"][cloud].get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+
+
+def region_concurrency(spec, cloud):
+    return spec["clouds"][cloud].get("max_per_region", DEFAULT_MAX_PER_REGION)
+
+
+def max_in_flight(spec):
+    return spec.get("max_in_flight", DEFAULT_MAX_IN_FLIGHT)
@@ -0,0 +1,240 @@
+"""
+Parallel SSH across deployed VMs.
+
+Fans one command (or a local script, fed to `sh -s`) out to every VM of a
+deployment with bounded concurrency, on one asyncio event loop:
+
+- connections are retried with jittered exponential backoff until sshd
+  answers, so it can be started right after the control plane says "running"
+- one connection per host is kept in a pool and every later command to
+  that host runs as another session on it (SSH multiplexing)
+- stdout/stderr lines are streamed back as they arrive, prefixed by host
+
+Targets come from the per-cloud scripts' deployment files or from an
+mcbench run:
+
+    python -m mcbench.ssh --aws --command "uptime"
+    python -m mcbench.ssh --run <run_id> --script setup.sh --concurrency 64
+"""
+import argparse
+import asyncio
+import getpass
+import json
+import os
+import random
+import sys
+import time
+import asyncssh
+from mcbench._scripts import AWS_DIR, AZURE_DIR, GCP_DIR
+from mcbench.results import RESULTS_DIR, load_records
+
+DEFAULT_CONCURRENCY = 32
+DEFAULT_READY_TIMEOUT = 300
+CONNECT_TIMEOUT = 10
+BACKOFF_BASE = 0.25
+BACKOFF_FACTOR = 1.5  # gentle growth: refused connects are cheap and sshd appears suddenly
+BACKOFF_MAX = 5
+
+# Credentials the per-cloud deployers create VMs with
+AWS_USER = "ubuntu"
+AZURE_USER = "azureuser"
+AZURE_PASSWORD = "Password123!"  # as hardcoded in deploy_VMs.create_infrastructure
+GCP_KEY = os.path.expanduser("~/.ssh/google_compute_engine")  # key `gcloud compute ssh` creates; GCP deploy.py adds it to the VMs
+
+
+def target(cloud, name, host, username, key_file=None, password=None, port=22, region=None):
+    return {"cloud": cloud, "name": name, "host": host, "port": port, "username": username,
+            "key_file": key_file, "password": password, "region": region}
+
+
+def load_json(path, entries=None):
+    """`entries` when the caller already has them in memory, else the JSON list at `path`"""
+    if entries is not None:
+        return entries
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def aws_targets(path=AWS_DIR / "deployed_resources.json", username=AWS_USER, entries=None):
+    return [target("aws", e["InstanceId"], e["PublicIp"], username, key_file=str(AWS_DIR / e["KeyFile"]),
+                   region=e["Region"])
+            for e in load_json(path, entries) if not e["Failed"] and e.get("PublicIp")]
+
+
+def azure_targets(path=AZURE_DIR / "JSON-data" / "deployment_log.json", username=AZURE_USER, entries=None):
+    return [target("azure", e["vm_name"], e["public_ip"], username, password=AZURE_PASSWORD,
+                   region=e["location"])
+            for e in load_json(path, entries) if e.get("public_ip")]
+
+
+def gcp_targets(path=GCP_DIR / "deployment_details.json", username=None, key_file=GCP_KEY, entries=None):
+    return [target("gcp", e["vm_name"], e["external_ip"], username or getpass.getuser(), key_file=key_file,
+                   region=e["region"])
+            for e in load_json(path, entries) if not e.get("failed") and e.get("external_ip")]
+
+
+def record_target(r, gcp_user=None, gcp_key=GCP_KEY):
+    """SSH target for one mcbench result record"""
+    if r["cloud"] == "aws":
+        return target("aws", r["vm_name"], r["public_ip"], AWS_USER, key_file=r["extra"]["aws"]["KeyFile"],
+                      region=r["region"])
+    if r["cloud"] == "azure":
+        return target("azure", r["vm_name"], r["public_ip"], AZURE_USER, password=AZURE_PASSWORD,
+                      region=r["region"])
+    return target("gcp", r["vm_name"], r["public_ip"], gcp_user or getpass.getuser(), key_file=gcp_key,
+                  region=r["region"])
+
+
+def run_targets(run_id, results_dir=RESULTS_DIR, gcp_user=None, gcp_key=GCP_KEY):
+    """Every successfully provisioned VM of an mcbench run"""
+    return [record_target(r, gcp_user, gcp_key)
+            for r in load_records(os.path.join(results_dir, f"{run_id}.jsonl"))
+            if r["status"] == "succeeded" and r.get("public_ip")]
+
+
+class SshPool:
+    """One multiplexed connection per host, opened on first use"""
+
+    def __init__(self, ready_timeout=DEFAULT_READY_TIMEOUT):
+        self.ready_timeout = ready_timeout
+        self._connections = {}
+        self._locks = {}
+
+    async def connect(self, t, ready_timeout=None):
+        """Connect, retrying with backoff until sshd is up or ready_timeout passes"""
+        deadline = time.monotonic() + (ready_timeout or self.ready_timeout)
+        attempt = 0
+        while True:
+            try:
+                # Fresh VMs have unknown host keys; these hosts are ephemeral benchmark VMs
+                return await asyncssh.connect(
+                    t["host"], port=t["port"], username=t["username"], known_hosts=None,
+                    client_keys=[t["key_file"]] if t["key_file"] else None,
+                    password=t["password"], connect_timeout=CONNECT_TIMEOUT,
+                )
+            except asyncssh.PermissionDenied:
+                raise  # retrying will not fix credentials
+            except (OSError, asyncssh.Error, asyncio.TimeoutError):
+                delay = min(BACKOFF_MAX, BACKOFF_BASE * BACKOFF_FACTOR ** attempt) * (0.5 + random.random())
+                if time.monotonic() + delay > deadline:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def get(self, t, ready_timeout=None):
+        key = (t["host"], t["port"])
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            if key not in self._connections:
+                self._connections[key] = await self.connect(t, ready_timeout)
+            return self._connections[key]
+
+    async def close(self):
+        for conn in self._connections.values():
+            conn.close()
+        await asyncio.gather(*(conn.wait_closed() for conn in self._connections.values()))
+        self._connections.clear()
+
+
+def print_line(t, stream, line):
+    prefix = f"[{t['name']}]" if stream == "stdout" else f"[{t['name']}!]"
+    print(f"{prefix} {line.rstrip()}", flush=True)
+
+
+async def stream_lines(reader, t, stream, on_line):
+    async for line in reader:
+        if line:  # the reader yields one empty string at EOF
+            on_line(t, stream, line)
+
+
+async def run_on(pool, t, command, script=None, on_line=print_line):
+    """Run `command` (or `script` via `sh -s`) on one host; returns a result dict"""
+    result = {"name": t["name"], "host": t["host"], "cloud": t["cloud"], "exit_status": None, "error": None}
+    started = time.monotonic()
+    try:
+        conn = await pool.get(t)
+        result["ready_sec"] = time.monotonic() - started
+        async with conn.create_process("sh -s" if script is not None else command) as process:
+            if script is not None:
+                process.stdin.write(script)
+            process.stdin.write_eof()
+            await asyncio.gather(stream_lines(process.stdout, t, "stdout", on_line),
+                                 stream_lines(process.stderr, t, "stderr", on_line))
+            completed = await process.wait()
+        result["exit_status"] = completed.exit_status
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["elapsed_sec"] = time.monotonic() - started
+    return result
+
+
+async def run_everywhere(targets, command, script=None, concurrency=DEFAULT_CONCURRENCY,
+                         ready_timeout=DEFAULT_READY_TIMEOUT, pool=None, on_line=print_line):
+    """Run on every target, at most `concurrency` at a time; results in target order"""
+    own_pool = pool is None
+    pool = pool or SshPool(ready_timeout)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(t):
+        async with semaphore:
+            return await run_on(pool, t, command, script, on_line)
+
+    try:
+        return await asyncio.gather(*(limited(t) for t in targets))
+    finally:
+        if own_pool:
+            await pool.close()
+
+
+def print_results(results):
+    ok = [r for r in results if r["exit_status"] == 0]
+    print(f"\n✅ {len(ok)} of {len(results)} host(s) succeeded")
+    for r in results:
+        if r["exit_status"] != 0:
+            reason = r["error"] or f"exit status {r['exit_status']}"
+            print(f"❌ {r['name']} ({r['host']}): {reason}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a command or script on every deployed VM over SSH")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--aws", action="store_true", help="VMs in aws-deploy.py's deployed_resources.json")
+    source.add_argument("--azure", action="store_true", help="VMs in deploy_VMs.py's deployment_log.json")
+    source.add_argument("--gcp", action="store_true", help="VMs in deploy.py's deployment_details.json")
+    source.add_argument("--run", metavar="RUN_ID", help="VMs of an mcbench run")
+    what = parser.add_mutually_exclusive_group(required=True)
+    what.add_argument("--command")
+    what.add_argument("--script", help="local script file, run remotely with `sh -s`")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--ready-timeout", type=int, default=DEFAULT_READY_TIMEOUT,
+                        help="seconds to keep retrying while sshd comes up")
+    parser.add_argument("--gcp-user", help="SSH user for GCP VMs (default: local user)")
+    parser.add_argument("--gcp-key", default=GCP_KEY)
+    args = parser.parse_args()
+
+    if args.aws:
+        targets = aws_targets()
+    elif args.azure:
+        targets = azure_targets()
+    elif args.gcp:
+        targets = gcp_targets(username=args.gcp_user, key_file=args.gcp_key)
+    else:
+        targets = run_targets(args.run, gcp_user=args.gcp_user, gcp_key=args.gcp_key)
+    if not targets:
+        print("⚠️ No reachable VMs found (is there a public IP in the deployment file?)")
+        sys.exit(1)
+
+    script = None
+    if args.script:
+        with open(args.script) as f:
+            script = f.read()
+
+    print(f"🔌 Running on {len(targets)} VM(s), {args.concurrency} at a time...")
+    results = asyncio.run(run_everywhere(targets, args.command, script, args.concurrency, args.ready_timeout))
+    print_results(results)
+    sys.exit(0 if all(r["exit_status"] == 0 for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
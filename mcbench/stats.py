@@ -0,0 +1,187 @@
+"""
+Repeated-trial statistics for a run.
+
+A cell is one (cloud, region, size, image). With `repetitions` > 1 in the
+spec every cell has K provisioning samples, and this module summarizes them:
+n, mean, stddev, p50/p90/p99 and a bootstrap confidence interval of the
+mean. Cells of the same cloud/size/image are then ranked by mean, and a
+cell is flagged when its CI is too wide (or overlaps the next region's)
+for the ranking to mean anything.
+
+Cells with the same sample count are stacked into one matrix, so the
+percentiles and the bootstrap run as a handful of vectorized NumPy calls
+instead of a Python loop per cell.
+
+    python -m mcbench.stats <run_id> [--confidence 0.95] [--plot]
+"""
+import argparse
+import json
+import os
+import numpy as np
+from tabulate import tabulate
+from mcbench.results import RESULTS_DIR, load_records
+
+CELL_KEYS = ("cloud", "region", "size", "image")
+PERCENTILES = (50, 90, 99)
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_RESAMPLES = 5000
+MAX_RELATIVE_CI = 0.2       # CI wider than ±20% of the mean is too noisy to rank
+BOOTSTRAP_CHUNK = 4_000_000  # max resampled values held in memory at once
+
+
+def cell_samples(records):
+    """Successful provision times grouped by cell, plus failure counts"""
+    samples, failures = {}, {}
+    for r in records:
+        cell = tuple(r[k] for k in CELL_KEYS)
+        if r["status"] == "succeeded" and r.get("provision_sec") is not None:
+            samples.setdefault(cell, []).append(r["provision_sec"])
+        else:
+            failures[cell] = failures.get(cell, 0) + 1
+    return samples, failures
+
+
+def bootstrap_ci(matrix, confidence=DEFAULT_CONFIDENCE, resamples=DEFAULT_RESAMPLES, rng=None):
+    """Percentile bootstrap CI of the mean for every row of a (cells, n) matrix"""
+    rng = rng or np.random.default_rng()
+    cells, n = matrix.shape
+    alpha = (1 - confidence) / 2
+    bounds = np.empty((2, cells))
+    step = max(1, BOOTSTRAP_CHUNK // (resamples * n))
+    for start in range(0, cells, step):
+        block = matrix[start:start + step]
+        idx = rng.integers(0, n, size=(len(block), resamples, n))
+        means = block[np.arange(len(block))[:, None, None], idx].mean(axis=2)
+        bounds[:, start:start + step] = np.quantile(means, [alpha, 1 - alpha], axis=1)
+    return bounds
+
+
+def summarize(records, confidence=DEFAULT_CONFIDENCE, resamples=DEFAULT_RESAMPLES, seed=None):
+    samples, failures = cell_samples(records)
+    rng = np.random.default_rng(seed)
+
+    by_size = {}
+    for cell, values in samples.items():
+        by_size.setdefault(len(values), []).append(cell)
+
+    rows = []
+    for n, cells in by_size.items():
+        matrix = np.array([samples[c] for c in cells], dtype=float)
+        means = matrix.mean(axis=1)
+        stds = matrix.std(axis=1, ddof=1) if n > 1 else np.zeros(len(cells))
+        pcts = np.percentile(matrix, PERCENTILES, axis=1)
+        ci = bootstrap_ci(matrix, confidence, resamples, rng) if n > 1 else np.full((2, len(cells)), np.nan)
+
+        for i, cell in enumerate(cells):
+            row = dict(zip(CELL_KEYS, cell))
+            row.update({
+                "n": n,
+                "failed": failures.get(cell, 0),
+                "mean": float(means[i]),
+                "std": float(stds[i]),
+                **{f"p{p}": float(pcts[j, i]) for j, p in enumerate(PERCENTILES)},
+                "ci_low": None if n < 2 else float(ci[0, i]),
+                "ci_high": None if n < 2 else float(ci[1, i]),
+            })
+            rows.append(row)
+
+    # Cells where every attempt failed still show up, with no statistics
+    for cell, count in failures.items():
+        if cell not in samples:
+            rows.append({**dict(zip(CELL_KEYS, cell)), "n": 0, "failed": count})
+
+    flag_unrankable(rows)
+    return sorted(rows, key=lambda r: (r["cloud"], r["size"], r["image"], r.get("mean", float("inf"))))
+
+
+def flag_unrankable(rows):
+    """Mark cells whose CI is too wide, or overlaps the next region's, to rank regions"""
+    groups = {}
+    for row in rows:
+        row["flags"] = []
+        if row["n"] == 0:
+            row["flags"].append("no successful samples")
+        elif row["n"] < 2:
+            row["flags"].append("single sample, no CI")
+        elif row["mean"] and (row["ci_high"] - row["ci_low"]) / 2 > MAX_RELATIVE_CI * row["mean"]:
+            row["flags"].append(f"CI wider than ±{MAX_RELATIVE_CI:.0%} of mean")
+        if row["n"]:
+            groups.setdefault((row["cloud"], row["size"], row["image"]), []).append(row)
+
+    for group in groups.values():
+        group.sort(key=lambda r: r["mean"])
+        for a, b in zip(group, group[1:]):
+            if a["ci_high"] is not None and b["ci_low"] is not None and a["ci_high"] >= b["ci_low"]:
+                a["flags"].append(f"overlaps {b['region']}")
+                b["flags"].append(f"overlaps {a['region']}")
+
+    for row in rows:
+        row["rankable"] = not row["flags"]
+
+
+def print_stats(rows, confidence=DEFAULT_CONFIDENCE):
+    def fmt(value):
+        return "-" if value is None else f"{value:.2f}"
+
+    table = [
+        [r["cloud"], r["region"], r["size"], r["image"], r["n"], r["failed"],
+         fmt(r.get("mean")), fmt(r.get("std")), fmt(r.get("p50")), fmt(r.get("p90")), fmt(r.get("p99")),
+         f"{fmt(r.get('ci_low'))} – {fmt(r.get('ci_high'))}",
+         "✅" if r["rankable"] else "⚠️ " + "; ".join(r["flags"])]
+        for r in rows
+    ]
+    print(f"\n📊 Provisioning time statistics (seconds, {confidence:.0%} bootstrap CI of the mean):\n")
+    print(tabulate(table, headers=["Cloud", "Region", "Size", "Image", "n", "Failed", "Mean", "Std",
+                                   "p50", "p90", "p99", "CI", "Rankable"], tablefmt="grid"))
+
+
+def plot_stats(rows, path):
+    """Bar chart of mean provisioning time per cell with CI error bars"""
+    import matplotlib.pyplot as plt
+
+    rows = [r for r in rows if r["n"]]
+    labels = [f"{r['cloud']}\n{r['region']}\n{r['size']}" for r in rows]
+    means = [r["mean"] for r in rows]
+    errors = [[r["mean"] - (r["ci_low"] if r["ci_low"] is not None else r["mean"]) for r in rows],
+              [(r["ci_high"] if r["ci_high"] is not None else r["mean"]) - r["mean"] for r in rows]]
+    colors = ["green" if r["rankable"] else "orange" for r in rows]
+
+    plt.figure(figsize=(max(10, len(rows) * 0.6), 6))
+    plt.bar(labels, means, yerr=errors, capsize=4, color=colors)
+    plt.title("Mean Provisioning Time per Cell (orange = too noisy to rank)")
+    plt.ylabel("Provisioning Time (seconds)")
+    plt.xticks(fontsize=7)
+    plt.tight_layout()
+    plt.savefig(path, dpi=200)
+    print(f"📈 Graph saved as {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Percentiles and confidence intervals for a run's repeated trials")
+    parser.add_argument("run_id")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE)
+    parser.add_argument("--resamples", type=int, default=DEFAULT_RESAMPLES)
+    parser.add_argument("--seed", type=int, default=None, help="fix the bootstrap RNG for reproducible CIs")
+    parser.add_argument("--plot", action="store_true", help="also save results/<run_id>.stats.png")
+    args = parser.parse_args()
+
+    records = load_records(os.path.join(args.results_dir, f"{args.run_id}.jsonl"))
+    if not records:
+        print(f"⚠️ No results found for {args.run_id}")
+        return
+
+    rows = summarize(records, args.confidence, args.resamples, args.seed)
+    print_stats(rows, args.confidence)
+
+    output = os.path.join(args.results_dir, f"{args.run_id}.stats.json")
+    with open(output, "w") as f:
+        json.dump({"run_id": args.run_id, "confidence": args.confidence, "cells": rows}, f, indent=2)
+    print(f"\n📁 Statistics saved to {output}")
+
+    if args.plot:
+        plot_stats(rows, os.path.join(args.results_dir, f"{args.run_id}.stats.png"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""
+Tracing and per-stage profiling.
+
+Spans time the steps of fetch, deploy and cleanup: each cloud API call,
+subprocess, render step and the stages around them. They carry attributes
+(cloud, region, operation, retries, http.status, throttled) and nest
+through contextvars, so a slow run shows where its time went: throttling
+(retries and throttled on API spans), LRO waits (operation waits and
+polling requests) or local CPU (render spans, profiles).
+
+Spans are recorded only while tracing is enabled or a listener (such as
+mcbench/metrics.py) is registered; otherwise a span costs one check.
+Enable tracing with MCBENCH_TRACE=<prefix> (or --trace on the CLIs). At
+exit it writes:
+
+- <prefix>.trace.json  Chrome trace (chrome://tracing, ui.perfetto.dev)
+- <prefix>.otlp.json   OTLP/JSON, as an OpenTelemetry collector's file
+                       receiver or `otel-cli` expect
+
+MCBENCH_PROFILE=<dir> additionally runs cProfile around every stage and
+saves <dir>/<stage>-<pid>-<time>.prof (open with `python -m pstats` or
+snakeviz). cProfile sees only the thread that entered the stage: for the
+orchestrator that is the event loop, not the provisioning threads.
+
+The cloud SDKs are instrumented at their choke points without touching the
+per-cloud scripts: botocore's before-call/after-call events (AWS), every
+azure-core HTTP request (Azure) and gcp_client.execute / operation waits
+(GCP).
+"""
+import atexit
+import contextvars
+import cProfile
+import functools
+import json
+import os
+import secrets
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+INHERITED = ("cloud", "region", "run_id")
+THROTTLE_CODES = {"Throttling", "ThrottlingException", "RequestLimitExceeded", "TooManyRequestsException",
+                  "RequestThrottled", "SlowDown"}
+SERVICE_NAME = "mcbench"
+
+_EPOCH_NS = time.time_ns() - time.perf_counter_ns()
+_current = contextvars.ContextVar("mcbench_span", default=None)
+_spans = []
+_listeners = []
+_lock = threading.Lock()
+_state = {"prefix": None, "recording": False, "profile_dir": None, "profiling": False,
+          "trace_id": secrets.token_hex(16)}
+
+
+def now_ns():
+    """Wall-clock nanoseconds that never go backwards"""
+    return _EPOCH_NS + time.perf_counter_ns()
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "attributes", "start_ns", "end_ns", "thread_id", "thread_name",
+                 "error")
+
+    def __init__(self, name, parent, attributes):
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        inherited = {k: parent.attributes[k] for k in INHERITED if parent and parent.attributes.get(k) is not None}
+        self.attributes = {**inherited, **{k: v for k, v in attributes.items() if v is not None}}
+        self.thread_id = threading.get_native_id()
+        self.thread_name = threading.current_thread().name
+        self.error = None
+        self.end_ns = None
+        self.start_ns = now_ns()
+        for listener in _listeners:
+            listener("start", self)
+
+    def set_attribute(self, key, value):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_error(self, error):
+        self.error = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = now_ns()
+            if _state["prefix"] is not None:
+                with _lock:
+                    _spans.append(self)
+            for listener in _listeners:
+                listener("end", self)
+
+
+class _NullSpan:
+    """Returned while nothing records spans"""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_error(self, error):
+        pass
+
+    def end(self):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+def enabled():
+    return _state["prefix"] is not None
+
+
+def recording():
+    return _state["recording"]
+
+
+def enable(prefix, profile_dir=None):
+    """Record spans from now on and export them to <prefix>.trace.json / .otlp.json at exit"""
+    if _state["prefix"] is None:
+        atexit.register(export)
+    _state["prefix"] = prefix
+    _state["recording"] = True
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        _state["profile_dir"] = profile_dir
+
+
+def add_listener(listener):
+    """Call listener("start" | "end", span) for every span from now on, tracing enabled or not"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+    _state["recording"] = True
+
+
+def start_span(name, **attributes):
+    """A span the caller ends with .end(); it is not made the current span"""
+    if not _state["recording"]:
+        return NULL_SPAN
+    return Span(name, _current.get(), attributes)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time the block as a child of the current span; exceptions are recorded and re-raised"""
+    if not _state["recording"]:
+        yield NULL_SPAN
+        return
+    s = Span(name, _current.get(), attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.set_error(e)
+        raise
+    finally:
+        _current.reset(token)
+        s.end()
+
+
+def traced(name=None, **attributes):
+    """Decorator form of span()"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name or fn.__qualname__, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def stage(name, **attributes):
+    """A top-level step (fetch, deploy, cleanup, ...): a span, and a cProfile capture when profiling is on"""
+    with span(name, stage=name, **attributes) as s:
+        if not _state["profile_dir"] or _state["profiling"]:
+            yield s
+            return
+        _state["profiling"] = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield s
+        finally:
+            profiler.disable()
+            _state["profiling"] = False
+            path = os.path.join(_state["profile_dir"], f"{name}-{os.getpid()}-{int(time.time())}.prof")
+            profiler.dump_stats(path)
+            s.set_attribute("profile", path)
+            print(f"🔬 Profile of stage {name} saved to {path}")
+
+
+def in_context(fn):
+    """Bind `fn` to the current context, so spans opened on an executor thread nest under the caller's"""
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+# ---------- Subprocesses ----------
+
+def run(args, **kwargs):
+    """subprocess.run in a span named after the program"""
+    with span("subprocess", operation=os.path.basename(args[0]), command=" ".join(args)) as s:
+        result = subprocess.run(args, **kwargs)
+        s.set_attribute("exit_status", result.returncode)
+        return result
+
+
+def check_output(args, **kwargs):
+    return run(args, check=True, stdout=subprocess.PIPE, **kwargs).stdout
+
+
+# ---------- Cloud SDKs ----------
+
+def _boto_before(model, context, **kwargs):
+    context["mcbench_span"] = start_span("aws.api", cloud="aws", region=context.get("client_region"),
+                                         service=model.service_model.service_name, operation=model.name)
+
+
+def _boto_after(parsed, context, **kwargs):
+    s = context.pop("mcbench_span", NULL_SPAN)
+    meta = parsed.get("ResponseMetadata", {})
+    code = parsed.get("Error", {}).get("Code")
+    s.set_attribute("retries", meta.get("RetryAttempts", 0))
+    s.set_attribute("http.status", meta.get("HTTPStatusCode"))
+    s.set_attribute("throttled", code in THROTTLE_CODES)
+    if code:
+        s.set_error(code)
+    s.end()
+
+
+def _boto_error(exception, context, **kwargs):
+    s = context.pop("mcbench_span", NULL_SPAN)
+    s.set_error(exception)
+    s.end()
+
+
+def instrument_boto3(session=None):
+    """Span every API call of the clients later created from `session` (boto3's default session)"""
+    if not recording():
+        return
+    import boto3
+    session = session or boto3._get_default_session()
+    if getattr(session, "_mcbench_traced", False):
+        return
+    session.events.register("before-call", _boto_before)
+    session.events.register("after-call", _boto_after)
+    session.events.register("after-call-error", _boto_error)
+    session._mcbench_traced = True
+
+
+def arm_operation(method, url):
+    """'PUT Microsoft.Compute/virtualMachines' from an ARM request"""
+    path = urlparse(url).path
+    if "/providers/" in path:
+        segments = path.rsplit("/providers/", 1)[1].split("/")
+        return f"{method} {'/'.join([segments[0], *segments[1::2]])}"
+    segments = [s for s in path.split("/") if s]
+    return f"{method} {'/'.join(segments[0::2][-1:]) or '/'}"
+
+
+def instrument_azure():
+    """Span every HTTP request the azure-core pipeline sends, LRO polling included"""
+    if not recording():
+        return
+    from azure.core.pipeline.transport import RequestsTransport
+    if getattr(RequestsTransport, "_mcbench_traced", False):
+        return
+    send = RequestsTransport.send
+
+    def traced_send(self, request, **kwargs):
+        # The retry policy resends the same request object, so attempts can be counted on it
+        attempt = getattr(request, "_mcbench_attempt", 0)
+        try:
+            request._mcbench_attempt = attempt + 1
+        except AttributeError:
+            pass
+        with span("azure.api", cloud="azure", operation=arm_operation(request.method, request.url),
+                  retries=attempt) as s:
+            response = send(self, request, **kwargs)
+            s.set_attribute("http.status", response.status_code)
+            s.set_attribute("throttled", response.status_code == 429)
+            return response
+
+    RequestsTransport.send = traced_send
+    RequestsTransport._mcbench_traced = True
+
+
+def instrument_gcp(gcp_client):
+    """Span every request sent through gcp_client.execute() and every zone operation wait"""
+    if not recording() or getattr(gcp_client, "_mcbench_traced", False):
+        return
+    execute = gcp_client.execute
+    wait = gcp_client.wait_zone_operation
+
+    def traced_execute(request):
+        with span("gcp.api", cloud="gcp", operation=getattr(request, "methodId", None)) as s:
+            try:
+                return execute(request)
+            except Exception as e:
+                status = getattr(getattr(e, "resp", None), "status", None)
+                s.set_attribute("http.status", status)
+                s.set_attribute("throttled", status == 429 or "rateLimitExceeded" in str(e))
+                raise
+
+    def traced_wait(operation, project=None, zone=None):
+        with span("gcp.wait_operation", cloud="gcp", region=zone and zone.rsplit("-", 1)[0], zone=zone,
+                  operation=operation.get("operationType")):
+            return wait(operation, project=project, zone=zone)
+
+    gcp_client.execute = traced_execute
+    gcp_client.wait_zone_operation = traced_wait
+    gcp_client._mcbench_traced = True
+
+
+# ---------- Export ----------
+
+def finished_spans():
+    with _lock:
+        return sorted(_spans, key=lambda s: s.start_ns)
+
+
+def chrome_trace(spans):
+    pid = os.getpid()
+    events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+              for tid, name in sorted({(s.thread_id, s.thread_name) for s in spans})]
+    for s in spans:
+        args = dict(s.attributes)
+        if s.error:
+            args["error"] = s.error
+        events.append({"name": s.name, "cat": s.attributes.get("cloud", "mcbench"), "ph": "X",
+                       "ts": s.start_ns / 1000, "dur": (s.end_ns - s.start_ns) / 1000,
+                       "pid": pid, "tid": s.thread_id, "args": args})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_trace(spans):
+    def otlp_span(s):
+        span_json = {
+            "traceId": _state["trace_id"],
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": [{"key": k, "value": otlp_value(v)} for k, v in s.attributes.items()],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            span_json["parentSpanId"] = s.parent_id
+        return span_json
+
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}},
+                                    {"key": "process.pid", "value": {"intValue": str(os.getpid())}}]},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": [otlp_span(s) for s in spans]}],
+    }]}
+
+
+def export(prefix=None):
+    """Write the finished spans as a Chrome trace and as OTLP/JSON; returns the two paths"""
+    prefix = prefix or _state["prefix"]
+    spans = finished_spans()
+    if not prefix or not spans:
+        return None
+    directory = os.path.dirname(prefix)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    paths = (f"{prefix}.trace.json", f"{prefix}.otlp.json")
+    for path, document in zip(paths, (chrome_trace(spans), otlp_trace(spans))):
+        with open(path, "w") as f:
+            json.dump(document, f)
+    print(f"🧭 {len(spans)} span(s) saved to {paths[0]} and {paths[1]}")
+    return paths
+
+
+if os.environ.get("MCBENCH_TRACE"):
+    enable(os.environ["MCBENCH_TRACE"], os.environ.get("MCBENCH_PROFILE"))
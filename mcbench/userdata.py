@@ -0,0 +1,58 @@
+"""
+First-boot script that runs the benchmark agent on a new VM.
+
+One shell script serves every cloud: cloud-init executes user data that
+starts with "#!" (AWS user data, Azure custom data) and GCE runs the same
+script from the `startup-script` metadata key. The agent is gzipped and
+base64 encoded into the script, which keeps it far below AWS's 16 KB
+user-data limit.
+
+The agent's JSON result is left at /var/lib/mcbench/result.json on the VM
+and, when the run has an ingest endpoint, pushed to it (mcbench/ingest.py).
+"""
+import base64
+import gzip
+import shlex
+from pathlib import Path
+
+AGENT_FILE = Path(__file__).with_name("agent.py")
+AGENT_DIR = "/var/lib/mcbench"
+RESULT_PATH = f"{AGENT_DIR}/result.json"
+DEFAULT_BENCHMARK = {"duration": 10, "tests": ["cpu", "memory", "disk", "network"]}
+
+
+def agent_payload():
+    return base64.b64encode(gzip.compress(AGENT_FILE.read_bytes(), mtime=0)).decode()
+
+
+def agent_command(job, benchmark):
+    args = [
+        "python3", f"{AGENT_DIR}/agent.py",
+        "--duration", str(benchmark["duration"]),
+        "--tests", ",".join(benchmark["tests"]),
+        "--output", RESULT_PATH,
+    ]
+    for key in ("run_id", "job_id", "cloud", "region", "size"):
+        args += ["--tag", f"{key}={job[key]}"]
+    if benchmark.get("push_url"):
+        args += ["--push-url", benchmark["push_url"], "--token", benchmark["token"]]
+    return " ".join(shlex.quote(a) for a in args)
+
+
+def bootstrap_script(job, benchmark=None):
+    benchmark = {**DEFAULT_BENCHMARK, **(benchmark or {})}
+    return f"""#!/bin/sh
+# mcbench benchmark agent ({job['run_id']} / {job['job_id']})
+mkdir -p {AGENT_DIR}
+# GCE reruns startup scripts on every boot; benchmark only once
+[ -f {RESULT_PATH} ] && exit 0
+echo '{agent_payload()}' | base64 -d | gunzip > {AGENT_DIR}/agent.py
+{agent_command(job, benchmark)} > /var/log/mcbench-agent.log 2>&1
+"""
+
+
+def user_data_for(job):
+    """Bootstrap script for a job, or None when the spec does not ask for a benchmark"""
+    if job.get("benchmark") is None:
+        return None
+    return bootstrap_script(job, job["benchmark"])
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# mcbench is not installed; import it (and, through it, the cloud scripts) from the checkout
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,100 @@
+"""
+mcbench/agent.py: the compact JSON line it prints (and pushes), failing
+tests reported in place, and a mesh client/server pair on loopback.
+"""
+import json
+import socket
+import threading
+import pytest
+from mcbench import agent
+
+DURATION = "0.2"
+
+
+def run_agent(capsys, *argv):
+    result = agent.main(list(argv))
+    lines = capsys.readouterr().out.splitlines()
+    return result, lines[-1]
+
+
+def test_output_is_one_compact_sorted_line(tmp_path, capsys):
+    output = tmp_path / "result.json"
+    result, line = run_agent(
+        capsys, "--tests", "memory,disk,network", "--duration", DURATION, "--memory-mb", "4",
+        "--disk-dir", str(tmp_path), "--disk-size-mb", "4", "--tag", "run_id=run-1", "--tag", "job=a=b",
+        "--output", str(output))
+
+    parsed = json.loads(line)
+    assert line == json.dumps(parsed, separators=(",", ":"), sort_keys=True)
+    assert parsed == result
+    assert output.read_text() == line + "\n"
+
+    assert parsed["agent_version"] == agent.AGENT_VERSION
+    assert parsed["tags"] == {"run_id": "run-1", "job": "a=b"}
+    assert parsed["memory"]["buffer_mb"] == 4 and parsed["memory"]["copy_gib_s"] > 0
+    assert parsed["disk"]["file_mb"] == 4
+    assert {"seq_write_mib_s", "seq_read_mib_s", "rand_read_iops", "rand_write_iops", "direct_io"} <= set(parsed["disk"])
+    assert parsed["network"]["loopback_gbit_s"] > 0 and parsed["network"]["rtt_p50_us"] > 0
+    for name in ("memory", "disk", "network"):
+        assert "error" not in parsed[name]
+        assert parsed[name]["elapsed_sec"] >= 0
+    assert "cpu" not in parsed
+    # The disk test cleans up after itself
+    assert [p.name for p in tmp_path.iterdir()] == ["result.json"]
+
+
+def test_failing_test_is_reported(tmp_path, capsys):
+    result, line = run_agent(capsys, "--tests", "disk", "--duration", DURATION,
+                             "--disk-dir", str(tmp_path / "missing"), "--disk-size-mb", "1")
+    assert json.loads(line) == result
+    assert result["disk"]["error"].startswith("FileNotFoundError")
+    assert "elapsed_sec" in result["disk"]
+
+
+def test_unknown_test_is_rejected(capsys):
+    with pytest.raises(SystemExit):
+        agent.main(["--tests", "cpu,gpu"])
+    assert "gpu" in capsys.readouterr().err
+
+
+def test_worker_counts():
+    assert agent.worker_counts(1) == [1]
+    assert agent.worker_counts(6) == [1, 2, 4, 6]
+    assert agent.worker_counts(8) == [1, 2, 4, 8]
+
+
+def test_percentile():
+    assert agent.percentile([], 50) is None
+    assert agent.percentile([5], 99) == 5
+    values = list(range(101))
+    assert agent.percentile(values, 50) == 50
+    assert agent.percentile(values, 99) == 99
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_mesh_client_against_server(capsys):
+    port = free_port()
+    server = threading.Thread(target=agent.mesh_server, args=(port, 1), daemon=True)
+    server.start()
+    # The server may not be listening yet
+    for _ in range(50):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except ConnectionRefusedError:
+            server.join(0.05)
+
+    result, line = run_agent(capsys, "--mesh-client", f"127.0.0.1:{port}", "--duration", DURATION)
+    assert json.loads(line) == result
+    assert result["gbit_s"] > 0
+    assert result["rtt_samples"] > 0
+    assert 0 < result["rtt_p50_us"] <= result["rtt_p99_us"]
+
+    # No more connections: the server exits after its idle timeout
+    server.join(5)
+    assert not server.is_alive()
@@ -0,0 +1,28 @@
+"""
+mcbench/history.py: which files in the results directory are ingested.
+"""
+import json
+from mcbench import history
+from mcbench.results import AGENT_RESULTS, MESH_RESULTS, ResultsStore, make_record
+
+
+def job(run_id, n):
+    return {"run_id": run_id, "job_id": f"j{n}", "cloud": "aws", "region": "us-east-1",
+            "size": "t3.micro", "image": "ubuntu"}
+
+
+def test_ingest_skips_agent_and_mesh_files(tmp_path):
+    run_id = "20260101-000000-abcdef"
+    store = ResultsStore(run_id, str(tmp_path))
+    for n in range(3):
+        store.append(make_record(job(run_id, n), status="succeeded", provision_sec=30.0 + n,
+                                 start_time="2026-01-01T00:00:00Z"))
+    ResultsStore(run_id, str(tmp_path), AGENT_RESULTS).append({"tags": {"run_id": run_id}, "cpu": {}})
+    ResultsStore(run_id, str(tmp_path), MESH_RESULTS).append({"src_region": "us-east-1", "dst_region": "eu-west-1", "rtt_p50_us": 70000.0, "gbit_s": 1.2, "error": None})
+    (tmp_path / "latency_cache.json").write_text(json.dumps({}))
+
+    conn = history.connect(str(tmp_path / history.HISTORY_FILE))
+    assert history.ingest_results(conn, str(tmp_path)) == 3
+    assert conn.execute("SELECT DISTINCT run_id FROM samples").fetchall() == [(run_id,)]
+    # Already stored runs are skipped
+    assert history.ingest_results(conn, str(tmp_path)) == 0
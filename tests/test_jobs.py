@@ -0,0 +1,106 @@
+"""
+GCP-VM-Benchmark/jobs.py: final job states, output capture and pruning.
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from mcbench import trace
+from mcbench._scripts import GCP_DIR, load_script
+
+jobs = load_script(GCP_DIR, "jobs.py", "gcp_jobs")
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    # JobManager wraps sys.stdout; put the original back afterwards
+    monkeypatch.setattr(sys, "stdout", sys.stdout)
+    manager = jobs.JobManager(max_workers=1)
+    yield manager
+    manager._executor.shutdown(wait=True)
+
+
+def finish(manager, job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        job.wait_for_update(len(job.lines), job.progress, 0.1)
+    assert job.finished, job.status
+    return job
+
+
+def test_done_with_output(manager, monkeypatch):
+    # pytest swaps sys.stdout between fixture setup and the test, undoing JobManager's wrapper
+    monkeypatch.setattr(sys, "stdout", jobs._JobStdout(sys.stdout))
+
+    def work():
+        print("one")
+        jobs.report_progress(1, 2)
+        print("two", end="")
+
+    job = finish(manager, manager.submit("k", "work", work))
+    assert job.status == "done" and job.error is None
+    assert job.lines == ["one", "two"]
+    assert job.progress == (1, 2)
+    assert job.finished_at is not None
+
+
+def test_output_of_executor_workers(manager, monkeypatch):
+    monkeypatch.setattr(sys, "stdout", jobs._JobStdout(sys.stdout))
+
+    def fetch(n):
+        print(f"worker {n}")
+        jobs.report_progress(n, 4)
+
+    def work():
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for future in [executor.submit(trace.in_context(fetch), n) for n in range(4)]:
+                future.result()
+        print("done")
+
+    first = finish(manager, manager.submit("k", "work", work))
+    assert sorted(first.lines[:-1]) == [f"worker {n}" for n in range(4)]
+    assert first.lines[-1] == "done"
+    assert first.progress is not None
+
+    # The job's thread is reused by the next job without carrying the first one's output along
+    second = finish(manager, manager.submit("k2", "work", lambda: print("second")))
+    assert second.lines == ["second"]
+    assert len(first.lines) == 5
+
+
+def test_failed(manager):
+    def work():
+        raise ValueError("bad region")
+
+    job = finish(manager, manager.submit("k", "work", work))
+    assert job.status == "failed" and job.error == "bad region"
+    assert "ValueError" in job.lines[-1]
+
+
+@pytest.mark.parametrize("exc", [SystemExit(1), KeyboardInterrupt()])
+def test_interrupted_job_does_not_stay_running(manager, exc):
+    def work():
+        raise exc
+
+    job = finish(manager, manager.submit("k", "work", work))
+    assert job.status == "failed" and job.error == "interrupted"
+    # The key is free again
+    assert manager.submit("k", "again", lambda: None) is not job
+
+
+def test_duplicate_submissions_coalesce(manager):
+    blocker = manager.submit("block", "block", lambda: None)
+    first = manager.submit("k", "work", lambda: None)
+    assert manager.submit("k", "work", lambda: None) is first
+    finish(manager, blocker)
+    finish(manager, first)
+
+
+def test_prune_keeps_the_newest_finished_jobs(manager, monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_FINISHED_JOBS", 2)
+    finished = [finish(manager, manager.submit(f"k{i}", "work", lambda: None)) for i in range(4)]
+    # finished_at is only None for a job caught mid-update; it sorts as oldest
+    finished[1].finished_at = None
+    manager.submit("last", "work", lambda: None)
+    assert finished[0].id not in manager._jobs and finished[1].id not in manager._jobs
+    assert finished[2].id in manager._jobs and finished[3].id in manager._jobs
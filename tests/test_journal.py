@@ -0,0 +1,164 @@
+"""
+mcbench/journal.py, and aws-deploy.py's --resume on top of it, with the
+cloud lookups and deletes stubbed.
+"""
+import json
+import pytest
+from mcbench import journal as wal
+from mcbench._scripts import AWS_DIR, load_script
+
+
+def write_run(path):
+    """Unit a finished; b crashed after its security group; c crashed before creating anything"""
+    journal = wal.Journal.start(path, run_id="run-1")
+    journal.intent("0:a", "security_group", "sg-a", region="a")
+    journal.created("0:a", "security_group", "sg-a", "sg-1")
+    journal.intent("0:a", "instance", "tok-a", region="a", client_token="tok-a")
+    journal.created("0:a", "instance", "tok-a", "i-1")
+    journal.done("0:a", {"deployed": {"InstanceId": "i-1"}, "times": {"ElapsedSeconds": 1.0}})
+    journal.intent("1:b", "security_group", "sg-b", region="b")
+    journal.created("1:b", "security_group", "sg-b", "sg-2")
+    journal.intent("1:b", "key_pair", "key-b", region="b", key_file="key-b.pem")
+    journal.intent("2:c", "security_group", "sg-c", region="c")
+    return journal
+
+
+def test_fold(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    write_run(path)
+    state = wal.fold(wal.load(path))
+
+    assert state["run"]["run_id"] == "run-1"
+    assert state["units"]["0:a"]["done"]["deployed"]["InstanceId"] == "i-1"
+    assert state["units"]["0:a"]["resources"][("instance", "tok-a")]["id"] == "i-1"
+    assert state["units"]["1:b"]["done"] is None
+    # An intent without a created record has no id yet, but keeps what the intent said
+    assert state["units"]["1:b"]["resources"][("key_pair", "key-b")] == {
+        "id": None, "kind": "key_pair", "name": "key-b", "region": "b", "key_file": "key-b.pem"}
+    assert wal.unfinished(path) == ["1:b", "2:c"]
+
+
+def test_fold_ignores_a_torn_last_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    write_run(path)
+    with open(path, "a") as f:
+        f.write('{"op": "created", "unit": "1:b", "ki')
+    assert wal.load(path)[-1]["op"] == "intent"
+
+
+def test_fold_restarts_a_cleaned_unit(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = write_run(path)
+    journal.cleaned("1:b")
+    journal.intent("1:b", "security_group", "sg-b2", region="b")
+    assert list(wal.fold(wal.load(path))["units"]["1:b"]["resources"]) == [("security_group", "sg-b2")]
+
+
+def test_reconcile(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    write_run(path)
+    state = wal.fold(wal.load(path))
+    in_cloud = {"sg-a": "sg-1", "tok-a": "i-1", "sg-b": "sg-2"}
+    asked = []
+
+    def exists(unit, resource):
+        asked.append(resource["name"])
+        return in_cloud.get(resource["name"])
+
+    done, leaked = wal.reconcile(state, exists)
+    assert sorted(asked) == ["key-b", "sg-a", "sg-b", "sg-c", "tok-a"]
+    assert list(done) == ["0:a"]
+    assert leaked == {"1:b": [{"id": "sg-2", "kind": "security_group", "name": "sg-b", "region": "b"}]}
+
+
+def test_reconcile_redeploys_a_done_unit_whose_vm_is_gone(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    write_run(path)
+    done, leaked = wal.reconcile(wal.fold(wal.load(path)), lambda unit, r: "sg-1" if r["name"] == "sg-a" else None)
+    assert done == {}
+    assert [r["name"] for r in leaked["0:a"]] == ["sg-a"]
+
+
+def test_clean(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = write_run(path)
+    state = wal.fold(wal.load(path))
+    done = {"0:a": state["units"]["0:a"]["done"]}
+    leaked = {"1:b": [{"id": "sg-2"}]}
+
+    assert wal.clean(journal, state, done, leaked, lambda unit, resources: False) == ["1:b"]
+    assert [r["unit"] for r in wal.load(path) if r["op"] == "cleaned"] == ["2:c"]
+    assert wal.clean(journal, state, done, leaked, lambda unit, resources: True) == []
+    assert wal.unfinished(path) == ["1:b", "2:c"]  # cleaned, not deployed yet
+
+
+@pytest.fixture
+def aws_deploy(tmp_path, monkeypatch):
+    pytest.importorskip("botocore")
+    monkeypatch.chdir(tmp_path)
+    return load_script(AWS_DIR, "aws-deploy.py", "aws_deploy")
+
+
+def test_aws_resume(aws_deploy, monkeypatch):
+    write_run(aws_deploy.JOURNAL_FILE)
+    deleted = []
+    monkeypatch.setattr(aws_deploy, "find_resource", lambda unit, r: {"sg-a": "sg-1", "tok-a": "i-1",
+                                                                      "sg-b": "sg-2"}.get(r["name"]))
+    monkeypatch.setattr(aws_deploy, "delete_leaked", lambda unit, resources: deleted.append((unit, resources)) or True)
+    configs = [{"region": region} for region in "abc"]
+
+    journal, units, finished = aws_deploy.resume(configs)
+    assert journal.run_id == "run-1"
+    assert [unit for unit, _ in units] == ["1:b", "2:c"]
+    assert [unit for unit, _ in deleted] == ["1:b"]
+    assert finished == [{"deployed": {"InstanceId": "i-1"}, "times": {"ElapsedSeconds": 1.0}}]
+    with open(aws_deploy.RESOURCES_FILE) as f:
+        assert json.load(f) == [{"InstanceId": "i-1"}]
+
+
+def test_aws_resume_keeps_units_it_could_not_clean(aws_deploy, monkeypatch):
+    write_run(aws_deploy.JOURNAL_FILE)
+    monkeypatch.setattr(aws_deploy, "find_resource", lambda unit, r: "exists")
+    monkeypatch.setattr(aws_deploy, "delete_leaked", lambda unit, resources: unit != "1:b")
+
+    _, units, finished = aws_deploy.resume([{"region": region} for region in "abc"])
+    assert [unit for unit, _ in units] == ["2:c"]
+    assert len(finished) == 1
+
+
+class FakeEC2:
+    def __init__(self, region):
+        self.region = region
+
+    def create_security_group(self, **kwargs):
+        return {"GroupId": "sg-1"}
+
+    def authorize_security_group_ingress(self, **kwargs):
+        pass
+
+    def create_key_pair(self, KeyName, **kwargs):
+        return {"KeyMaterial": "key"}
+
+    def run_instances(self, **kwargs):
+        return {"Instances": [{"InstanceId": "i-1"}]}
+
+    def get_waiter(self, name):
+        from botocore.exceptions import WaiterError
+
+        class Waiter:
+            def wait(self, **kwargs):
+                raise WaiterError(name=name, reason="Max attempts exceeded", last_response={})
+        return Waiter()
+
+
+def test_aws_failed_deployment_lists_what_it_created(aws_deploy, monkeypatch):
+    boto3 = pytest.importorskip("boto3")
+    monkeypatch.setattr(boto3, "client", lambda service, region_name=None: FakeEC2(region_name))
+    journal = wal.Journal.start(aws_deploy.JOURNAL_FILE)
+
+    deployed, _ = aws_deploy.deploy_region({"region": "a", "ami_id": "ami-1", "instance_type": "t3.micro",
+                                            "architecture": "x86_64"}, journal, "0:a")
+    assert deployed["Failed"]
+    assert (deployed["InstanceId"], deployed["SecurityGroupId"]) == ("i-1", "sg-1")
+    assert deployed["KeyName"].startswith("temp-key-") and deployed["KeyFile"] == deployed["KeyName"] + ".pem"
+    assert wal.unfinished(aws_deploy.JOURNAL_FILE) == ["0:a"]
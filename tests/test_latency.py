@@ -0,0 +1,164 @@
+"""
+mcbench/latency.py against a local TLS server with a self-signed
+certificate, its cache, and the region ordering the selectors use.
+"""
+import datetime
+import re
+import socket
+import ssl
+import threading
+import pytest
+from mcbench import latency
+from mcbench._scripts import AWS_DIR, load_script
+
+
+def self_signed(tmp_path):
+    x509 = pytest.importorskip("cryptography.x509")
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(minutes=1)).not_valid_after(now + datetime.timedelta(days=1))
+            .sign(key, hashes.SHA256()))
+    cert_file, key_file = tmp_path / "cert.pem", tmp_path / "key.pem"
+    cert_file.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_file.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                           serialization.NoEncryption()))
+    return cert_file, key_file
+
+
+@pytest.fixture
+def tls_port(tmp_path):
+    """Port of a local server that completes TLS handshakes until the test ends"""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(*self_signed(tmp_path))
+    server = socket.create_server(("127.0.0.1", 0))
+    server.settimeout(0.2)
+    stop = threading.Event()
+
+    def serve():
+        while not stop.is_set():
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            try:
+                with context.wrap_socket(conn, server_side=True):
+                    pass
+            except (ssl.SSLError, OSError):
+                pass
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield server.getsockname()[1]
+    stop.set()
+    thread.join()
+    server.close()
+
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def probe(tmp_path, port, **kwargs):
+    return latency.region_latencies("aws", ["local"], template="127.0.0.1", port=port,
+                                    ssl_context=latency.insecure_context(),
+                                    cache_path=str(tmp_path / "latency_cache.json"), **kwargs)
+
+
+def test_probe_local_tls_server(tmp_path, tls_port):
+    result = probe(tmp_path, tls_port)["local"]
+    assert result["error"] is None
+    assert result["host"] == "127.0.0.1" and result["port"] == tls_port
+    assert result["connect_ms"] >= 0 and result["tls_ms"] > 0
+    assert latency.describe(result).endswith(" ms)")
+
+
+def test_closed_port_is_an_error(tmp_path):
+    result = probe(tmp_path, closed_port())["local"]
+    assert result["connect_ms"] is None and result["tls_ms"] is None
+    assert result["error"].startswith("ConnectionRefusedError")
+    assert latency.describe(result) == "unreachable"
+
+
+def test_cache_ttl(tmp_path, tls_port, monkeypatch):
+    calls = []
+    probe_all = latency.probe_all
+
+    def counting(hosts, *args, **kwargs):
+        calls.append(list(hosts))
+        return probe_all(hosts, *args, **kwargs)
+
+    monkeypatch.setattr(latency, "probe_all", counting)
+    first = probe(tmp_path, tls_port)
+    assert probe(tmp_path, tls_port) == first
+    assert len(calls) == 1
+
+    probe(tmp_path, tls_port, refresh=True)
+    assert len(calls) == 2
+    probe(tmp_path, tls_port, ttl=0)
+    assert len(calls) == 3
+    # Results are cached per endpoint: another port is another entry
+    probe(tmp_path, closed_port())
+    assert len(calls) == 4
+
+
+def test_cached_latencies_probe_in_the_background(tmp_path, tls_port, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    probe_all = latency.probe_all
+
+    async def slow(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return await probe_all(*args, **kwargs)
+
+    monkeypatch.setattr(latency, "probe_all", slow)
+    kwargs = dict(template="127.0.0.1", port=tls_port, ssl_context=latency.insecure_context(),
+                  cache_path=str(tmp_path / "latency_cache.json"))
+
+    # Nothing cached yet: the page gets a placeholder while the probe runs
+    assert latency.cached_latencies("aws", ["local"], **kwargs) == {"local": None}
+    assert started.wait(5)
+    assert latency.describe(None) == "measuring..."
+    # A second page load neither blocks nor starts another probe
+    assert latency.cached_latencies("aws", ["local"], **kwargs) == {"local": None}
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "latency-aws":
+            thread.join(5)
+
+    cached = latency.cached_latencies("aws", ["local"], **kwargs)["local"]
+    assert cached["error"] is None and cached["tls_ms"] > 0
+
+
+def result(connect_ms):
+    return {"host": "h", "port": 443, "dns_ms": 1.0, "connect_ms": connect_ms,
+            "tls_ms": None if connect_ms is None else 2 * connect_ms, "error": None if connect_ms else "timeout"}
+
+
+LATENCIES = {"a": result(None), "b": result(80.0), "c": result(12.5), "d": None, "e": result(40.0)}
+
+
+def test_unreachable_and_unmeasured_regions_sort_last():
+    assert latency.latency_key(LATENCIES["a"]) == latency.UNREACHABLE_MS
+    assert latency.by_latency(LATENCIES) == ["c", "e", "b", "a", "d"]
+
+
+def test_aws_selector_page_order(tmp_path, monkeypatch):
+    select = load_script(AWS_DIR, "select-regions.py", "aws_select_regions")
+    monkeypatch.setattr(select, "REGIONS_HTML_FILE", tmp_path / "regions.html")
+    select.generate_html(latency.by_latency(LATENCIES), LATENCIES)
+
+    html = (tmp_path / "regions.html").read_text()
+    rows = re.findall(r'data-region="(\w+)" data-latency="([\d.e+]+)"', html)
+    assert [r for r, _ in rows] == ["c", "e", "b", "a", "d"]
+    keys = [float(k) for _, k in rows]
+    assert keys == sorted(keys)
+    assert html.count("unreachable") == 1 and html.count("measuring...") == 1